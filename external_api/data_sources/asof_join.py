@@ -0,0 +1,167 @@
+"""
+As-of join over sorted timestamp arrays
+
+Matches every left timestamp to the last (backward), next (forward) or
+closest (nearest) right timestamp within an optional tolerance, using
+np.searchsorted over whole arrays, so joining millions of rows needs no
+Python-level loops or dicts. Adapters read series straight from the local
+stores (OhlcvStore for equities, PriceSeriesStore for commodities and
+metals) without touching the network.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .commodity_poller import PriceSeriesStore
+from .ohlcv_store import OhlcvStore
+
+# (timestamps, {列名: 数组})，timestamps 已升序排列
+Series = Tuple[np.ndarray, Dict[str, np.ndarray]]
+
+DIRECTIONS = ("backward", "forward", "nearest")
+
+
+def asof_indices(
+    left: np.ndarray,
+    right: np.ndarray,
+    direction: str = "backward",
+    tolerance: Optional[float] = None,
+    allow_exact_matches: bool = True,
+) -> np.ndarray:
+    """
+    每个 left 时间戳在 right 中匹配到的下标
+
+    Args:
+        left: 左侧时间戳（无需排序）
+        right: 右侧时间戳，必须升序；相同时间戳时 backward 取最后一个，forward 取第一个
+        direction: backward 取不晚于 left 的最后一个，forward 取不早于 left 的第一个，nearest 取距离最近的（距离相同时取 backward）
+        tolerance: 时间差超过此值视为无匹配
+        allow_exact_matches: 为 False 时时间戳相同不算匹配
+
+    Returns:
+        np.ndarray: int64 下标，无匹配处为 -1
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction}")
+    left, right = np.asarray(left), np.asarray(right)
+    n = right.size
+    if n == 0:
+        return np.full(left.shape, -1, dtype=np.int64)
+
+    backward = np.searchsorted(right, left, side="right" if allow_exact_matches else "left") - 1
+    forward = np.searchsorted(right, left, side="left" if allow_exact_matches else "right")
+    backward_ok = backward >= 0
+    forward_ok = forward < n
+    if direction == "backward":
+        index, ok = backward, backward_ok
+    elif direction == "forward":
+        index, ok = forward, forward_ok
+    else:
+        back_gap = np.where(backward_ok, left - right[np.maximum(backward, 0)], np.inf)
+        fwd_gap = np.where(forward_ok, right[np.minimum(forward, n - 1)] - left, np.inf)
+        use_forward = fwd_gap < back_gap
+        index = np.where(use_forward, forward, backward)
+        ok = np.where(use_forward, forward_ok, backward_ok)
+
+    index = np.where(ok, index, -1).astype(np.int64)
+    if tolerance is not None:
+        matched = index >= 0
+        gap = np.abs(right[np.maximum(index, 0)] - left)
+        index = np.where(matched & (gap <= tolerance), index, -1)
+    return index
+
+
+def take(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """按 asof_indices 的结果取值，无匹配处为 nan（整数列转为 float64）"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        values = values.astype(np.float64)
+    if values.size == 0:
+        return np.full(index.shape, np.nan)
+    result = values[np.maximum(index, 0)]
+    if values.dtype.kind == "f":
+        result[index < 0] = np.nan
+    else:
+        result = np.where(index < 0, None, result)
+    return result
+
+
+def asof_join(
+    left: Series,
+    rights: Mapping[str, Series],
+    direction: str = "backward",
+    tolerance: Optional[float] = None,
+    allow_exact_matches: bool = True,
+) -> Dict[str, np.ndarray]:
+    """
+    把多个右侧序列按时间对齐到左侧序列
+
+    Args:
+        left: (timestamps, columns) 左侧序列
+        rights: {名称: (timestamps, columns)} 右侧序列，时间戳升序
+        direction: backward|forward|nearest
+        tolerance: 最大时间差（与时间戳同单位）
+        allow_exact_matches: 时间戳相同是否算匹配
+
+    Returns:
+        Dict[str, np.ndarray]: {"timestamp": 左侧时间戳, 左侧列..., "名称.列": 对齐后的值..., "名称.timestamp": 匹配到的右侧时间戳}，
+        无匹配处为 nan
+
+    Examples:
+        spy = ohlcv_series(store, "SPY", "1d", shift=US_CLOSE_OFFSET)
+        gold = price_series(prices, "metal/gold/USD", fields=("mid",))
+        joined = asof_join(spy, {"gold": gold}, tolerance=6 * 3600)
+        ratio = joined["close"] / joined["gold.mid"]
+    """
+    left_ts, left_columns = left
+    result: Dict[str, np.ndarray] = {"timestamp": np.asarray(left_ts)}
+    result.update({name: np.asarray(column) for name, column in left_columns.items()})
+    for name, (right_ts, right_columns) in rights.items():
+        index = asof_indices(left_ts, right_ts, direction, tolerance, allow_exact_matches)
+        result[f"{name}.timestamp"] = take(right_ts, index)
+        for column, values in right_columns.items():
+            result[f"{name}.{column}"] = take(values, index)
+    return result
+
+
+# 美股日线时间戳为开盘时间，加上此偏移即为收盘时间
+US_CLOSE_OFFSET = int(6.5 * 3600)
+
+
+def ohlcv_series(
+    store: OhlcvStore,
+    symbol: str,
+    interval: str = "1d",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    fields: Iterable[str] = ("close",),
+    shift: int = 0,
+) -> Series:
+    """
+    从本地行情存储读取序列
+
+    Args:
+        store: OhlcvStore
+        symbol: 股票代码
+        interval: 周期
+        start: 起始时间戳（含）
+        end: 结束时间戳（不含）
+        fields: 读取的列
+        shift: 加到时间戳上的秒数，如 US_CLOSE_OFFSET 把日线对齐到收盘时间
+    """
+    bars = store.read(symbol, interval, start if start is not None else np.iinfo(np.int64).min, end if end is not None else np.iinfo(np.int64).max)
+    return bars["timestamp"] + shift, {name: bars[name] for name in fields}
+
+
+def price_series(
+    store: PriceSeriesStore,
+    series: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Series:
+    """从商品/金属价格存储读取序列，如 "metal/gold/USD"、"commodity/COCOA/USD" """
+    history = store.history(series, start, end)
+    names = fields if fields is not None else [name for name in history if name not in ("series", "timestamps")]
+    return history["timestamps"], {name: history[name] for name in names}
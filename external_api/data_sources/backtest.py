@@ -0,0 +1,205 @@
+"""
+向量化回测
+
+Signals, positions, trading costs and PnL are numpy operations over arrays
+shaped (n_params, n_symbols, n_bars), so one pass evaluates a whole
+universe for a batch of parameter sets. sweep() splits the parameter grid
+into chunks and runs them in a process pool; the price matrix is sent to
+each worker once through the pool initializer.
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .correlation import align_prices
+from .indicators import ema, sma
+
+logger = logging.getLogger("backtest")
+
+Strategy = Callable[..., np.ndarray]
+
+
+def sma_crossover(close: np.ndarray, fast: int = 20, slow: int = 50, allow_short: bool = False) -> np.ndarray:
+    """快线在慢线之上做多，否则空仓（allow_short 时做空）"""
+    fast_ma, slow_ma = sma(close, fast), sma(close, slow)
+    position = np.where(fast_ma > slow_ma, 1.0, -1.0 if allow_short else 0.0)
+    return np.where(np.isnan(slow_ma), 0.0, position)
+
+
+def ema_crossover(close: np.ndarray, fast: int = 12, slow: int = 26, allow_short: bool = False) -> np.ndarray:
+    fast_ma, slow_ma = ema(close, fast), ema(close, slow)
+    position = np.where(fast_ma > slow_ma, 1.0, -1.0 if allow_short else 0.0)
+    return np.where(np.isnan(slow_ma), 0.0, position)
+
+
+def momentum(close: np.ndarray, lookback: int = 60, allow_short: bool = False) -> np.ndarray:
+    """过去 lookback 个 bar 收益为正时做多"""
+    past = np.full(close.shape, np.nan)
+    past[..., lookback:] = close[..., :-lookback]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change = close / past - 1
+    position = np.where(change > 0, 1.0, -1.0 if allow_short else 0.0)
+    return np.where(np.isnan(change), 0.0, position)
+
+
+def mean_reversion(close: np.ndarray, window: int = 20, entry_z: float = 1.0) -> np.ndarray:
+    """价格低于均值 entry_z 个标准差时做多，高于时做空"""
+    mean = sma(close, window)
+    sq_mean = sma(close * close, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (close - mean) / np.sqrt(np.maximum(sq_mean - mean * mean, 0.0))
+    position = np.where(z < -entry_z, 1.0, np.where(z > entry_z, -1.0, 0.0))
+    return np.where(np.isnan(z), 0.0, position)
+
+
+STRATEGIES: Dict[str, Strategy] = {
+    "sma_crossover": sma_crossover,
+    "ema_crossover": ema_crossover,
+    "momentum": momentum,
+    "mean_reversion": mean_reversion,
+}
+
+
+def run_backtest(close: np.ndarray, positions: np.ndarray, cost_bps: float = 5.0, periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """
+    按目标仓位计算逐 bar 收益和汇总指标
+
+    t 时刻的仓位在 t+1 的收益上生效，避免未来函数。换手按仓位变化绝对值计，成本为换手 * cost_bps / 10000。
+
+    Args:
+        close: (..., n_bars) 收盘价
+        positions: 与 close 可广播的目标仓位，如 (n_params, n_symbols, n_bars)
+        cost_bps: 单边交易成本（基点）
+        periods_per_year: 年化使用的 bar 数
+
+    Returns:
+        Dict[str, np.ndarray]: net_returns (..., n_bars)，以及 total_return、annual_return、volatility、sharpe、max_drawdown、turnover、trades (...)
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bar_returns = np.zeros(close.shape)
+        bar_returns[..., 1:] = close[..., 1:] / close[..., :-1] - 1
+    bar_returns = np.nan_to_num(bar_returns, nan=0.0, posinf=0.0, neginf=0.0)
+    positions = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+
+    held = np.zeros(np.broadcast_shapes(positions.shape, close.shape))
+    held[..., 1:] = positions[..., :-1]
+    changes = np.abs(np.diff(held, axis=-1, prepend=0.0))
+    net = held * bar_returns - changes * cost_bps / 10000.0
+
+    equity = np.cumprod(1.0 + net, axis=-1)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    n_bars = close.shape[-1]
+    total_return = equity[..., -1] - 1.0 if n_bars else np.zeros(net.shape[:-1])
+    mean, std = net.mean(axis=-1), net.std(axis=-1, ddof=1) if n_bars > 1 else np.zeros(net.shape[:-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+        annual_return = np.power(np.maximum(1.0 + total_return, 0.0), periods_per_year / max(n_bars, 1)) - 1.0
+    return {
+        "net_returns": net,
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "volatility": std * np.sqrt(periods_per_year),
+        "sharpe": sharpe,
+        "max_drawdown": (equity / peak - 1.0).min(axis=-1) if n_bars else np.zeros(net.shape[:-1]),
+        "turnover": changes.sum(axis=-1),
+        "trades": np.count_nonzero(changes, axis=-1),
+    }
+
+
+def expand_grid(param_grid: Union[Dict[str, Sequence[Any]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """{"fast": [5, 10], "slow": [50]} -> [{"fast": 5, "slow": 50}, {"fast": 10, "slow": 50}]"""
+    if isinstance(param_grid, list):
+        return param_grid
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+
+
+_worker_close: Optional[np.ndarray] = None
+
+
+def _init_worker(close: np.ndarray) -> None:
+    global _worker_close
+    _worker_close = close
+
+
+def _run_chunk(
+    strategy: Union[str, Strategy], params: List[Dict[str, Any]], cost_bps: float, periods_per_year: int, close: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    close = _worker_close if close is None else close
+    func = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    positions = np.stack([func(close, **p) for p in params])
+    metrics = run_backtest(close, positions, cost_bps, periods_per_year)
+    metrics.pop("net_returns")
+    return metrics
+
+
+def sweep(
+    close: np.ndarray,
+    strategy: Union[str, Strategy],
+    param_grid: Union[Dict[str, Sequence[Any]], List[Dict[str, Any]]],
+    cost_bps: float = 5.0,
+    periods_per_year: int = 252,
+    processes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    对参数网格批量回测
+
+    Args:
+        close: (n_symbols, n_bars) 收盘价矩阵
+        strategy: STRATEGIES 中的名称，或可被 pickle 的模块级函数 f(close, **params) -> positions
+        param_grid: 参数网格 {名称: 候选值列表} 或参数字典列表
+        cost_bps: 单边交易成本（基点）
+        periods_per_year: 年化使用的 bar 数
+        processes: 进程数，默认 CPU 数；0 或 1 时在当前进程内计算
+        chunk_size: 每个任务的参数组数，默认平均分给各进程
+
+    Returns:
+        Dict[str, Any]: {"params": [...], "metrics": {指标名: (n_params, n_symbols) 数组}}
+    """
+    params = expand_grid(param_grid)
+    close = np.asarray(close, dtype=np.float64)
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    if not params:
+        return {"params": [], "metrics": {}}
+
+    if processes <= 1 or len(params) == 1:
+        metrics = _run_chunk(strategy, params, cost_bps, periods_per_year, close)
+        return {"params": params, "metrics": metrics}
+
+    chunk_size = chunk_size or -(-len(params) // processes)
+    chunks = [params[i : i + chunk_size] for i in range(0, len(params), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(processes, len(chunks)), initializer=_init_worker, initargs=(close,)) as pool:
+        results = list(pool.map(_run_chunk, [strategy] * len(chunks), chunks, [cost_bps] * len(chunks), [periods_per_year] * len(chunks)))
+    metrics = {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+    return {"params": params, "metrics": metrics}
+
+
+def backtest_prices(
+    data: Dict[str, Any],
+    strategy: Union[str, Strategy],
+    param_grid: Union[Dict[str, Sequence[Any]], List[Dict[str, Any]]],
+    cost_bps: float = 5.0,
+    periods_per_year: int = 252,
+    processes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    直接对 get_multiple_stocks_price / get_stock_price 的返回值回测
+
+    Examples:
+        prices = await client.yahoo_finance.get_multiple_stocks_price(["AAPL", "MSFT"], "2020-01-01", "2024-12-31", columnar=True)
+        result = backtest_prices(prices, "sma_crossover", {"fast": [10, 20], "slow": [50, 100, 200]})
+        best = result["metrics"]["sharpe"].mean(axis=1).argmax()
+
+    Returns:
+        Dict[str, Any]: {"symbols": [...], "params": [...], "metrics": {指标名: (n_params, n_symbols) 数组}}
+    """
+    aligned = align_prices(data, "close")
+    result = sweep(aligned.values, strategy, param_grid, cost_bps, periods_per_year, processes)
+    result["symbols"] = aligned.symbols
+    return result
@@ -93,26 +93,31 @@ class BookingSource(BaseAPI):
                             "segments": [          # Segment information
                                 {
                                     "flight_number": "CA1385",  # Flight number
+                                    "carrier": "CA", # Marketing carrier code
                                     "from": "PEK", # Departure airport
                                     "to": "CAN",   # Arrival airport
                                     "departure": "2025-04-19T20:05:00",  # Departure time
                                     "arrival": "2025-04-19T23:10:00",     # Arrival time
-                                    "total_time": 3.08  # Segment flight time
+                                    "total_time": "3 hours 5 minutes",  # Segment flight time
+                                    "total_seconds": 11100  # Segment flight time in seconds
                                 },
                                 {
                                     "flight_number": "CA1386",
+                                    "carrier": "CA",
                                     "from": "CAN",
                                     "to": "PEK",
                                     "departure": "2025-04-26T06:25:00",
                                     "arrival": "2025-04-26T09:20:00",
-                                    "total_time": 2.92  # Segment flight time
+                                    "total_time": "2 hours 55 minutes",  # Segment flight time
+                                    "total_seconds": 10500  # Segment flight time in seconds
                                 }
                             ],
                             "price": {             # Price information
                                 "currency": "CNY", # Currency
                                 "amount": 14272.26 # Total price
                             },
-                            "total_time": 6.00  # Total flight time
+                            "total_time": "6 hours 0 minutes",  # Total flight time
+                            "total_seconds": 21600  # Total flight time in seconds
                         }
                     ]
                 }
@@ -196,7 +201,8 @@ class BookingSource(BaseAPI):
                 for segment in offer["segments"]:
                     # Get flight number and stop info
                     for leg in segment["legs"]:
-                        flight_number = f"{leg['flightInfo']['carrierInfo']['marketingCarrier']}{leg['flightInfo']['flightNumber']}"
+                        carrier = leg["flightInfo"]["carrierInfo"]["marketingCarrier"]
+                        flight_number = f"{carrier}{leg['flightInfo']['flightNumber']}"
                         # Count stops
                         stops_count += len(leg.get("flightStops", []))
 
@@ -204,11 +210,13 @@ class BookingSource(BaseAPI):
                         legs_info.append(
                             {
                                 "flight_number": flight_number,
+                                "carrier": carrier,
                                 "from": leg["departureAirport"]["code"],
                                 "to": leg["arrivalAirport"]["code"],
                                 "departure": leg["departureTime"],
                                 "arrival": leg["arrivalTime"],
                                 "total_time": self._format_duration(leg["totalTime"]),  # Segment flight time
+                                "total_seconds": leg["totalTime"],
                             }
                         )
                         total_time += leg["totalTime"]
@@ -221,6 +229,7 @@ class BookingSource(BaseAPI):
                         "stops": stops_count,
                         "segments": legs_info,
                         "total_time": self._format_duration(total_time),
+                        "total_seconds": total_time,
                         "price": {"currency": price["currencyCode"], "amount": total_amount},
                     }
                 )
@@ -7,6 +7,7 @@ import inspect
 import logging
 import os
 import pkgutil
+import tempfile
 import threading
 from enum import Enum
 from pathlib import Path
@@ -18,6 +19,8 @@ from .base import EXCLUDE_METHODS, BaseAPI
 
 # 用于在shell中设置LLM_GATEWAY_BASE_URL环境变量
 LLM_GATEWAY_BASE_URL_ENV_NAME = "LLM_GATEWAY_BASE_URL"
+# 本地缓存/存储目录
+EXTERNAL_API_CACHE_DIR_ENV_NAME = "EXTERNAL_API_CACHE_DIR"
 
 logger = logging.getLogger("data_sources_client")
 
@@ -27,6 +30,10 @@ def get_external_api_proxy_url() -> str:
     return f"{base_url}/llm/external-api"
 
 
+def get_cache_dir() -> str:
+    return os.getenv(EXTERNAL_API_CACHE_DIR_ENV_NAME) or os.path.join(tempfile.gettempdir(), "external_api_cache")
+
+
 config = {
     "name": "rapid_api",
     "twitter_base_url": "twitter154.p.rapidapi.com",
@@ -38,6 +45,7 @@ config = {
     "metal_base_url": "live-gold-prices.p.rapidapi.com",
     "serper_base_url": "google.serper.dev",
     "external_api_proxy_url": get_external_api_proxy_url(),
+    "cache_dir": get_cache_dir(),
     "timeout": 60,
 }
 
@@ -10,9 +10,13 @@ from typing import Any, Dict, Optional
 import aiohttp
 
 from .base import BaseAPI
+from .ttl_cache import TTLCache
 
 logger = logging.getLogger("commodities_source")
 
+# 支持的商品/货币列表很少变化
+SUPPORTED_TTL = 24 * 3600
+
 
 class CommoditiesSource(BaseAPI):
     """Commodity price data source"""
@@ -33,6 +37,7 @@ class CommoditiesSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        self._supported_cache = TTLCache(max_entries=1)
 
     @property
     def source_name(self) -> str:
@@ -80,6 +85,9 @@ class CommoditiesSource(BaseAPI):
         #     ... else:
         #     ...     print(f"Failed to get supported commodities: {result['error']}")
         # """
+        cached = self._supported_cache.get("supported")
+        if cached is not None:
+            return cached
         try:
             request_url = f"{self.proxy_url}/v1/supported"
 
@@ -100,10 +108,12 @@ class CommoditiesSource(BaseAPI):
             if not data.get("success", False):
                 raise ValueError(f"API response failed: {data}")
 
-            return {
+            result = {
                 "success": True,
                 "data": {"commodities": data.get("supported_commodities", {}), "currencies": data.get("supported_currencies", {})},
             }
+            self._supported_cache.set("supported", result, SUPPORTED_TTL)
+            return result
 
         except asyncio.TimeoutError:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
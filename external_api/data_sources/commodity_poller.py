@@ -0,0 +1,337 @@
+"""
+Commodity and metal price polling
+
+CommoditiesSource and MetalSource only return point-in-time quotes.
+CommodityMetalPoller samples the configured commodities, metals and
+currencies on a schedule (commodity codes batched into one request per
+currency) and appends every quote to a fixed-size in-memory ring buffer per
+series. PriceSeriesStore periodically compacts the buffers to append-only
+files on disk, so history queries are served locally.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .client import get_cache_dir
+from .commodities_source import CommoditiesSource
+from .metal_source import MetalSource
+
+logger = logging.getLogger("commodity_poller")
+
+COMMODITY_FIELDS = ("open", "high", "low", "prev", "current")
+METAL_FIELDS = ("bid", "mid", "high", "low")
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of timestamped samples, oldest overwritten first"""
+
+    def __init__(self, capacity: int, n_fields: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.values = np.full((capacity, n_fields), np.nan)
+        # 累计写入条数，用于判断哪些样本尚未落盘
+        self.total = 0
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        slot = self.total % self.capacity
+        self.timestamps[slot] = timestamp
+        self.values[slot] = values
+        self.total += 1
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def tail(self, since_total: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """累计序号不小于 since_total 且仍在缓冲区中的样本，按时间顺序"""
+        first = max(since_total, self.total - self.capacity)
+        slots = np.arange(first, self.total) % self.capacity
+        return self.timestamps[slots], self.values[slots]
+
+
+class PriceSeriesStore:
+    """Ring-buffered price series with append-only compaction to disk
+
+    Each series (e.g. "commodity/COCOA/USD") has a RingBuffer in memory and a
+    ``<series>.bin`` file of fixed-size records on disk. flush() appends the
+    samples written since the last flush; samples that were overwritten in
+    the ring before a flush are lost, so flush at least every ``capacity``
+    samples.
+
+    Example:
+        >>> store = PriceSeriesStore("/tmp/external_api_cache/commodity_prices")
+        >>> store.append("commodity/COCOA/USD", COMMODITY_FIELDS, time.time(), [9270, 9633, 9201, 9288, 9590])
+        >>> store.flush()
+        >>> store.history("commodity/COCOA/USD", start=time.time() - 86400)
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, capacity: int = 4096):
+        self.root_dir = root_dir or os.path.join(get_cache_dir(), "commodity_prices")
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._rings: Dict[str, RingBuffer] = {}
+        self._fields: Dict[str, Tuple[str, ...]] = {}
+        self._flushed: Dict[str, int] = {}
+
+    def _path(self, series: str, suffix: str) -> str:
+        return os.path.join(self.root_dir, re.sub(r"[^\w.=^-]", "_", series) + suffix)
+
+    def _dtype(self, fields: Sequence[str]) -> np.dtype:
+        return np.dtype([("timestamp", "f8")] + [(name, "f8") for name in fields])
+
+    def fields(self, series: str) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            if series not in self._fields:
+                path = self._path(series, ".json")
+                if not os.path.exists(path):
+                    return None
+                with open(path, "r", encoding="utf-8") as f:
+                    self._fields[series] = tuple(json.load(f)["fields"])
+            return self._fields[series]
+
+    def append(self, series: str, fields: Sequence[str], timestamp: float, values: Sequence[float]) -> None:
+        fields = tuple(fields)
+        with self._lock:
+            ring = self._rings.get(series)
+            if ring is None:
+                ring = self._rings[series] = RingBuffer(self.capacity, len(fields))
+                self._fields[series] = fields
+                self._flushed[series] = 0
+                meta_path = self._path(series, ".json")
+                if not os.path.exists(meta_path):
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"series": series, "fields": list(fields)}, f)
+            ring.append(timestamp, values)
+
+    def flush(self) -> int:
+        """
+        Append samples written since the last flush to disk
+
+        Returns:
+            int: Number of samples written
+        """
+        written = 0
+        with self._lock:
+            for series, ring in self._rings.items():
+                flushed = self._flushed[series]
+                if ring.total - flushed > ring.capacity:
+                    logger.warning(f"{ring.total - flushed - ring.capacity} samples of {series} were overwritten before flush")
+                timestamps, values = ring.tail(flushed)
+                if timestamps.size == 0:
+                    continue
+                records = np.zeros(timestamps.size, dtype=self._dtype(self._fields[series]))
+                records["timestamp"] = timestamps
+                for i, name in enumerate(self._fields[series]):
+                    records[name] = values[:, i]
+                with open(self._path(series, ".bin"), "ab") as f:
+                    records.tofile(f)
+                self._flushed[series] = ring.total
+                written += timestamps.size
+        return written
+
+    def max_unflushed(self) -> int:
+        """各序列中未写盘样本数的最大值，接近 capacity 时应立即 flush"""
+        with self._lock:
+            return max((ring.total - self._flushed[series] for series, ring in self._rings.items()), default=0)
+
+    def series(self) -> List[str]:
+        """所有已知序列（内存中或磁盘上）"""
+        names = set(self._rings)
+        for name in os.listdir(self.root_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.root_dir, name), "r", encoding="utf-8") as f:
+                    names.add(json.load(f)["series"])
+        return sorted(names)
+
+    def history(self, series: str, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Samples of a series with start <= timestamp < end, oldest first
+
+        Returns:
+            Dict[str, Any]: {"series": "...", "timestamps": ndarray, <field>: ndarray, ...}
+        """
+        fields = self.fields(series)
+        if fields is None:
+            return {"series": series, "timestamps": np.zeros(0)}
+        dtype = self._dtype(fields)
+        path = self._path(series, ".bin")
+        with self._lock:
+            size = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+            on_disk = np.memmap(path, dtype=dtype, mode="r", shape=(size,)) if size else np.zeros(0, dtype=dtype)
+            ring = self._rings.get(series)
+            pending_ts, pending_values = ring.tail(self._flushed[series]) if ring is not None else (np.zeros(0), np.zeros((0, len(fields))))
+
+        lo, hi = np.searchsorted(on_disk["timestamp"], [start if start is not None else -np.inf, end if end is not None else np.inf])
+        disk = on_disk[lo:hi]
+        keep = (pending_ts >= (start if start is not None else -np.inf)) & (pending_ts < (end if end is not None else np.inf))
+        result: Dict[str, Any] = {"series": series, "timestamps": np.concatenate([disk["timestamp"], pending_ts[keep]])}
+        for i, name in enumerate(fields):
+            result[name] = np.concatenate([disk[name], pending_values[keep, i]])
+        return result
+
+    def latest(self, series: str) -> Optional[Dict[str, Any]]:
+        """最近一次样本，优先取内存中的数据"""
+        with self._lock:
+            ring = self._rings.get(series)
+            if ring is not None and ring.total:
+                timestamps, values = ring.tail(ring.total - 1)
+                return {"timestamp": float(timestamps[0]), **dict(zip(self._fields[series], values[0].tolist()))}
+        history = self.history(series)
+        if history["timestamps"].size == 0:
+            return None
+        return {"timestamp": float(history["timestamps"][-1]), **{name: float(history[name][-1]) for name in self.fields(series) or ()}}
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class CommodityMetalPoller:
+    """Samples commodity and metal quotes into a PriceSeriesStore
+
+    Example:
+        >>> poller = CommodityMetalPoller(client.commodities, client.metal, ["COCOA", "CORN", "OIL"], currencies=["USD", "EUR"])
+        >>> await poller.sample()
+        >>> poller.store.history("commodity/COCOA/USD", start=time.time() - 3600)
+    """
+
+    def __init__(
+        self,
+        commodities: Optional[CommoditiesSource],
+        metals: Optional[MetalSource],
+        commodity_codes: Iterable[str] = (),
+        currencies: Iterable[str] = ("USD",),
+        metal_names: Optional[Iterable[str]] = None,
+        store: Optional[PriceSeriesStore] = None,
+        interval: float = 300,
+        flush_interval: float = 3600,
+        batch_size: int = 20,
+        concurrency: int = 4,
+    ):
+        """
+        Args:
+            commodities: Commodities data source, None to skip commodities
+            metals: Metal data source, None to skip metals
+            commodity_codes: Commodity codes, validated against get_supported_commodities
+            currencies: Quote currencies for both commodities and metals
+            metal_names: Metal keys to keep (e.g. "gold"), None keeps all returned
+            store: Series store, defaults to one under the cache directory
+            interval: Seconds between samples
+            flush_interval: Seconds between compactions to disk; a series whose ring buffer is 3/4 full is flushed earlier
+            batch_size: Commodity codes per request
+            concurrency: Maximum concurrent requests
+        """
+        self.commodities = commodities
+        self.metals = metals
+        self.commodity_codes = list(dict.fromkeys(code.upper() for code in commodity_codes))
+        self.currencies = list(dict.fromkeys(code.upper() for code in currencies))
+        self.metal_names = {name.lower() for name in metal_names} if metal_names is not None else None
+        self.store = store or PriceSeriesStore()
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._last_flush = time.time()
+
+    async def _supported_codes(self) -> Optional[set]:
+        """上游支持的商品代码，获取失败时为 None（不做校验）"""
+        result = await self.commodities.get_supported_commodities()
+        if not result["success"]:
+            logger.warning(f"Could not load supported commodities: {result['error']}")
+            return None
+        supported = result["data"]["commodities"]
+        if isinstance(supported, dict):
+            return {code.upper() for code in supported}
+        return {item.get("commodity_code", "").upper() for item in supported if isinstance(item, dict)}
+
+    async def sample(self) -> Dict[str, Any]:
+        """
+        Take one sample of every configured series
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"timestamp": 1700000000.0, "samples": 12, "requests": 3, "failed": [...]}}
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # (类型, 货币, 逗号分隔的商品代码)
+        requests: List[Tuple[str, str, str]] = []
+        failed: List[Dict[str, Any]] = []
+
+        codes = self.commodity_codes
+        if self.commodities is not None and codes:
+            supported = await self._supported_codes()
+            if supported is not None:
+                unknown = [code for code in codes if code not in supported]
+                if unknown:
+                    failed.append({"kind": "commodity", "codes": unknown, "error": "Unsupported commodity codes"})
+                codes = [code for code in codes if code in supported]
+            for currency in self.currencies:
+                # 多个商品代码合并到一次请求
+                for i in range(0, len(codes), self.batch_size):
+                    batch = ",".join(codes[i : i + self.batch_size])
+                    requests.append(("commodity", currency, batch))
+        if self.metals is not None:
+            for currency in self.currencies:
+                requests.append(("metal", currency, ""))
+
+        async def run(kind: str, currency: str, batch: str) -> Dict[str, Any]:
+            async with semaphore:
+                if kind == "commodity":
+                    return await self.commodities.get_commodities_price(batch, currency)
+                return await self.metals.get_metal_price(currency)
+
+        results = await asyncio.gather(*(run(*request) for request in requests))
+        now = time.time()
+        samples = 0
+        for (kind, currency, _), result in zip(requests, results):
+            if not result["success"]:
+                failed.append({"kind": kind, "currency": currency, "error": result["error"]})
+                continue
+            if kind == "commodity":
+                for code, rate in (result["data"].get("rates") or {}).items():
+                    if isinstance(rate, dict):
+                        values = [_to_float(rate.get(name)) for name in COMMODITY_FIELDS]
+                    else:
+                        # 部分商品只返回当前价
+                        values = [np.nan] * (len(COMMODITY_FIELDS) - 1) + [_to_float(rate)]
+                    self.store.append(f"commodity/{code.upper()}/{currency}", COMMODITY_FIELDS, now, values)
+                    samples += 1
+            else:
+                for name, info in (result["data"].get("data") or {}).items():
+                    if self.metal_names is not None and name.lower() not in self.metal_names:
+                        continue
+                    values = [_to_float(info.get(field)) for field in METAL_FIELDS]
+                    self.store.append(f"metal/{name.lower()}/{currency}", METAL_FIELDS, now, values)
+                    samples += 1
+
+        # 定时写盘；环形缓冲快满时提前写盘，避免样本被覆盖
+        if now - self._last_flush >= self.flush_interval or self.store.max_unflushed() >= self.store.capacity * 3 // 4:
+            self.store.flush()
+            self._last_flush = now
+        return {"success": True, "data": {"timestamp": now, "samples": samples, "requests": len(requests), "failed": failed}}
+
+    async def run_forever(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Sample every ``interval`` seconds until stop_event is set, flushing on exit"""
+        stop_event = stop_event or asyncio.Event()
+        try:
+            while not stop_event.is_set():
+                started = time.time()
+                result = await self.sample()
+                if result["data"]["failed"]:
+                    logger.warning(f"Price sample had {len(result['data']['failed'])} failures")
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=max(0.0, self.interval - (time.time() - started)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.store.flush()
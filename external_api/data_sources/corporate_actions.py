@@ -0,0 +1,133 @@
+"""
+公司行为（分红/拆股）与复权
+
+Yahoo chart prices are split-adjusted as of the moment they are fetched and
+are not dividend-adjusted. Bars kept in OhlcvStore therefore carry the split
+basis of their fetch time; when a later split is discovered, split_factors
+gives the per-bar ratio that moves older bars onto the current basis, so the
+stored history is rescaled in place instead of being refetched. Dividend
+back-adjustment is derived at read time from the stored events. Both are
+vectorized: a reverse cumulative product over the events plus one
+searchsorted over the bars.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .ohlcv_store import EVENT_DTYPE, merge_events
+
+DIVIDEND = 0
+SPLIT = 1
+
+# 本地存储抓取时请求的事件类型
+CORPORATE_EVENTS = "div|split"
+
+
+def empty_events() -> np.ndarray:
+    return np.zeros(0, dtype=EVENT_DTYPE)
+
+
+def parse_chart_events(chart_data: Dict[str, Any]) -> np.ndarray:
+    """把 chart 结果中的 events.dividends / events.splits 解析为按时间排序的 EVENT_DTYPE 数组"""
+    events = chart_data.get("events") or {}
+    rows = []
+    for item in (events.get("dividends") or {}).values():
+        if item.get("amount"):
+            rows.append((int(item["date"]), DIVIDEND, float(item["amount"]), np.nan, np.nan))
+    for item in (events.get("splits") or {}).values():
+        numerator, denominator = float(item.get("numerator") or 0), float(item.get("denominator") or 0)
+        if numerator > 0 and denominator > 0:
+            rows.append((int(item["date"]), SPLIT, np.nan, numerator, denominator))
+    return merge_events(empty_events(), np.array(rows, dtype=EVENT_DTYPE))
+
+
+def events_to_dict(events: np.ndarray, date_format: str = "%Y-%m-%d") -> Dict[str, List[Dict[str, Any]]]:
+    """EVENT_DTYPE 数组转换为返回给调用方的格式"""
+    result: Dict[str, List[Dict[str, Any]]] = {"dividends": [], "splits": []}
+    for event in events.tolist():
+        timestamp, kind, amount, numerator, denominator = event
+        date = datetime.fromtimestamp(timestamp).strftime(date_format)
+        if kind == DIVIDEND:
+            result["dividends"].append({"date": date, "timestamp": timestamp, "amount": amount})
+        else:
+            result["splits"].append({"date": date, "timestamp": timestamp, "numerator": numerator, "denominator": denominator})
+    return result
+
+
+def _suffix_product(timestamps: np.ndarray, event_timestamps: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """每个时间点之后（ex-date 晚于该时间点）所有事件因子的乘积"""
+    # suffix[k] = factors[k] * factors[k + 1] * ...，最后补 1 表示之后没有事件
+    suffix = np.append(np.cumprod(factors[::-1])[::-1], 1.0)
+    return suffix[np.searchsorted(event_timestamps, timestamps, side="right")]
+
+
+def split_factors(timestamps: np.ndarray, events: np.ndarray, after: Optional[int] = None, until: Optional[int] = None) -> np.ndarray:
+    """
+    每个时间点之后的累计拆股比例
+
+    Args:
+        timestamps: bar 时间戳
+        events: EVENT_DTYPE 数组
+        after: 只计入 ex-date 晚于此时间的拆股
+        until: 只计入 ex-date 不晚于此时间的拆股
+
+    Returns:
+        np.ndarray: 与 timestamps 等长的比例，价格除以、成交量乘以该比例即换算到拆股后的基准
+    """
+    splits = events[events["kind"] == SPLIT]
+    if after is not None:
+        splits = splits[splits["timestamp"] > after]
+    if until is not None:
+        splits = splits[splits["timestamp"] <= until]
+    return _suffix_product(np.asarray(timestamps), splits["timestamp"], splits["numerator"] / splits["denominator"])
+
+
+def rebase_bars(bars: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """按 split_factors 把 bar 换算到新的拆股基准，返回新数组"""
+    rebased = np.array(bars)
+    for name in ("open", "high", "low", "close", "adjclose"):
+        rebased[name] = bars[name] / factors
+    rebased["volume"] = np.rint(bars["volume"] * factors).astype(np.int64)
+    return rebased
+
+
+def rebase_events(events: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """分红金额按 split_factors 换算到新的拆股基准，拆股记录不变"""
+    rebased = np.array(events)
+    dividends = events["kind"] == DIVIDEND
+    rebased["amount"][dividends] = events["amount"][dividends] / factors[dividends]
+    return rebased
+
+
+def dividend_factors(timestamps: np.ndarray, events: np.ndarray, close_timestamps: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    每个时间点的分红复权因子
+
+    每次分红的因子为 1 - amount / 除息日前最后一个收盘价，时间点的复权因子为其后所有分红因子的乘积。
+
+    Args:
+        timestamps: 需要复权的 bar 时间戳
+        events: EVENT_DTYPE 数组，应覆盖到最新，之后的分红同样影响更早的价格
+        close_timestamps: 用于查找除息前收盘价的参考序列时间戳（已排序）
+        close: 参考序列收盘价
+
+    Returns:
+        np.ndarray: 与 timestamps 等长的因子，价格乘以该因子即为复权价格；找不到除息前收盘价的分红不计入
+    """
+    dividends = events[events["kind"] == DIVIDEND]
+    previous = np.searchsorted(close_timestamps, dividends["timestamp"], side="left") - 1
+    prev_close = np.where(previous >= 0, np.asarray(close)[np.maximum(previous, 0)], np.nan) if len(close) else np.full(len(dividends), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factors = 1.0 - dividends["amount"] / prev_close
+    factors = np.where((factors > 0) & (factors <= 1), factors, 1.0)
+    return _suffix_product(np.asarray(timestamps), dividends["timestamp"], factors)
+
+
+def adjust_bars(bars: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """开高低收乘以复权因子，返回新数组"""
+    adjusted = np.array(bars)
+    for name in ("open", "high", "low", "close"):
+        adjusted[name] = bars[name] * factors
+    return adjusted
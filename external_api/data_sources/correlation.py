@@ -0,0 +1,264 @@
+"""
+多标的相关性/协方差计算
+
+align_prices puts many price series on one calendar with forward fill and an
+observed-value mask. Full-sample matrices use pairwise-complete
+observations computed with a few matrix products. RollingCovariance keeps
+running sums and applies rank-1 updates as bars enter and leave the window,
+so each step costs O(n_assets^2) instead of recomputing the whole window.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .indicators import series_of
+
+
+class AlignedPrices:
+    """Prices of several symbols on a shared calendar
+
+    Attributes:
+        symbols: Symbol per row
+        calendar: Calendar keys, datetime64[D] for unit "D" or epoch seconds for unit "s"
+        values: (n_symbols, n_dates) prices after forward fill, nan where no earlier value exists
+        observed: (n_symbols, n_dates) True where the symbol actually traded on that date
+    """
+
+    def __init__(self, symbols: List[str], calendar: np.ndarray, values: np.ndarray, observed: np.ndarray):
+        self.symbols = symbols
+        self.calendar = calendar
+        self.values = values
+        self.observed = observed
+
+    def log_returns(self) -> np.ndarray:
+        """(n_symbols, n_dates) 对数收益率，第一列及无价格处为 nan"""
+        result = np.full(self.values.shape, np.nan, dtype=self.values.dtype)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[:, 1:] = np.log(self.values[:, 1:] / self.values[:, :-1])
+        return result
+
+
+def _keys_and_values(series: Dict[str, Any], field: str, unit: str) -> Tuple[np.ndarray, np.ndarray]:
+    if "columns" in series:
+        columns = series["columns"]
+        dates, timestamps, values = columns.get("date"), columns["timestamp"], columns[field]
+    else:
+        prices = series["prices"]
+        dates = [p["date"] for p in prices]
+        timestamps = None
+        values = [p[field] for p in prices]
+    if unit == "D":
+        # 不同交易所的日线时间戳不同，按日期对齐
+        keys = np.array([d[:10] for d in dates], dtype="datetime64[D]")
+    elif timestamps is not None:
+        keys = np.asarray(timestamps, dtype=np.int64)
+    else:
+        keys = np.array(dates, dtype="datetime64[s]").astype(np.int64)
+    return keys, np.asarray(values, dtype=np.float64)
+
+
+def align_prices(
+    data: Dict[str, Any],
+    field: str = "close",
+    unit: str = "D",
+    calendar: Union[str, np.ndarray] = "union",
+    fill_limit: Optional[int] = None,
+    dtype: Any = np.float64,
+) -> AlignedPrices:
+    """
+    把 get_multiple_stocks_price 的结果对齐到同一日历
+
+    Args:
+        data: get_stock_price / get_multiple_stocks_price 的返回值或其中的 data
+        field: 价格字段
+        unit: "D" 按日期对齐（日线及以上），"s" 按时间戳对齐（分钟线）
+        calendar: "union" 取所有标的日期并集，"intersection" 取交集，或直接传入日历数组
+        fill_limit: 前向填充最多跨越的缺失个数，为空时不限制
+        dtype: 输出精度，大规模标的可用 np.float32
+
+    Returns:
+        AlignedPrices: 对齐后的价格矩阵及观测掩码
+    """
+    series = series_of(data)
+    parts = [_keys_and_values(s, field, unit) for s in series]
+    if isinstance(calendar, str):
+        if not parts:
+            keys = np.zeros(0, dtype="datetime64[D]" if unit == "D" else np.int64)
+        elif calendar == "union":
+            keys = np.unique(np.concatenate([k for k, _ in parts]))
+        elif calendar == "intersection":
+            keys = np.unique(parts[0][0])
+            for k, _ in parts[1:]:
+                keys = np.intersect1d(keys, k)
+        else:
+            raise ValueError(f"Unknown calendar: {calendar}")
+    else:
+        keys = np.asarray(calendar)
+
+    values = np.full((len(parts), keys.size), np.nan)
+    for row, (k, v) in enumerate(parts):
+        pos = np.searchsorted(keys, k)
+        inside = (pos < keys.size) & (keys[np.minimum(pos, keys.size - 1)] == k) if keys.size else np.zeros(k.size, dtype=bool)
+        values[row, pos[inside]] = v[inside]
+    observed = ~np.isnan(values)
+
+    # 前向填充：记录每个位置最近一次观测的下标
+    idx = np.where(observed, np.arange(keys.size), -1)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.where(idx >= 0, np.take_along_axis(values, np.maximum(idx, 0), axis=1), np.nan)
+    if fill_limit is not None:
+        filled = np.where(np.arange(keys.size) - idx > fill_limit, np.nan, filled)
+    return AlignedPrices([s["symbol"] for s in series], keys, filled.astype(dtype), observed)
+
+
+def _pairwise_sums(x: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """(n_assets, n_obs) 矩阵的成对完整观测统计量"""
+    valid = ~np.isnan(x)
+    v = valid.astype(x.dtype)
+    x0 = np.where(valid, x, 0)
+    n = v @ v.T
+    sx = x0 @ v.T  # sx[i, j]: i 在 i、j 同时有效时的和
+    sxx = (x0 * x0) @ v.T
+    sxy = x0 @ x0.T
+    return n, sx, sxx, sxy
+
+
+def _finish(n: np.ndarray, sx: np.ndarray, sxx: np.ndarray, sxy: np.ndarray, min_periods: int, correlation: bool) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+        if correlation:
+            var_i = (sxx - sx * sx / n) / (n - 1)
+            result = cov / np.sqrt(var_i * var_i.T)
+            result = np.clip(result, -1, 1)
+        else:
+            result = cov
+    return np.where(n >= max(min_periods, 2), result, np.nan)
+
+
+def covariance_matrix(returns: np.ndarray, min_periods: int = 2) -> np.ndarray:
+    """(n_assets, n_obs) 收益率的样本协方差矩阵，按成对完整观测计算"""
+    return _finish(*_pairwise_sums(np.asarray(returns)), min_periods=min_periods, correlation=False)
+
+
+def correlation_matrix(returns: np.ndarray, min_periods: int = 2) -> np.ndarray:
+    """(n_assets, n_obs) 收益率的相关系数矩阵，按成对完整观测计算"""
+    return _finish(*_pairwise_sums(np.asarray(returns)), min_periods=min_periods, correlation=True)
+
+
+class RollingCovariance:
+    """Rolling covariance/correlation over the last ``window`` observations
+
+    Each update adds the entering row and subtracts the leaving one with
+    outer products. With float32 state the running sums are rebuilt from the
+    window buffer every ``window`` steps to keep rounding drift bounded.
+
+    Example:
+        >>> rolling = RollingCovariance(n_assets=len(symbols), window=60)
+        >>> for row in returns.T:
+        ...     rolling.update(row)
+        >>> corr = rolling.correlation()
+    """
+
+    def __init__(self, n_assets: int, window: int, dtype: Any = np.float64, min_periods: Optional[int] = None):
+        self.n_assets = n_assets
+        self.window = window
+        self.dtype = np.dtype(dtype)
+        self.min_periods = min_periods or window
+        self._buffer = np.full((window, n_assets), np.nan, dtype=self.dtype)
+        self._count = 0
+        self._steps_since_rebuild = 0
+        self._reset_sums()
+
+    def _reset_sums(self) -> None:
+        shape = (self.n_assets, self.n_assets)
+        self._n = np.zeros(shape, dtype=self.dtype)
+        self._sx = np.zeros(shape, dtype=self.dtype)
+        self._sxx = np.zeros(shape, dtype=self.dtype)
+        self._sxy = np.zeros(shape, dtype=self.dtype)
+
+    def _apply(self, row: np.ndarray, sign: float) -> None:
+        valid = ~np.isnan(row)
+        v = valid.astype(self.dtype)
+        x0 = np.where(valid, row, 0).astype(self.dtype)
+        self._n += sign * np.outer(v, v)
+        self._sx += sign * np.outer(x0, v)
+        self._sxx += sign * np.outer(x0 * x0, v)
+        self._sxy += sign * np.outer(x0, x0)
+
+    def update(self, row: np.ndarray) -> None:
+        """加入一行新观测 (n_assets,)，窗口已满时移出最旧的一行"""
+        row = np.asarray(row, dtype=self.dtype)
+        slot = self._count % self.window
+        if self._count >= self.window:
+            self._apply(self._buffer[slot], -1.0)
+        self._buffer[slot] = row
+        self._apply(row, 1.0)
+        self._count += 1
+        self._steps_since_rebuild += 1
+        if self.dtype == np.float32 and self._steps_since_rebuild >= self.window:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        filled = min(self._count, self.window)
+        n, sx, sxx, sxy = _pairwise_sums(self._buffer[:filled].T.astype(np.float64))
+        self._n, self._sx, self._sxx, self._sxy = (a.astype(self.dtype) for a in (n, sx, sxx, sxy))
+        self._steps_since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        return _finish(self._n, self._sx, self._sxx, self._sxy, self.min_periods, correlation=False).astype(self.dtype)
+
+    def correlation(self) -> np.ndarray:
+        return _finish(self._n, self._sx, self._sxx, self._sxy, self.min_periods, correlation=True).astype(self.dtype)
+
+
+def iter_rolling_matrices(
+    returns: np.ndarray,
+    window: int,
+    step: int = 1,
+    correlation: bool = True,
+    dtype: Any = np.float64,
+    min_periods: Optional[int] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    逐步产出滚动相关（或协方差）矩阵
+
+    Args:
+        returns: (n_assets, n_obs) 收益率
+        window: 窗口长度
+        step: 每隔多少个观测产出一次
+        correlation: True 产出相关系数，False 产出协方差
+        dtype: 计算精度
+        min_periods: 成对有效观测少于此数时为 nan，默认等于 window
+
+    Yields:
+        Tuple[int, np.ndarray]: (窗口最后一个观测的下标, (n_assets, n_assets) 矩阵)
+    """
+    rolling = RollingCovariance(returns.shape[0], window, dtype=dtype, min_periods=min_periods)
+    for t in range(returns.shape[1]):
+        rolling.update(returns[:, t])
+        if t + 1 >= window and (t + 1 - window) % step == 0:
+            yield t, rolling.correlation() if correlation else rolling.covariance()
+
+
+def rolling_correlation(
+    returns: np.ndarray,
+    window: int,
+    step: int = 1,
+    dtype: Any = np.float64,
+    min_periods: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    滚动相关系数矩阵
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (窗口结束下标 (n_windows,), 矩阵 (n_windows, n_assets, n_assets))
+    """
+    ends, matrices = [], []
+    for t, matrix in iter_rolling_matrices(returns, window, step, True, dtype, min_periods):
+        ends.append(t)
+        matrices.append(matrix)
+    n = returns.shape[0]
+    if not matrices:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, n, n), dtype=dtype)
+    return np.asarray(ends), np.stack(matrices)
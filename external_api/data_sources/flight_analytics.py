@@ -0,0 +1,230 @@
+"""
+Price / duration / stops analytics over BookingSource.search_flights results
+
+Offers from any number of searches are flattened into one FlightOfferTable of
+parallel numpy arrays (price, duration in seconds, stops, carrier and
+currency codes, search index). Pareto frontiers and cheapest-by-carrier
+summaries are computed with sorts and cumulative minima over those arrays, so
+thousands of offers from many searches need no per-offer Python comparisons.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+_DURATION_RE = re.compile(r"(\d+)\s*hours?\s*(\d+)\s*minutes?")
+
+
+def parse_duration(value: Union[str, int, float, None]) -> int:
+    """_format_duration 的结果（如 "6 hours 5 minutes"）或秒数转换为秒，无法解析时为 -1"""
+    if value is None:
+        return -1
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _DURATION_RE.search(value)
+    if not match:
+        return -1
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60
+
+
+def _codes(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    """字符串列表编码为 (取值表, int32 下标数组)"""
+    if not values:
+        return [], np.array([], dtype=np.int32)
+    labels, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return [str(label) for label in labels], codes.astype(np.int32)
+
+
+class FlightOfferTable:
+    """Columnar view of flight offers from one or more searches
+
+    Attributes:
+        searches: Label of every search, e.g. "PEK-CAN 2025-04-19"
+        carriers: Carrier codes; an offer's carrier is the marketing carrier of its first segment
+        currencies: Currency codes
+        search, carrier, currency: int32 codes into the lists above, one per offer
+        price: float64 total price
+        duration: int64 total flight time in seconds
+        stops: int16 number of stops
+        flight_numbers: Flight numbers of every offer joined with "/"
+
+    Example:
+        >>> results = await asyncio.gather(*(client.booking.search_flights("PEK", "CAN", day) for day in days))
+        >>> table = FlightOfferTable.from_results(results, labels=days)
+        >>> table.to_records(table.pareto_frontier())
+        >>> table.cheapest_by_carrier()
+    """
+
+    def __init__(
+        self,
+        searches: List[str],
+        carriers: List[str],
+        currencies: List[str],
+        search: np.ndarray,
+        carrier: np.ndarray,
+        currency: np.ndarray,
+        price: np.ndarray,
+        duration: np.ndarray,
+        stops: np.ndarray,
+        flight_numbers: List[str],
+    ):
+        self.searches = searches
+        self.carriers = carriers
+        self.currencies = currencies
+        self.search = search
+        self.carrier = carrier
+        self.currency = currency
+        self.price = price
+        self.duration = duration
+        self.stops = stops
+        self.flight_numbers = flight_numbers
+
+    def __len__(self) -> int:
+        return self.price.size
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]], labels: Optional[Sequence[str]] = None) -> "FlightOfferTable":
+        """
+        Build a table from search_flights results
+
+        Args:
+            results: search_flights return values (failed searches are skipped) or their "flights" lists
+            labels: Label of every search, defaults to "0", "1", ...
+
+        Returns:
+            FlightOfferTable: Offers without a price or duration are dropped
+        """
+        searches: List[str] = []
+        search, carriers, currencies, prices, durations, stops, flight_numbers = [], [], [], [], [], [], []
+        for i, result in enumerate(results):
+            searches.append(str(labels[i]) if labels is not None else str(i))
+            if isinstance(result, dict):
+                if not result.get("success"):
+                    continue
+                result = result["data"]["flights"]
+            for offer in result:
+                price = (offer.get("price") or {}).get("amount")
+                duration = offer["total_seconds"] if "total_seconds" in offer else parse_duration(offer.get("total_time"))
+                if price is None or duration < 0:
+                    continue
+                segments = offer.get("segments") or []
+                first = segments[0] if segments else {}
+                # 旧结果没有 carrier 字段，取航班号的前两位（IATA 代码）
+                carrier = first.get("carrier") or first.get("flight_number", "")[:2]
+                search.append(len(searches) - 1)
+                carriers.append(carrier)
+                currencies.append(offer["price"].get("currency", ""))
+                prices.append(price)
+                durations.append(duration)
+                stops.append(offer.get("stops", 0))
+                flight_numbers.append("/".join(segment.get("flight_number", "") for segment in segments))
+
+        carrier_labels, carrier_codes = _codes(carriers)
+        currency_labels, currency_codes = _codes(currencies)
+        return cls(
+            searches,
+            carrier_labels,
+            currency_labels,
+            np.asarray(search, dtype=np.int32),
+            carrier_codes,
+            currency_codes,
+            np.asarray(prices, dtype=np.float64),
+            np.asarray(durations, dtype=np.int64),
+            np.asarray(stops, dtype=np.int16),
+            flight_numbers,
+        )
+
+    def _groups(self, by_search: bool) -> np.ndarray:
+        """价格只在同一币种（及同一搜索）内比较"""
+        if by_search:
+            return self.search.astype(np.int64) * max(len(self.currencies), 1) + self.currency
+        return self.currency.astype(np.int64)
+
+    def pareto_frontier(self, by_search: bool = True, use_stops: bool = True) -> np.ndarray:
+        """
+        Offers not dominated on (price, duration[, stops])
+
+        An offer is dominated when another offer in the same group is no worse on every
+        objective and differs on at least one. Identical offers are all kept.
+
+        Args:
+            by_search: Compute one frontier per search; otherwise one per currency across all searches
+            use_stops: Include the number of stops as a third objective
+
+        Returns:
+            np.ndarray: Indices of frontier offers, ordered by group, then price
+        """
+        n = len(self)
+        if n == 0:
+            return np.array([], dtype=np.int64)
+        group = self._groups(by_search)
+        stops = self.stops.astype(np.int64) if use_stops else np.zeros(n, dtype=np.int64)
+
+        # 相同的 (group, price, duration, stops) 只判断一次，最后再展开
+        keys = np.rec.fromarrays([group, self.price, self.duration, stops], names="g,p,d,s")
+        unique, inverse = np.unique(keys, return_inverse=True)
+        u_group, u_duration, u_stops = unique["g"], unique["d"], unique["s"]
+
+        # np.unique 已按 (group, price, duration, stops) 排序；每个点只可能被排在它前面的点支配。
+        # 把 duration 按组平移，组号越大值越小，累计最小值就不会跨组传递
+        _, group_index = np.unique(u_group, return_inverse=True)
+        span = int(u_duration.max() - u_duration.min()) + 1
+        shifted = u_duration - group_index.astype(np.int64) * span
+        sentinel = np.iinfo(np.int64).max
+
+        dominated = np.zeros(unique.size, dtype=bool)
+        for level in np.unique(u_stops):
+            # 前面所有 stops <= level 的点里最短的 duration
+            candidate = np.where(u_stops <= level, shifted, sentinel)
+            best_before = np.empty_like(candidate)
+            best_before[0] = sentinel
+            np.minimum.accumulate(candidate[:-1], out=best_before[1:])
+            at_level = u_stops == level
+            dominated[at_level] = best_before[at_level] <= shifted[at_level]
+
+        frontier = ~dominated[inverse.ravel()]
+        indices = np.flatnonzero(frontier)
+        order = np.lexsort((self.duration[indices], self.price[indices], group[indices]))
+        return indices[order]
+
+    def cheapest_by_carrier(self, by_search: bool = False) -> List[Dict[str, Any]]:
+        """
+        Cheapest offer of every carrier (and currency)
+
+        Args:
+            by_search: One summary per carrier per search instead of across all searches
+
+        Returns:
+            List[Dict[str, Any]]: to_records output of the cheapest offers plus "offer_count", cheapest first within each group
+        """
+        if len(self) == 0:
+            return []
+        group = self._groups(by_search) * max(len(self.carriers), 1) + self.carrier
+        # 组内按价格、时长排序，每组第一个就是最便宜的
+        order = np.lexsort((self.duration, self.price, group))
+        sorted_group = group[order]
+        _, first, counts = np.unique(sorted_group, return_index=True, return_counts=True)
+        cheapest = order[first]
+        ranked = np.lexsort((self.price[cheapest], self._groups(by_search)[cheapest]))
+        records = self.to_records(cheapest[ranked])
+        for record, count in zip(records, counts[ranked]):
+            record["offer_count"] = int(count)
+        return records
+
+    def to_records(self, indices: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Offers at the given indices (default all) as dicts"""
+        if indices is None:
+            indices = np.arange(len(self))
+        return [
+            {
+                "index": int(i),
+                "search": self.searches[self.search[i]],
+                "carrier": self.carriers[self.carrier[i]],
+                "flight_numbers": self.flight_numbers[i],
+                "price": {"currency": self.currencies[self.currency[i]], "amount": float(self.price[i])},
+                "total_seconds": int(self.duration[i]),
+                "stops": int(self.stops[i]),
+            }
+            for i in indices
+        ]
@@ -0,0 +1,260 @@
+"""
+基本面筛选器
+
+Keeps a columnar table of fundamentals (from get_stock_info and
+get_stock_statistics) for a configured universe. refresh() refetches only
+symbols older than max_age, concurrently via get_stock_snapshot, and
+persists the table as .npz. screen() then evaluates predicates and ranking
+as vectorized numpy operations over the whole table, without upstream calls.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .yahoo_source import YahooFinanceSource
+
+logger = logging.getLogger("fundamentals_screener")
+
+# 列名 -> (快照部分, 字段路径)
+FIELDS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "market_cap": ("info", ("market_cap",)),
+    "pe_ratio": ("info", ("pe_ratio",)),
+    "forward_pe": ("info", ("forward_pe",)),
+    "dividend_yield": ("info", ("dividend_yield",)),
+    "beta": ("info", ("beta",)),
+    "fifty_two_week_low": ("info", ("fifty_two_week", "low")),
+    "fifty_two_week_high": ("info", ("fifty_two_week", "high")),
+    "fifty_day_average": ("info", ("moving_averages", "fifty_day")),
+    "two_hundred_day_average": ("info", ("moving_averages", "two_hundred_day")),
+    "volume": ("info", ("volume", "current")),
+    "average_volume": ("info", ("volume", "average")),
+    "enterprise_value": ("statistics", ("valuation_metrics", "enterprise_value")),
+    "forward_eps": ("statistics", ("valuation_metrics", "forward_eps")),
+    "price_to_book": ("statistics", ("valuation_metrics", "price_to_book")),
+    "enterprise_to_revenue": ("statistics", ("valuation_metrics", "enterprise_to_revenue")),
+    "enterprise_to_ebitda": ("statistics", ("valuation_metrics", "enterprise_to_ebitda")),
+    "net_income": ("statistics", ("profitability", "net_income")),
+    "profit_margins": ("statistics", ("profitability", "profit_margins")),
+    "earnings_growth": ("statistics", ("profitability", "earnings_growth")),
+    "revenue_growth": ("statistics", ("profitability", "revenue_growth")),
+    "year_change": ("statistics", ("stock_metrics", "year_change")),
+    "shares_outstanding": ("statistics", ("share_statistics", "shares_outstanding")),
+    "float_shares": ("statistics", ("share_statistics", "float_shares")),
+    "held_percent_insiders": ("statistics", ("share_statistics", "held_percent_insiders")),
+    "held_percent_institutions": ("statistics", ("share_statistics", "held_percent_institutions")),
+    "short_ratio": ("statistics", ("share_statistics", "short_ratio")),
+    "short_percent_of_float": ("statistics", ("share_statistics", "short_percent_of_float")),
+}
+
+# 数据源用 0 表示缺失，这些字段的 0 没有实际意义，按 nan 处理
+ZERO_IS_MISSING = {
+    "market_cap",
+    "pe_ratio",
+    "forward_pe",
+    "beta",
+    "fifty_two_week_low",
+    "fifty_two_week_high",
+    "fifty_day_average",
+    "two_hundred_day_average",
+    "average_volume",
+    "enterprise_value",
+    "price_to_book",
+    "enterprise_to_revenue",
+    "enterprise_to_ebitda",
+    "shares_outstanding",
+    "float_shares",
+}
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+Condition = Tuple[str, str, Any]
+
+
+class FundamentalsScreener:
+    """Daily-refreshed fundamentals table with vectorized screening
+
+    Example:
+        >>> screener = FundamentalsScreener(client.yahoo_finance, ["AAPL", "MSFT", "KO"], path="fundamentals.npz")
+        >>> await screener.refresh()
+        >>> screener.screen([("pe_ratio", "<", 30), ("dividend_yield", ">", 0.01)], sort_by="market_cap")
+    """
+
+    def __init__(
+        self,
+        source: YahooFinanceSource,
+        universe: Iterable[str],
+        path: Optional[str] = None,
+        max_age: float = 24 * 3600,
+    ):
+        """
+        Args:
+            source: Yahoo Finance data source
+            universe: Symbols kept in the table
+            path: .npz file persisting the table, None keeps it in memory only
+            max_age: Seconds after which a symbol's row is refreshed
+        """
+        self.source = source
+        self.path = path
+        self.max_age = max_age
+        self.symbols = np.array(list(dict.fromkeys(universe)), dtype=str)
+        self.updated_at = np.zeros(self.symbols.size)
+        self.columns: Dict[str, np.ndarray] = {name: np.full(self.symbols.size, np.nan) for name in FIELDS}
+        self._load()
+
+    def stale_symbols(self) -> List[str]:
+        return self.symbols[self.updated_at < time.time() - self.max_age].tolist()
+
+    async def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Refetch symbols whose row is older than max_age
+
+        Args:
+            force: Refetch every symbol
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"refreshed": 12, "failed": [{"symbol": "...", "error": "..."}]}}
+        """
+        stale = self.symbols.tolist() if force else self.stale_symbols()
+        if not stale:
+            return {"success": True, "data": {"refreshed": 0, "failed": []}}
+
+        result = await self.source.get_stock_snapshot(stale, parts=["info", "statistics"])
+        if not result["success"]:
+            return result
+
+        positions = {symbol: i for i, symbol in enumerate(self.symbols.tolist())}
+        now = time.time()
+        refreshed, failed = 0, []
+        for snapshot in result["data"]["snapshots"]:
+            if snapshot["errors"]:
+                # 任一部分失败都保留旧值，下次再刷新
+                failed.append({"symbol": snapshot["symbol"], "error": "; ".join(f"{k}: {v}" for k, v in snapshot["errors"].items())})
+                continue
+            row = positions[snapshot["symbol"]]
+            for name, (part, path) in FIELDS.items():
+                value: Any = snapshot[part]
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                value = float(value) if value is not None else np.nan
+                self.columns[name][row] = np.nan if name in ZERO_IS_MISSING and value == 0 else value
+            self.updated_at[row] = now
+            refreshed += 1
+
+        self._save()
+        return {"success": True, "data": {"refreshed": refreshed, "failed": failed}}
+
+    def mask(self, conditions: Sequence[Condition]) -> np.ndarray:
+        """
+        条件的向量化布尔掩码，所有条件同时满足；nan 不满足任何条件
+
+        Args:
+            conditions: [(列名, 运算符, 值)]，运算符为 < <= > >= == != between（值为 (low, high)）或 in（值为列表）
+        """
+        mask = np.ones(self.symbols.size, dtype=bool)
+        for name, op, value in conditions:
+            column = self.symbols if name == "symbol" else self.columns[name]
+            if op == "between":
+                low, high = value
+                mask &= (column >= low) & (column <= high)
+            elif op == "in":
+                mask &= np.isin(column, list(value))
+            elif op in OPERATORS:
+                mask &= OPERATORS[op](column, value)
+                if op == "!=" and name != "symbol":
+                    mask &= ~np.isnan(column)
+            else:
+                raise ValueError(f"Unknown operator: {op}")
+        return mask
+
+    def percentile_rank(self, name: str, ascending: bool = True) -> np.ndarray:
+        """列的百分位排名 (0, 1]，nan 为 nan"""
+        column = self.columns[name]
+        valid = ~np.isnan(column)
+        ranks = np.full(column.size, np.nan)
+        order = np.argsort(column[valid] if ascending else -column[valid], kind="stable")
+        ranks_valid = np.empty(order.size)
+        ranks_valid[order] = np.arange(1, order.size + 1) / max(order.size, 1)
+        ranks[valid] = ranks_valid
+        return ranks
+
+    def screen(
+        self,
+        conditions: Sequence[Condition] = (),
+        sort_by: Optional[Union[str, Dict[str, bool]]] = None,
+        ascending: bool = False,
+        top_k: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        筛选并排序
+
+        Args:
+            conditions: 筛选条件，见 mask
+            sort_by: 排序列名；或 {列名: 是否升序} 表示按各列百分位排名的平均分排序（分数越小越靠前）
+            ascending: sort_by 为列名时是否升序
+            top_k: 最多返回条数
+            fields: 返回的列，默认全部
+
+        Returns:
+            List[Dict[str, Any]]: 每行 {"symbol": ..., 列名: 值, ...}，排序列为 nan 的排在最后
+        """
+        selected = np.flatnonzero(self.mask(conditions))
+        score = None
+        if isinstance(sort_by, dict):
+            ranks = np.vstack([self.percentile_rank(name, asc) for name, asc in sort_by.items()])
+            valid = ~np.isnan(ranks)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                score = np.where(valid, ranks, 0).sum(axis=0) / valid.sum(axis=0)
+            keys = score[selected]
+        elif sort_by:
+            keys = self.columns[sort_by][selected]
+            keys = keys if ascending else -keys
+        if sort_by:
+            # nan 排在最后
+            selected = selected[np.argsort(np.where(np.isnan(keys), np.inf, keys), kind="stable")]
+        if top_k is not None:
+            selected = selected[:top_k]
+
+        names = fields or list(FIELDS)
+        rows = []
+        for i in selected.tolist():
+            row: Dict[str, Any] = {"symbol": str(self.symbols[i])}
+            for name in names:
+                value = self.columns[name][i]
+                row[name] = None if np.isnan(value) else float(value)
+            if score is not None:
+                row["score"] = None if np.isnan(score[i]) else float(score[i])
+            rows.append(row)
+        return rows
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, symbols=self.symbols, updated_at=self.updated_at, **self.columns)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as stored:
+            positions = {symbol: i for i, symbol in enumerate(stored["symbols"].tolist())}
+            # 只恢复仍在当前 universe 中的标的
+            rows = np.array([positions.get(symbol, -1) for symbol in self.symbols.tolist()], dtype=np.int64)
+            known = rows >= 0
+            self.updated_at[known] = stored["updated_at"][rows[known]]
+            for name in FIELDS:
+                if name in stored.files:
+                    self.columns[name][known] = stored[name][rows[known]]
+        logger.info(f"Loaded fundamentals for {int(known.sum())} of {self.symbols.size} symbols from {self.path}")
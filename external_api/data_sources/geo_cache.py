@@ -0,0 +1,154 @@
+"""
+Search-point cache and spatial index for nearby location searches
+
+A TripAdvisor nearby search returns the nearest locations to the search point
+with their distance and an eight-point compass bearing, but no coordinates,
+so returned locations cannot be placed on a map precisely enough to answer
+queries from a different point. The cache below therefore keeps every
+upstream search verbatim, together with its reach (distance of the farthest
+returned location; every location within that distance of the search point is
+in the result). Search points are indexed in a scipy cKDTree, and a later
+query is answered locally only when it is issued from a cached search point
+and its circle lies inside that search's reach.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_MILE = 1.609344
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """经纬度投影到单位球面，球面距离单调对应弦长，跨越 180° 经线和两极时也成立"""
+    phi = np.radians(latitudes)
+    lam = np.radians(longitudes)
+    return np.column_stack((np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)))
+
+
+def _chord(distance_km: float) -> float:
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def location_distance_km(location: Dict[str, Any]) -> Optional[float]:
+    """Distance reported by the nearby search (miles) in kilometers, None if missing"""
+    try:
+        return float(location["distance"]) * KM_PER_MILE
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class NearbyLocationCache:
+    """Cache of upstream nearby searches indexed by search point
+
+    A query from (latitude, longitude) with radius r is served from a cached
+    search issued at most ``tolerance_km`` away (distance d) when d + r does
+    not exceed the cached search's reach, i.e. the query circle lies inside the
+    circle the upstream search covered. Cached locations are returned as
+    upstream reported them, so their distance and bearing are relative to the
+    cached search point. Searches expire after ``ttl`` seconds and are
+    partitioned by (language, category) since those change the upstream
+    result set.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, tolerance_km: float = 0.01, max_searches: int = 50_000):
+        self.ttl = ttl
+        self.tolerance_km = tolerance_km
+        self.max_searches = max_searches
+        self._lock = threading.Lock()
+        # (language, category) -> {(latitude, longitude): {"latitude", "longitude", "reach_km", "expire_at", "locations"}}
+        self._searches: Dict[Tuple[str, str], Dict[Tuple[float, float], Dict[str, Any]]] = {}
+        # (language, category) -> (搜索点的 cKDTree, 与树中下标对应的搜索)，新增搜索后在下次查询时重建
+        self._trees: Dict[Tuple[str, str], Tuple[cKDTree, List[Dict[str, Any]]]] = {}
+
+    @staticmethod
+    def _namespace(language: str, category: Optional[str]) -> Tuple[str, str]:
+        return (language, category or "")
+
+    def add(self, latitude: float, longitude: float, locations: List[Dict[str, Any]], language: str, category: Optional[str]) -> Dict[str, Any]:
+        """
+        Record an upstream nearby search issued from (latitude, longitude)
+
+        Args:
+            latitude: Latitude the upstream search was issued from
+            longitude: Longitude the upstream search was issued from
+            locations: Locations returned by the upstream search
+            language: Language code of the search
+            category: Category filter of the search
+
+        Returns:
+            Dict[str, Any]: The search record; empty results are not cached
+        """
+        distances = [d for d in map(location_distance_km, locations) if d is not None]
+        search = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "reach_km": max(distances, default=0.0),
+            "expire_at": time.time() + self.ttl,
+            "locations": locations,
+        }
+        if not locations:
+            return search
+        namespace = self._namespace(language, category)
+        key = (round(latitude, 6), round(longitude, 6))
+        with self._lock:
+            searches = self._searches.setdefault(namespace, {})
+            # 同一搜索点的新结果取代旧结果；超出容量时丢弃最早的搜索
+            searches.pop(key, None)
+            searches[key] = search
+            while len(searches) > self.max_searches:
+                del searches[next(iter(searches))]
+            self._trees.pop(namespace, None)
+        return search
+
+    def lookup(self, latitude: float, longitude: float, radius_km: float, language: str, category: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached search that covers the circle of radius_km around (latitude, longitude)
+
+        Returns:
+            Optional[Dict[str, Any]]: The nearest covering search, None if the query has to go upstream
+        """
+        namespace = self._namespace(language, category)
+        now = time.time()
+        with self._lock:
+            indexed = self._trees.get(namespace)
+            if indexed is None:
+                searches = self._searches.get(namespace, {})
+                for key in [key for key, search in searches.items() if search["expire_at"] <= now]:
+                    del searches[key]
+                if not searches:
+                    return None
+                rows = list(searches.values())
+                points = _to_unit_vectors(np.array([s["latitude"] for s in rows]), np.array([s["longitude"] for s in rows]))
+                indexed = (cKDTree(points), rows)
+                self._trees[namespace] = indexed
+        tree, rows = indexed
+        point = _to_unit_vectors(np.array([latitude]), np.array([longitude]))[0]
+        candidates = [rows[i] for i in tree.query_ball_point(point, _chord(self.tolerance_km))]
+
+        best = None
+        best_distance = math.inf
+        for search in candidates:
+            distance = haversine_km(latitude, longitude, search["latitude"], search["longitude"])
+            if search["expire_at"] > now and distance + radius_km <= search["reach_km"] and distance < best_distance:
+                best, best_distance = search, distance
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._searches.clear()
+            self._trees.clear()
@@ -0,0 +1,211 @@
+"""
+向量化技术指标
+
+Indicators run on 2-D arrays shaped (n_symbols, n_bars), so one call covers
+a whole universe. price_matrix turns the output of
+YahooFinanceSource.get_stock_price / get_multiple_stocks_price (row or
+columnar form) into such a matrix on a shared timestamp axis, with NaN where
+a symbol has no bar. Rolling statistics use cumulative sums and exponential
+smoothing uses scipy.signal.lfilter, so there are no per-bar Python loops.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy.signal import lfilter
+
+ArrayLike = Union[np.ndarray, List[float]]
+
+
+def series_of(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """接受 get_stock_price 或 get_multiple_stocks_price 的 data（或完整返回值）"""
+    if "success" in data and "data" in data:
+        data = data["data"]
+    return data["stocks"] if "stocks" in data else [data]
+
+
+def _timestamps_and_values(series: Dict[str, Any], field: str) -> Tuple[np.ndarray, np.ndarray]:
+    if "columns" in series:
+        columns = series["columns"]
+        return np.asarray(columns["timestamp"], dtype=np.int64), np.asarray(columns[field], dtype=np.float64)
+    prices = series["prices"]
+    # 行格式只有日期字符串
+    timestamps = np.array([p["date"] for p in prices], dtype="datetime64[s]").astype(np.int64)
+    values = np.array([p[field] for p in prices], dtype=np.float64)
+    return timestamps, values
+
+
+def price_matrix(data: Dict[str, Any], field: str = "close") -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    把多只股票的价格对齐到同一时间轴
+
+    Args:
+        data: get_stock_price / get_multiple_stocks_price 的返回值或其中的 data
+        field: 取哪一列，open|high|low|close|volume
+
+    Returns:
+        Tuple[List[str], np.ndarray, np.ndarray]: (symbols, timestamps[n_bars], values[n_symbols, n_bars])，缺失处为 nan
+    """
+    series = series_of(data)
+    parts = [_timestamps_and_values(s, field) for s in series]
+    timestamps = np.unique(np.concatenate([ts for ts, _ in parts])) if parts else np.zeros(0, dtype=np.int64)
+    values = np.full((len(parts), timestamps.size), np.nan)
+    for row, (ts, vals) in enumerate(parts):
+        values[row, np.searchsorted(timestamps, ts)] = vals
+    return [s["symbol"] for s in series], timestamps, values
+
+
+def _as_2d(x: ArrayLike) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    return x[np.newaxis, :] if x.ndim == 1 else x
+
+
+def _restore_shape(result: np.ndarray, x: ArrayLike) -> np.ndarray:
+    return result[0] if np.ndim(x) == 1 else result
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """沿最后一维的滚动和及窗口内有效值个数"""
+    valid = ~np.isnan(x)
+    pad = np.zeros(x.shape[:-1] + (1,))
+    csum = np.concatenate([pad, np.cumsum(np.where(valid, x, 0.0), axis=-1)], axis=-1)
+    ccount = np.concatenate([pad, np.cumsum(valid, axis=-1)], axis=-1)
+    sums = np.full(x.shape, np.nan)
+    counts = np.zeros(x.shape)
+    if x.shape[-1] >= window:
+        sums[..., window - 1 :] = csum[..., window:] - csum[..., :-window]
+        counts[..., window - 1 :] = ccount[..., window:] - ccount[..., :-window]
+    return sums, counts
+
+
+def sma(x: ArrayLike, window: int) -> np.ndarray:
+    """简单移动平均，窗口内有缺失值时为 nan"""
+    data = _as_2d(x)
+    sums, counts = _rolling_sum(data, window)
+    return _restore_shape(np.where(counts == window, sums / window, np.nan), x)
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """指数加权平均，从每行第一个有效值开始递推，中间缺失值沿用上一个值"""
+    filled = ffill(x)
+    first_valid = np.argmax(~np.isnan(filled), axis=-1)
+    seed = np.take_along_axis(filled, first_valid[..., np.newaxis], axis=-1)
+    # 开头的缺失值用首个有效值代替，使递推从该值开始
+    filled = np.where(np.isnan(filled), seed, filled)
+    zi = (1 - alpha) * seed
+    result, _ = lfilter([alpha], [1, -(1 - alpha)], filled, axis=-1, zi=zi)
+    return np.where(np.arange(x.shape[-1]) < first_valid[..., np.newaxis], np.nan, result)
+
+
+def ema(x: ArrayLike, span: int) -> np.ndarray:
+    """指数移动平均，alpha = 2 / (span + 1)"""
+    return _restore_shape(_ewm(_as_2d(x), 2.0 / (span + 1)), x)
+
+
+def ffill(x: ArrayLike) -> np.ndarray:
+    """沿最后一维前向填充 nan"""
+    data = _as_2d(x)
+    idx = np.where(~np.isnan(data), np.arange(data.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return _restore_shape(np.take_along_axis(data, idx, axis=-1), x)
+
+
+def returns(x: ArrayLike, log: bool = False) -> np.ndarray:
+    """逐 bar 收益率，第一列为 nan"""
+    data = _as_2d(x)
+    result = np.full(data.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result[..., 1:] = np.log(data[..., 1:] / data[..., :-1]) if log else data[..., 1:] / data[..., :-1] - 1
+    return _restore_shape(result, x)
+
+
+def rolling_volatility(x: ArrayLike, window: int = 20, periods_per_year: Optional[int] = 252) -> np.ndarray:
+    """价格序列的滚动波动率（对数收益率的样本标准差），periods_per_year 为空时不年化"""
+    r = returns(_as_2d(x), log=True)
+    sums, counts = _rolling_sum(r, window)
+    sq_sums, _ = _rolling_sum(r * r, window)
+    with np.errstate(invalid="ignore"):
+        var = (sq_sums - sums * sums / window) / (window - 1)
+    vol = np.where(counts == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    if periods_per_year:
+        vol = vol * np.sqrt(periods_per_year)
+    return _restore_shape(vol, x)
+
+
+def rsi(close: ArrayLike, period: int = 14) -> np.ndarray:
+    """Wilder RSI，前 period 个 bar 为 nan"""
+    data = _as_2d(close)
+    delta = np.diff(data, axis=-1)
+    gains = _ewm(np.where(np.isnan(delta), np.nan, np.clip(delta, 0.0, None)), 1.0 / period)
+    losses = _ewm(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0.0, None)), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + gains / losses)
+    values = np.where(losses == 0, np.where(gains == 0, 50.0, 100.0), values)
+    values = np.where(np.isnan(gains), np.nan, values)
+    result = np.full(data.shape, np.nan)
+    result[..., 1:] = values
+    result[..., :period] = np.nan
+    return _restore_shape(result, close)
+
+
+def atr(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: int = 14) -> np.ndarray:
+    """Wilder 平均真实波幅，前 period - 1 个 bar 为 nan"""
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.concatenate([np.full(c.shape[:-1] + (1,), np.nan), c[..., :-1]], axis=-1)
+    true_range = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+    result = _ewm(true_range, 1.0 / period)
+    result[..., : period - 1] = np.nan
+    return _restore_shape(result, close)
+
+
+def drawdown(x: ArrayLike) -> np.ndarray:
+    """相对历史最高点的回撤（<= 0）"""
+    data = _as_2d(x)
+    peak = np.fmax.accumulate(data, axis=-1)
+    with np.errstate(invalid="ignore"):
+        return _restore_shape(data / peak - 1.0, x)
+
+
+def max_drawdown(x: ArrayLike) -> np.ndarray:
+    """每个序列的最大回撤"""
+    return np.nanmin(drawdown(x), axis=-1)
+
+
+def compute_indicators(
+    data: Dict[str, Any],
+    sma_windows: Tuple[int, ...] = (20, 50, 200),
+    ema_spans: Tuple[int, ...] = (12, 26),
+    volatility_window: int = 20,
+    rsi_period: int = 14,
+    atr_period: int = 14,
+) -> Dict[str, Any]:
+    """
+    对多只股票一次性计算常用指标
+
+    Args:
+        data: get_stock_price / get_multiple_stocks_price 的返回值或其中的 data
+        sma_windows: SMA 窗口
+        ema_spans: EMA 周期
+        volatility_window: 波动率窗口
+        rsi_period: RSI 周期
+        atr_period: ATR 周期
+
+    Returns:
+        Dict[str, Any]: {"symbols": [...], "timestamps": ndarray, "close": ndarray, "sma_20": ndarray, ..., "max_drawdown": ndarray}，
+        所有序列形状为 (n_symbols, n_bars)
+    """
+    symbols, timestamps, close = price_matrix(data, "close")
+    _, _, high = price_matrix(data, "high")
+    _, _, low = price_matrix(data, "low")
+    result: Dict[str, Any] = {"symbols": symbols, "timestamps": timestamps, "close": close}
+    for window in sma_windows:
+        result[f"sma_{window}"] = sma(close, window)
+    for span in ema_spans:
+        result[f"ema_{span}"] = ema(close, span)
+    result["returns"] = returns(close)
+    result["volatility"] = rolling_volatility(close, volatility_window)
+    result["rsi"] = rsi(close, rsi_period)
+    result["atr"] = atr(high, low, close, atr_period)
+    result["drawdown"] = drawdown(close)
+    result["max_drawdown"] = max_drawdown(close)
+    return result
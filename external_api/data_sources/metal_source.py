@@ -108,7 +108,6 @@ class MetalSource(BaseAPI):
             if not isinstance(data, dict):
                 raise ValueError(f"Invalid API response format: {data}")
 
-            print(data)
             result = {}
             for metal, info in data.get("data", {}).items():
                 metal_info = {
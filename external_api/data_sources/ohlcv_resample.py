@@ -0,0 +1,118 @@
+"""
+OHLCV 重采样
+
+Derives coarse bars from finer stored ones with numpy reductions:
+open=first, high=max, low=min, close=last, volume=sum. Intraday buckets are
+anchored at each trading day's first bar (the session open) rather than at
+clock boundaries, matching how Yahoo labels 60m bars (09:30, 10:30, ...).
+Day, week and month buckets follow the exchange's local calendar.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .ohlcv_store import BAR_DTYPE, INTERVAL_SECONDS, empty_bars
+
+DAY_SECONDS = 86400
+
+# 目标周期 -> 可用于推导的更细周期，按从粗到细排列
+RESAMPLE_SOURCES: Dict[str, List[str]] = {
+    "2m": ["1m"],
+    "5m": ["1m"],
+    "15m": ["5m", "1m"],
+    "30m": ["15m", "5m", "1m"],
+    "60m": ["30m", "15m", "5m", "2m", "1m"],
+    "1h": ["30m", "15m", "5m", "2m", "1m"],
+    "90m": ["30m", "15m", "5m", "1m"],
+    "1d": ["60m", "1h", "30m", "15m", "5m", "1m"],
+    "1wk": ["1d"],
+    "1mo": ["1d"],
+    "3mo": ["1mo", "1d"],
+}
+
+CALENDAR_INTERVALS = ("1d", "1wk", "1mo", "3mo")
+
+
+def _local_days(timestamps: np.ndarray, gmtoffset: int) -> np.ndarray:
+    return (timestamps + gmtoffset) // DAY_SECONDS
+
+
+def _calendar_ids(days: np.ndarray, interval: str) -> np.ndarray:
+    if interval == "1d":
+        return days
+    if interval == "1wk":
+        # 1970-01-01 是周四，+3 后按周一分周
+        return (days + 3) // 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return months if interval == "1mo" else months // 3
+
+
+def bucket_span(start: int, end: int, interval: str, gmtoffset: int = 0) -> Tuple[int, int]:
+    """把 [start, end) 扩展到完整的周/月/季边界（按交易所本地日历）
+
+    推导周/月 bar 需要整个桶内的日线，所以覆盖检查应针对扩展后的区间。
+    分钟级和日线桶不跨交易日，直接返回原区间。
+    """
+    if interval not in ("1wk", "1mo", "3mo"):
+        return start, end
+    first_day, last_day = (start + gmtoffset) // DAY_SECONDS, (end - 1 + gmtoffset) // DAY_SECONDS
+    if interval == "1wk":
+        first_day = (first_day + 3) // 7 * 7 - 3
+        last_day = (last_day + 3) // 7 * 7 - 3 + 6
+    else:
+        months = np.array([first_day, last_day]).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        if interval == "3mo":
+            months = months // 3 * 3
+            months[1] += 2
+        first_day = int(np.datetime64(int(months[0]), "M").astype("datetime64[D]").astype(np.int64))
+        last_day = int((np.datetime64(int(months[1]) + 1, "M").astype("datetime64[D]") - 1).astype(np.int64))
+    return first_day * DAY_SECONDS - gmtoffset, (last_day + 1) * DAY_SECONDS - gmtoffset
+
+
+def resample_bars(bars: np.ndarray, interval: str, gmtoffset: int = 0) -> np.ndarray:
+    """
+    把按时间排序的细粒度 bar 重采样为 interval 周期
+
+    Args:
+        bars: BAR_DTYPE 结构化数组，按 timestamp 升序
+        interval: 目标周期，如 5m、60m、1d、1wk、1mo
+        gmtoffset: 交易所相对 UTC 的秒数偏移，用于划分本地交易日
+
+    Returns:
+        np.ndarray: BAR_DTYPE 数组。分钟级桶的时间戳为会话开盘时间 + k * 周期，日/周/月桶为桶内第一根 bar 的时间戳
+    """
+    if bars.size == 0:
+        return empty_bars()
+    timestamps = bars["timestamp"]
+    days = _local_days(timestamps, gmtoffset)
+    day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+
+    if interval in CALENDAR_INTERVALS:
+        ids = _calendar_ids(days, interval)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        bucket_ts = timestamps[starts]
+    else:
+        width = INTERVAL_SECONDS[interval]
+        # 每根 bar 所在交易日的第一根 bar 视为会话开盘
+        session_open = np.repeat(timestamps[day_starts], np.diff(np.r_[day_starts, timestamps.size]))
+        offsets = (timestamps - session_open) // width
+        ids = days * (DAY_SECONDS // width + 1) + offsets
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        bucket_ts = session_open[starts] + offsets[starts] * width
+
+    ends = np.r_[starts[1:], bars.size] - 1
+    out = np.zeros(starts.size, dtype=BAR_DTYPE)
+    out["timestamp"] = bucket_ts
+    out["open"] = bars["open"][starts]
+    out["high"] = np.fmax.reduceat(bars["high"], starts)
+    out["low"] = np.fmin.reduceat(bars["low"], starts)
+    out["close"] = bars["close"][ends]
+    out["adjclose"] = bars["adjclose"][ends]
+    out["volume"] = np.add.reduceat(bars["volume"], starts)
+    return out
+
+
+def finer_intervals(interval: str) -> List[str]:
+    """可用于推导 interval 的细周期，从粗到细"""
+    return RESAMPLE_SOURCES.get(interval, [])
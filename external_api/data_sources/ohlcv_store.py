@@ -0,0 +1,300 @@
+"""
+本地 OHLCV 行情存储
+
+One structured .npy file per (symbol, interval) holds the bars sorted by
+timestamp and is opened memory-mapped, so reads are zero-copy slices of the
+file. A sidecar meta.json records which [start, end) epoch-second ranges have
+been fetched from upstream, letting callers request only the missing gaps.
+Dividends and splits are kept per symbol in the same way under events/.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+BAR_DTYPE = np.dtype(
+    [
+        ("timestamp", "i8"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("adjclose", "f8"),
+        ("volume", "i8"),
+    ]
+)
+
+# 公司行为：kind 0 为分红（amount），1 为拆股（numerator / denominator）
+EVENT_DTYPE = np.dtype(
+    [
+        ("timestamp", "i8"),
+        ("kind", "i1"),
+        ("amount", "f8"),
+        ("numerator", "f8"),
+        ("denominator", "f8"),
+    ]
+)
+
+# 各周期的 bar 长度（秒），月/季按最长估算
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "90m": 5400,
+    "1h": 3600,
+    "1d": 86400,
+    "5d": 5 * 86400,
+    "1wk": 7 * 86400,
+    "1mo": 31 * 86400,
+    "3mo": 92 * 86400,
+}
+
+Range = Tuple[int, int]
+
+
+def merge_ranges(ranges: Iterable[Range]) -> List[Range]:
+    """合并重叠或相邻的 [start, end) 区间"""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def subtract_ranges(window: Range, covered: Iterable[Range]) -> List[Range]:
+    """[start, end) 窗口中未被覆盖的部分"""
+    start, end = window
+    gaps = []
+    cursor = start
+    for c_start, c_end in merge_ranges(covered):
+        if c_end <= cursor or c_start >= end:
+            continue
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def empty_bars() -> np.ndarray:
+    return np.zeros(0, dtype=BAR_DTYPE)
+
+
+def merge_bars(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """按时间戳合并，同一时间戳以 new 为准"""
+    if old.size == 0:
+        combined = np.asarray(new, dtype=BAR_DTYPE)
+    elif new.size == 0:
+        return np.asarray(old, dtype=BAR_DTYPE)
+    else:
+        combined = np.concatenate([np.asarray(new, dtype=BAR_DTYPE), np.asarray(old, dtype=BAR_DTYPE)])
+    # np.unique 返回每个时间戳第一次出现的位置，new 排在前面因此优先保留
+    _, first = np.unique(combined["timestamp"], return_index=True)
+    return combined[first]
+
+
+def merge_events(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """按 (timestamp, kind) 合并公司行为，同一事件以 new 为准"""
+    combined = np.concatenate([np.asarray(new, dtype=EVENT_DTYPE), np.asarray(old, dtype=EVENT_DTYPE)])
+    if combined.size == 0:
+        return combined
+    _, first = np.unique(combined[["timestamp", "kind"]], return_index=True)
+    return combined[first]
+
+
+class OhlcvStore:
+    """Per-symbol, per-interval bar store with covered-range bookkeeping
+
+    Example:
+        >>> store = OhlcvStore("/tmp/external_api_cache/ohlcv")
+        >>> gaps = store.gaps("AAPL", "1d", start, end)
+        >>> store.write("AAPL", "1d", bars, gap_start, gap_end)
+        >>> closes = store.read("AAPL", "1d", start, end)["close"]
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._bars: Dict[Tuple[str, str], np.ndarray] = {}
+        self._meta: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _series_dir(self, symbol: str, interval: str) -> str:
+        safe_symbol = re.sub(r"[^\w.=^-]", "_", symbol.upper())
+        return os.path.join(self.root_dir, safe_symbol, interval)
+
+    def meta(self, symbol: str, interval: str) -> Dict[str, Any]:
+        """序列元数据，包含 coverage 以及写入时附带的交易所信息"""
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if key not in self._meta:
+                path = os.path.join(self._series_dir(symbol, interval), "meta.json")
+                meta: Dict[str, Any] = {"coverage": []}
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                self._meta[key] = meta
+            return self._meta[key]
+
+    def coverage(self, symbol: str, interval: str) -> List[Range]:
+        return [(s, e) for s, e in self.meta(symbol, interval)["coverage"]]
+
+    def gaps(self, symbol: str, interval: str, start: int, end: int) -> List[Range]:
+        """[start, end) 中尚未从上游抓取过的区间"""
+        return subtract_ranges((start, end), self.coverage(symbol, interval))
+
+    def is_covered(self, symbol: str, interval: str, start: int, end: int) -> bool:
+        return not self.gaps(symbol, interval, start, end)
+
+    def bars(self, symbol: str, interval: str) -> np.ndarray:
+        """整个序列（只读内存映射）"""
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if key not in self._bars:
+                path = os.path.join(self._series_dir(symbol, interval), "bars.npy")
+                self._bars[key] = np.load(path, mmap_mode="r") if os.path.exists(path) else empty_bars()
+            return self._bars[key]
+
+    def read(self, symbol: str, interval: str, start: int, end: int) -> np.ndarray:
+        """时间戳位于 [start, end) 的 bar，返回内存映射上的切片，不复制数据"""
+        bars = self.bars(symbol, interval)
+        lo, hi = np.searchsorted(bars["timestamp"], [start, end], side="left")
+        return bars[lo:hi]
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        bars: np.ndarray,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        合并一批 bar 并记录 [start, end) 为已覆盖
+
+        Args:
+            symbol: 股票代码
+            interval: 周期
+            bars: BAR_DTYPE 结构化数组
+            start: 已完整抓取的区间起点，为空时不记录覆盖
+            end: 已完整抓取的区间终点
+            meta: 额外元数据（如 gmtoffset），合并进 meta.json
+        """
+        series_dir = self._series_dir(symbol, interval)
+        key = (symbol.upper(), interval)
+        with self._lock:
+            merged = merge_bars(np.array(self.bars(symbol, interval)), bars)
+            current = dict(self.meta(symbol, interval))
+            os.makedirs(series_dir, exist_ok=True)
+            bars_path = os.path.join(series_dir, "bars.npy")
+            tmp_path = os.path.join(series_dir, "bars.tmp.npy")
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, bars_path)
+
+            if meta:
+                current.update(meta)
+            if start is not None and end is not None and start < end:
+                current["coverage"] = [list(r) for r in merge_ranges([tuple(r) for r in current["coverage"]] + [(start, end)])]
+            self._write_meta(series_dir, current)
+
+            # 旧的内存映射仍指向被替换前的文件，已取出的切片不受影响
+            self._bars[key] = np.load(bars_path, mmap_mode="r")
+            self._meta[key] = current
+
+    def intervals(self, symbol: str) -> List[str]:
+        """该标的本地已有的周期"""
+        symbol_dir = os.path.dirname(self._series_dir(symbol, "1d"))
+        if not os.path.isdir(symbol_dir):
+            return []
+        return sorted(name for name in os.listdir(symbol_dir) if name != "events" and os.path.exists(os.path.join(symbol_dir, name, "meta.json")))
+
+    def update_meta(self, symbol: str, interval: str, meta: Dict[str, Any]) -> None:
+        """只更新元数据，不改写 bar"""
+        series_dir = self._series_dir(symbol, interval)
+        with self._lock:
+            current = dict(self.meta(symbol, interval))
+            current.update(meta)
+            self._write_meta(series_dir, current)
+            self._meta[(symbol.upper(), interval)] = current
+
+    def _write_meta(self, series_dir: str, meta: Dict[str, Any]) -> None:
+        os.makedirs(series_dir, exist_ok=True)
+        meta_path = os.path.join(series_dir, "meta.json")
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def events(self, symbol: str) -> np.ndarray:
+        """该标的已知的全部公司行为（按时间排序）"""
+        path = os.path.join(self._series_dir(symbol, "events"), "events.npy")
+        with self._lock:
+            return np.load(path) if os.path.exists(path) else np.zeros(0, dtype=EVENT_DTYPE)
+
+    def event_gaps(self, symbol: str, start: int, end: int) -> List[Range]:
+        """[start, end) 中尚未查询过公司行为的区间"""
+        return self.gaps(symbol, "events", start, end)
+
+    def write_events(
+        self,
+        symbol: str,
+        events: np.ndarray,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> np.ndarray:
+        """
+        合并公司行为并记录 [start, end) 已查询，返回此前未知的事件
+
+        Args:
+            symbol: 股票代码
+            events: EVENT_DTYPE 结构化数组
+            start: 已查询区间起点，为空时不记录覆盖
+            end: 已查询区间终点
+            meta: 额外元数据，合并进 meta.json
+        """
+        series_dir = self._series_dir(symbol, "events")
+        with self._lock:
+            old = self.events(symbol)
+            merged = merge_events(old, events)
+            # kind 只有 0/1，timestamp * 2 + kind 唯一标识一个事件
+            fresh = merged[~np.isin(merged["timestamp"] * 2 + merged["kind"], old["timestamp"] * 2 + old["kind"])]
+
+            os.makedirs(series_dir, exist_ok=True)
+            tmp_path = os.path.join(series_dir, "events.tmp.npy")
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, os.path.join(series_dir, "events.npy"))
+            # 覆盖范围沿用 meta.json 的记录方式
+            current = dict(self.meta(symbol, "events"))
+            if meta:
+                current.update(meta)
+            if start is not None and end is not None and start < end:
+                current["coverage"] = [list(r) for r in merge_ranges([tuple(r) for r in current["coverage"]] + [(start, end)])]
+            self._write_meta(series_dir, current)
+            self._meta[(symbol.upper(), "events")] = current
+            return fresh
+
+    def clear(self, symbol: str, interval: str) -> None:
+        series_dir = self._series_dir(symbol, interval)
+        key = (symbol.upper(), interval)
+        with self._lock:
+            for name in ("bars.npy", "meta.json"):
+                path = os.path.join(series_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            self._bars.pop(key, None)
+            self._meta.pop(key, None)
@@ -0,0 +1,86 @@
+"""
+分页抓取工具
+
+Serper 类接口（专利、学术）按页返回结果。这里按小批次（wave）并发请求页面，
+遇到不满页或结果开始重复时提前停止，避免浪费配额和延迟。
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+async def iter_deduplicated_pages(
+    fetch_page: Callable[[int, int], Awaitable[Dict[str, Any]]],
+    num_results: int,
+    page_size: int,
+    key_func: Callable[[Dict[str, Any]], Optional[str]],
+    max_wave: int = 4,
+    errors: Optional[List[str]] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    按批次抓取分页结果，逐页产出去重后的新结果
+
+    第一批只请求 1 页，之后每批翻倍直到 max_wave。满足以下任一条件即停止：
+    已收集到 num_results 条去重结果；某页不满页；某页没有任何新结果；某一批全部失败。
+
+    Args:
+        fetch_page: 抓取函数 fetch_page(page, page_size)，返回 {"success": bool, "data": [...], "error": str}
+        num_results: 需要的去重后结果数
+        page_size: 每页数量
+        key_func: 去重键函数，返回 None 时该条结果不参与去重
+        max_wave: 每批最多并发的页数
+        errors: 可选，用于收集失败页的错误信息
+
+    Yields:
+        List[Dict[str, Any]]: 每页中此前未出现过的结果，按页码顺序产出
+    """
+    seen = set()
+    collected = 0
+    page = 1
+    wave = 1
+    while collected < num_results:
+        # 按剩余需要的数量估算本批页数
+        remaining_pages = -(-(num_results - collected) // page_size)
+        pages = list(range(page, page + min(wave, remaining_pages)))
+        tasks = [asyncio.create_task(fetch_page(p, page_size)) for p in pages]
+
+        stop = False
+        failed = 0
+        try:
+            for p, task in zip(pages, tasks):
+                result = await task
+                if not result["success"]:
+                    failed += 1
+                    if errors is not None:
+                        errors.append(f"Page {p}: {result['error']}")
+                    continue
+                if stop:
+                    continue
+
+                items = result["data"]
+                fresh = []
+                for item in items:
+                    key = key_func(item)
+                    if key is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    fresh.append(item)
+
+                fresh = fresh[: num_results - collected]
+                collected += len(fresh)
+                if fresh:
+                    yield fresh
+
+                # 不满页说明已到结果末尾，整页重复说明上游开始循环返回
+                if len(items) < page_size or not fresh or collected >= num_results:
+                    stop = True
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if stop or failed == len(pages):
+            return
+        page += len(pages)
+        wave = min(wave * 2, max_wave)
@@ -0,0 +1,238 @@
+"""
+专利组合批量抓取
+
+search_patents caps a single query at 500 results, so a large assignee's
+portfolio cannot be pulled in one call. PatentPortfolioHarvester splits the
+publication date range recursively until every slice returns fewer results
+than the cap, runs slices concurrently, deduplicates by publicationNumber and
+checkpoints progress so an interrupted harvest can resume.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .patents_source import PatentSource, trim_query
+from .rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger("patent_harvester")
+
+DATE_FORMAT = "%Y%m%d"
+RESULT_CAP = 500
+
+Window = Tuple[str, str]
+
+
+def split_window(window: Window) -> Optional[Tuple[Window, Window]]:
+    """Split an inclusive YYYYMMDD window in half, None if it is a single day"""
+    start = datetime.strptime(window[0], DATE_FORMAT).date()
+    end = datetime.strptime(window[1], DATE_FORMAT).date()
+    if start >= end:
+        return None
+    mid = start + (end - start) // 2
+    return (
+        (start.strftime(DATE_FORMAT), mid.strftime(DATE_FORMAT)),
+        ((mid + timedelta(days=1)).strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)),
+    )
+
+
+def yearly_windows(window: Window) -> List[Window]:
+    """Cut an inclusive YYYYMMDD window at calendar year boundaries"""
+    start = datetime.strptime(window[0], DATE_FORMAT).date()
+    end = datetime.strptime(window[1], DATE_FORMAT).date()
+    windows = []
+    while start <= end:
+        year_end = min(start.replace(month=12, day=31), end)
+        windows.append((start.strftime(DATE_FORMAT), year_end.strftime(DATE_FORMAT)))
+        start = year_end + timedelta(days=1)
+    return windows
+
+
+class PatentPortfolioHarvester:
+    """Harvest every patent of an assignee in a publication date range
+
+    Example:
+        >>> harvester = PatentPortfolioHarvester(client.patent, "Apple Inc.", "20100101", "20241231",
+        ...                                      checkpoint_path="apple.ckpt.json")
+        >>> result = await harvester.run()
+        >>> print(result["data"]["count"])
+    """
+
+    def __init__(
+        self,
+        source: PatentSource,
+        assignee: str,
+        start_time: str,
+        end_time: str,
+        query: str = "",
+        concurrency: int = 4,
+        requests_per_second: float = 4.0,
+        checkpoint_path: Optional[str] = None,
+        output_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            source: Patent data source
+            assignee: Assignee whose portfolio is harvested, e.g. "Apple Inc."
+            start_time: Start date YYYYMMDD
+            end_time: End date YYYYMMDD
+            query: Optional keywords to narrow the portfolio
+            concurrency: Number of slices fetched at the same time
+            requests_per_second: Upper bound on upstream page requests per second
+            checkpoint_path: JSON file holding slice progress, enables resume
+            output_path: JSONL file receiving harvested patents, defaults to checkpoint_path + ".patents.jsonl"
+        """
+        if start_time > end_time:
+            raise ValueError("start_time cannot be greater than end_time")
+        self.source = source
+        self.assignee = assignee
+        self.window = (start_time, end_time)
+        self.query = trim_query(query.strip())
+        self.concurrency = concurrency
+        self.limiter = AsyncRateLimiter(requests_per_second)
+        self.checkpoint_path = checkpoint_path
+        self.output_path = output_path or (f"{checkpoint_path}.patents.jsonl" if checkpoint_path else None)
+
+        self._pending: List[Window] = yearly_windows(self.window)
+        self._completed: List[Window] = []
+        self._truncated: List[Window] = []  # 单日仍超过上限的窗口
+        self._failed: List[Dict[str, Any]] = []
+        self._patents: Dict[str, Dict[str, Any]] = {}
+        self._load_checkpoint()
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Harvest all slices
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"assignee": "...", "count": 1234, "patents": [...],
+                "truncated_windows": [...], "failed_windows": [...]}}
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for window in self._pending:
+            queue.put_nowait(window)
+
+        async def worker() -> None:
+            while True:
+                window = await queue.get()
+                try:
+                    await self._harvest_window(window, queue)
+                except Exception as e:
+                    # 单个窗口出错（如写文件失败）只记为失败，恢复时重新抓取，worker 继续处理后续窗口
+                    logger.exception(f"Window {window[0]}~{window[1]} failed: {e}")
+                    self._finish_window(window, error=str(e))
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._save_checkpoint()
+
+        return {
+            "success": True,
+            "data": {
+                "assignee": self.assignee,
+                "count": len(self._patents),
+                "patents": list(self._patents.values()),
+                "truncated_windows": [list(w) for w in self._truncated],
+                "failed_windows": list(self._failed),
+            },
+        }
+
+    async def _harvest_window(self, window: Window, queue: asyncio.Queue) -> None:
+        error_msgs: List[str] = []
+        patents: List[Dict[str, Any]] = []
+        async for page in self.source._iter_patent_pages(
+            self.query, self.assignee, RESULT_CAP, window[0], window[1], error_msgs, limiter=self.limiter
+        ):
+            patents.extend(page)
+
+        if error_msgs and not patents:
+            self._finish_window(window, error="; ".join(error_msgs))
+            return
+
+        self._store(patents)
+        if len(patents) >= RESULT_CAP:
+            halves = split_window(window)
+            if halves is not None:
+                # 达到上限，二分后重新抓取；两半先记入待处理再移除原窗口，断点里不会丢窗口
+                for half in halves:
+                    self._pending.append(half)
+                    queue.put_nowait(half)
+                self._pending.remove(window)
+                self._save_checkpoint()
+                return
+            logger.warning(f"Window {window[0]} still exceeds {RESULT_CAP} results, portfolio is truncated for that day")
+            self._truncated.append(window)
+
+        self._finish_window(window, error="; ".join(error_msgs) if error_msgs else None)
+
+    def _finish_window(self, window: Window, error: Optional[str] = None) -> None:
+        """窗口处理结束：移出待处理列表，记为完成或失败，并写断点"""
+        if window in self._pending:
+            self._pending.remove(window)
+        if error is None:
+            self._completed.append(window)
+        else:
+            self._failed.append({"start": window[0], "end": window[1], "error": error})
+        self._save_checkpoint()
+
+    def _store(self, patents: List[Dict[str, Any]]) -> None:
+        fresh = []
+        for patent in patents:
+            key = patent.get("publicationNumber") or patent.get("link")
+            if not key or key in self._patents:
+                continue
+            self._patents[key] = patent
+            fresh.append(patent)
+        if fresh and self.output_path:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                for patent in fresh:
+                    f.write(json.dumps(patent, ensure_ascii=False) + "\n")
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        state = {
+            "assignee": self.assignee,
+            "query": self.query,
+            "window": list(self.window),
+            "pending": [list(w) for w in self._pending],
+            "completed": [list(w) for w in self._completed],
+            "truncated": [list(w) for w in self._truncated],
+            "failed": self._failed,
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> None:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if (state["assignee"], state["query"], tuple(state["window"])) != (self.assignee, self.query, self.window):
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different harvest")
+
+        # 失败窗口在恢复时重新抓取；已完成的窗口即使仍在待处理列表里也不再抓取
+        self._completed = [tuple(w) for w in state["completed"]]
+        done = set(self._completed)
+        pending = [tuple(w) for w in state["pending"]] + [(f["start"], f["end"]) for f in state["failed"]]
+        self._pending = [w for w in dict.fromkeys(pending) if w not in done]
+        self._truncated = [tuple(w) for w in state["truncated"]]
+        if self.output_path and os.path.exists(self.output_path):
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        patent = json.loads(line)
+                        self._patents[patent.get("publicationNumber") or patent.get("link")] = patent
+        logger.info(f"Resuming harvest: {len(self._completed)} windows done, {len(self._pending)} pending, {len(self._patents)} patents")
@@ -0,0 +1,389 @@
+"""
+专利本地全文索引（SQLite FTS5）
+
+Every patent returned by PatentSource is upserted into a local FTS5 index
+keyed by publicationNumber. Each upstream query is also recorded as a
+coverage entry (normalized keywords, assignee, publication date window)
+together with the patents it returned, which lets repeated and refined
+queries be answered from the index:
+
+- an exact repeat of an earlier query is served from that query's hits;
+- a query whose keywords are a superset of a complete earlier query (one
+  that returned fewer results than requested) is served from those hits,
+  filtered by the extra keywords;
+- only the parts of the requested date window that no complete query
+  covers are sent upstream.
+
+Local results are ranked with FTS5 BM25 over title, snippet, assignee and
+inventor.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .client import get_cache_dir
+
+DATE_FORMAT = "%Y%m%d"
+MIN_DATE = "00010101"
+MAX_DATE = "99991231"
+
+Window = Tuple[str, str]
+
+
+def normalize_keywords(query: str) -> List[str]:
+    """Lower-cased, de-duplicated, sorted keyword tokens of a query"""
+    return sorted({token for token in re.split(r"[^\w.-]+", query.lower()) if token})
+
+
+def normalize_assignee(assignee: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (assignee or "").strip().lower())
+
+
+def is_date(value: Optional[str]) -> bool:
+    """Whether a start_time/end_time value is a YYYYMMDD date the index can reason about"""
+    if value is None:
+        return True
+    try:
+        datetime.strptime(value, DATE_FORMAT)
+        return len(value) == 8
+    except (TypeError, ValueError):
+        return False
+
+
+def _to_date(value: str) -> date:
+    if value == MIN_DATE:
+        return date.min
+    if value == MAX_DATE:
+        return date.max
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def _from_date(value: date) -> str:
+    if value == date.min:
+        return MIN_DATE
+    if value == date.max:
+        return MAX_DATE
+    return value.strftime(DATE_FORMAT)
+
+
+def subtract_windows(window: Window, covered: Iterable[Window]) -> List[Window]:
+    """Parts of an inclusive YYYYMMDD window not covered by any of the given windows"""
+    start, end = _to_date(window[0]), _to_date(window[1])
+    gaps = []
+    cursor = start
+    for c_start, c_end in sorted((_to_date(s), _to_date(e)) for s, e in covered):
+        if c_end < cursor or c_start > end:
+            continue
+        if c_start > cursor:
+            gaps.append((cursor, c_start - timedelta(days=1)))
+        if c_end >= end:
+            cursor = None
+            break
+        cursor = c_end + timedelta(days=1)
+    if cursor is not None and cursor <= end:
+        gaps.append((cursor, end))
+    return [(_from_date(s), _from_date(e)) for s, e in gaps]
+
+
+def _fts_phrase(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+
+def _date_key(patent: Dict[str, Any]) -> str:
+    """Publication date as YYYYMMDD (the date upstream filters on), empty if unknown"""
+    digits = re.sub(r"\D", "", str(patent.get("publicationDate") or ""))
+    return digits[:8] if len(digits) >= 8 else ""
+
+
+class PatentIndex:
+    """Local FTS5 index of patents plus a record of upstream query coverage"""
+
+    def __init__(self, db_path: Optional[str] = None, coverage_ttl: float = 7 * 24 * 3600):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "patents.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.coverage_ttl = coverage_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS patents (
+                publication_number TEXT PRIMARY KEY,
+                title TEXT,
+                snippet TEXT,
+                link TEXT,
+                priority_date TEXT,
+                filing_date TEXT,
+                grant_date TEXT,
+                inventor TEXT,
+                assignee TEXT,
+                pdf_url TEXT,
+                date_key TEXT,
+                publication_date TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS patents_fts USING fts5(
+                publication_number UNINDEXED, title, snippet, assignee, inventor
+            );
+            CREATE TABLE IF NOT EXISTS coverage (
+                id INTEGER PRIMARY KEY,
+                keywords TEXT NOT NULL,
+                assignee TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                requested INTEGER NOT NULL,
+                returned INTEGER NOT NULL,
+                complete INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_coverage_assignee ON coverage (assignee);
+            CREATE TABLE IF NOT EXISTS coverage_hits (
+                coverage_id INTEGER NOT NULL,
+                publication_number TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                PRIMARY KEY (coverage_id, publication_number)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add_patents(self, patents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upsert patents into the index
+
+        Returns:
+            int: Number of patents written
+        """
+        rows = []
+        for patent in patents:
+            number = patent.get("publicationNumber")
+            if not number:
+                continue
+            rows.append(
+                (
+                    number,
+                    patent.get("title"),
+                    patent.get("snippet"),
+                    patent.get("link"),
+                    patent.get("priorityDate"),
+                    patent.get("filingDate"),
+                    patent.get("grantDate"),
+                    patent.get("inventor"),
+                    patent.get("assignee"),
+                    patent.get("pdfUrl"),
+                    _date_key(patent),
+                    patent.get("publicationDate"),
+                )
+            )
+        if not rows:
+            return 0
+        with self._lock:
+            for row in rows:
+                # 保持 rowid 不变，FTS 表按 rowid 与主表对应
+                self._conn.execute(
+                    """
+                    INSERT INTO patents (
+                        publication_number, title, snippet, link, priority_date, filing_date, grant_date,
+                        inventor, assignee, pdf_url, date_key, publication_date
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(publication_number) DO UPDATE SET
+                        title = excluded.title, snippet = excluded.snippet, link = excluded.link,
+                        priority_date = excluded.priority_date, filing_date = excluded.filing_date,
+                        grant_date = excluded.grant_date, inventor = excluded.inventor, assignee = excluded.assignee,
+                        pdf_url = excluded.pdf_url, date_key = excluded.date_key, publication_date = excluded.publication_date
+                    """,
+                    row,
+                )
+                rowid = self._conn.execute("SELECT rowid FROM patents WHERE publication_number = ?", (row[0],)).fetchone()[0]
+                self._conn.execute("DELETE FROM patents_fts WHERE rowid = ?", (rowid,))
+                self._conn.execute(
+                    "INSERT INTO patents_fts (rowid, publication_number, title, snippet, assignee, inventor) VALUES (?, ?, ?, ?, ?, ?)",
+                    (rowid, row[0], row[1] or "", row[2] or "", row[8] or "", row[7] or ""),
+                )
+            self._conn.commit()
+        return len(rows)
+
+    def record_coverage(
+        self,
+        query: str,
+        assignee: Optional[str],
+        window: Window,
+        requested: int,
+        patents: Sequence[Dict[str, Any]],
+    ) -> int:
+        """
+        Record that an upstream query for a date window returned the given patents
+
+        The entry is complete when fewer results than requested came back, i.e.
+        the upstream result set was exhausted.
+
+        Returns:
+            int: Coverage entry id
+        """
+        numbers = [p["publicationNumber"] for p in patents if p.get("publicationNumber")]
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO coverage (keywords, assignee, start_date, end_date, requested, returned, complete, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    " ".join(normalize_keywords(query)),
+                    normalize_assignee(assignee),
+                    window[0],
+                    window[1],
+                    requested,
+                    len(patents),
+                    int(len(patents) < requested),
+                    time.time(),
+                ),
+            )
+            coverage_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO coverage_hits (coverage_id, publication_number, rank) VALUES (?, ?, ?)",
+                [(coverage_id, number, rank) for rank, number in enumerate(numbers)],
+            )
+            self._conn.commit()
+        return coverage_id
+
+    def invalidate_coverage(self, coverage_id: int) -> None:
+        """Keep an entry's hits usable for this answer but never treat it as reusable coverage"""
+        with self._lock:
+            self._conn.execute("UPDATE coverage SET complete = 0, requested = -1 WHERE id = ?", (coverage_id,))
+            self._conn.commit()
+
+    def plan(self, query: str, assignee: Optional[str], window: Window, num_results: int) -> Tuple[List[int], List[Window]]:
+        """
+        Work out how to answer a query from the index
+
+        Returns:
+            Tuple[List[int], List[Window]]: Coverage entry ids usable for the answer, and the date
+                windows that still have to be fetched upstream
+        """
+        keywords = set(normalize_keywords(query))
+        assignee_key = normalize_assignee(assignee)
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT id, keywords, assignee, start_date, end_date, requested, complete FROM coverage
+                WHERE assignee = ? AND fetched_at >= ? AND end_date >= ? AND start_date <= ?
+                ORDER BY fetched_at DESC
+                """,
+                (assignee_key, time.time() - self.coverage_ttl, window[0], window[1]),
+            ).fetchall()
+            # 窗口超出本次请求的条目要按发布日期裁剪，命中里有发布日期未知的专利时不能复用
+            undated = {
+                row[0]
+                for row in self._conn.execute(
+                    """
+                    SELECT DISTINCT h.coverage_id FROM coverage_hits h JOIN patents p USING (publication_number)
+                    WHERE (p.date_key IS NULL OR p.date_key = '') AND h.coverage_id IN (
+                        SELECT id FROM coverage WHERE assignee = ? AND (start_date < ? OR end_date > ?)
+                    )
+                    """,
+                    (assignee_key, window[0], window[1]),
+                )
+            }
+
+        # 完全相同的查询且当时请求数不少于本次，直接复用
+        for coverage_id, cov_keywords, _, start, end, requested, _ in rows:
+            if set(cov_keywords.split()) == keywords and (start, end) == window and requested >= num_results:
+                return [coverage_id], []
+
+        # 关键词是子集的完整查询可用于回答细化查询
+        usable = [
+            (coverage_id, (start, end))
+            for coverage_id, cov_keywords, _, start, end, _, complete in rows
+            if complete and set(cov_keywords.split()) <= keywords and coverage_id not in undated
+        ]
+        gaps = subtract_windows(window, [w for _, w in usable])
+        return [coverage_id for coverage_id, _ in usable], gaps
+
+    def search(
+        self,
+        query: str,
+        window: Window,
+        coverage_ids: Sequence[int],
+        num_results: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer a query from the hits of the given coverage entries, ranked by BM25
+
+        Hits from entries whose window extends beyond the requested one are
+        filtered by their publication date. Keywords beyond those of
+        the contributing entry must all match the indexed text.
+        """
+        if not coverage_ids:
+            return []
+        keywords = normalize_keywords(query)
+        placeholders = ",".join("?" for _ in coverage_ids)
+        with self._lock:
+            entries = self._conn.execute(
+                f"SELECT id, keywords, start_date, end_date FROM coverage WHERE id IN ({placeholders})", list(coverage_ids)
+            ).fetchall()
+
+            candidates: Dict[str, int] = {}
+            for coverage_id, cov_keywords, start, end in entries:
+                sql = "SELECT h.publication_number, h.rank FROM coverage_hits h JOIN patents p USING (publication_number) WHERE h.coverage_id = ?"
+                params: List[Any] = [coverage_id]
+                if start < window[0] or end > window[1]:
+                    sql += " AND p.date_key BETWEEN ? AND ?"
+                    params += [window[0], window[1]]
+                extra = [k for k in keywords if k not in set(cov_keywords.split())]
+                if extra:
+                    sql += " AND h.publication_number IN (SELECT publication_number FROM patents_fts WHERE patents_fts MATCH ?)"
+                    params.append(" AND ".join(_fts_phrase(k) for k in extra))
+                for number, rank in self._conn.execute(sql, params):
+                    candidates[number] = min(rank, candidates.get(number, rank))
+
+            if not candidates:
+                return []
+
+            scores: Dict[str, float] = {}
+            if keywords:
+                match = " OR ".join(_fts_phrase(k) for k in keywords)
+                for number, score in self._conn.execute(
+                    "SELECT publication_number, bm25(patents_fts) FROM patents_fts WHERE patents_fts MATCH ?", (match,)
+                ):
+                    if number in candidates:
+                        scores[number] = score
+
+            # bm25 越小越相关；无匹配的排在后面，按上游原始顺序
+            ordered = sorted(candidates, key=lambda n: (scores.get(n, float("inf")), candidates[n]))[:num_results]
+            placeholders = ",".join("?" for _ in ordered)
+            rows = self._conn.execute(
+                f"""
+                SELECT publication_number, title, snippet, link, priority_date, filing_date, grant_date, inventor, assignee, pdf_url,
+                    publication_date
+                FROM patents WHERE publication_number IN ({placeholders})
+                """,
+                ordered,
+            ).fetchall()
+
+        by_number = {row[0]: row for row in rows}
+        return [self._row_to_patent(by_number[n]) for n in ordered if n in by_number]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_patent(row: Sequence[Any]) -> Dict[str, Any]:
+        return {
+            "title": row[1],
+            "snippet": row[2],
+            "link": row[3],
+            "priorityDate": row[4],
+            "filingDate": row[5],
+            "grantDate": row[6],
+            "publicationDate": row[10],
+            "inventor": row[7],
+            "assignee": row[8],
+            "publicationNumber": row[0],
+            "pdfUrl": row[9],
+        }
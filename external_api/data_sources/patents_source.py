@@ -4,16 +4,27 @@
 
 import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
 from .base import BaseAPI
+from .paging import iter_deduplicated_pages
+from .patent_index import MAX_DATE, MIN_DATE, PatentIndex, is_date
+from .rate_limiter import AsyncRateLimiter
 
 logger = logging.getLogger("patents_source")
 
 
+def trim_query(query: str) -> str:
+    """关键词裁剪，最多保留 5 个"""
+    keywords = query.split(" ")
+    if len(keywords) > 5:
+        query = " ".join(keywords[:5])
+    return query
+
+
 class PatentSource(BaseAPI):
     """Patent data source"""
 
@@ -26,6 +37,10 @@ class PatentSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        # 本地全文索引，首次使用时创建
+        self._index_path = os.path.join(config["cache_dir"], "patents.db") if config.get("cache_dir") else None
+        self._index: Optional[PatentIndex] = None
+        self._index_disabled = False
 
     @property
     def source_name(self) -> str:
@@ -96,6 +111,7 @@ class PatentSource(BaseAPI):
                         "priorityDate": item.get("priorityDate"),
                         "filingDate": item.get("filingDate"),
                         "grantDate": item.get("grantDate"),
+                        "publicationDate": item.get("publicationDate"),
                         "inventor": item.get("inventor"),
                         "assignee": item.get("assignee"),
                         "publicationNumber": item.get("publicationNumber"),
@@ -114,9 +130,11 @@ class PatentSource(BaseAPI):
         num_results: int = 10,
         start_time: Optional[str] = None,
         end_time: Optional[str] = None,
+        use_index: bool = False,
     ) -> Dict[str, Any]:
         """
         Search for patents.
+        With use_index, repeated and refined queries are answered from the local patent index when it already covers them.
 
         Args:
             assignee(str): The assignee of the patents, e.g. "Apple Inc.".
@@ -124,6 +142,8 @@ class PatentSource(BaseAPI):
             num_results(int): Number of results to return, default is 10, max is 500
             start_time(str): Start date YYYYMMDD, optional.
             end_time(str): End date YYYYMMDD, optional.
+            use_index(bool): Whether to answer from the local patent index where possible, default is False.
+                Results served from the index are ranked locally by BM25 instead of by upstream relevance.
 
         Returns:
             Dict[str, Any]: Search results, format:
@@ -138,6 +158,7 @@ class PatentSource(BaseAPI):
                                 "priorityDate": "...",
                                 "filingDate": "...",
                                 "grantDate": "...",
+                                "publicationDate": "...",
                                 "inventor": "...",
                                 "assignee": "...",
                                 "publicationNumber": "...",
@@ -165,63 +186,158 @@ class PatentSource(BaseAPI):
         #     ...     print(f"Search succeeded, {len(result['data']['patents'])} results returned")
         # """
         try:
-            # 关键词裁剪
-            keywords = query.split(" ")
-            if len(keywords) > 5:
-                query = " ".join(keywords[:5])
-
-            # 限制最大结果数
-            if num_results > 500:
-                num_results = 500
-
-            # 计算分页
-            MAX_PAGE_SIZE = 50
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_patents_page(
-                        query=query,
-                        assignee=assignee,
-                        page_size=current_page_size,
-                        page=page,
-                        start_time=start_time,
-                        end_time=end_time,
-                    )
-                )
+            query = trim_query(query)
+            num_results = min(num_results, 500)
+            # 非 YYYYMMDD 的时间参数原样交给上游，不走本地索引；sqlite 操作都放到线程里，不阻塞事件循环
+            index = await asyncio.to_thread(self._get_index) if use_index and is_date(start_time) and is_date(end_time) else None
+            if index is None:
+                patents, _ = await self._collect_patents(query, assignee, num_results, start_time, end_time)
+                return {"success": True, "data": {"patents": patents}}
 
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
+            window = (start_time or MIN_DATE, end_time or MAX_DATE)
+            coverage_ids, gaps = await asyncio.to_thread(index.plan, query, assignee, window, num_results)
 
-            # 合并结果
-            all_patents = []
-            has_error = False
-            error_msgs = []
+            if gaps == [window]:
+                # 整个窗口都未覆盖，走上游并保持上游结果顺序
+                patents, error_msgs = await self._collect_patents(query, assignee, num_results, start_time, end_time)
+                await asyncio.to_thread(self._index_results, index, query, assignee, window, num_results, patents, error_msgs)
+                return {"success": True, "data": {"patents": patents}}
 
-            for result in results:
-                if result["success"]:
-                    all_patents.extend(result["data"])
-                else:
-                    has_error = True
-                    error_msgs.append(result["error"])
+            # 只补抓索引未覆盖的时间窗口
+            async def fill(gap: Tuple[str, str]) -> None:
+                gap_start = None if gap[0] == MIN_DATE else gap[0]
+                gap_end = None if gap[1] == MAX_DATE else gap[1]
+                patents, error_msgs = await self._collect_patents(query, assignee, num_results, gap_start, gap_end)
+                coverage_id = await asyncio.to_thread(self._index_results, index, query, assignee, gap, num_results, patents, error_msgs, True)
+                if error_msgs:
+                    logger.warning(f"Patent window {gap[0]}~{gap[1]} fetched with errors, not kept as complete coverage")
+                coverage_ids.append(coverage_id)
 
-            # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
-                logger.warning(f"Some patent pages failed: {', '.join(error_msgs)}")
+            await asyncio.gather(*(fill(gap) for gap in gaps))
 
-            # 限制返回数量
-            all_patents = all_patents[:num_results]
-
-            return {"success": True, "data": {"patents": all_patents}}
+            patents = await asyncio.to_thread(index.search, query, window, coverage_ids, num_results)
+            return {"success": True, "data": {"patents": patents}}
         except Exception as e:
             logger.error(f"search_patents error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def stream_patents(
+        self,
+        query: str,
+        assignee: Optional[str] = None,
+        num_results: int = 10,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Search for patents and yield each page of new results as soon as it arrives.
+
+        Pages are requested in small waves and paging stops early once a page comes back under-filled
+        or only repeats earlier results. Results are deduplicated by publicationNumber (or link).
+
+        Args:
+            query(str): Search keywords. up to 5.
+            assignee(str): The assignee of the patents, e.g. "Apple Inc.".
+            num_results(int): Number of deduplicated results to return, default is 10, max is 500
+            start_time(str): Start date YYYYMMDD, optional.
+            end_time(str): End date YYYYMMDD, optional.
+
+        Returns:
+            AsyncIterator[List[Dict[str, Any]]]: Batches of patents in the same format as search_patents
+
+        Examples:
+            async for patents in client.patent.stream_patents(query="machine learning", num_results=200):
+                print(len(patents))
+        """
+        query = trim_query(query)
+
+        # 限制最大结果数（去重后计数）
+        num_results = min(num_results, 500)
+
+        error_msgs: List[str] = []
+        async for patents in self._iter_patent_pages(query, assignee, num_results, start_time, end_time, error_msgs):
+            yield patents
+
+        # 如果有部分失败，记录错误但仍返回成功获取的数据
+        if error_msgs:
+            logger.warning(f"Some patent pages failed: {', '.join(error_msgs)}")
+
+    def _iter_patent_pages(
+        self,
+        query: str,
+        assignee: Optional[str],
+        num_results: int,
+        start_time: Optional[str],
+        end_time: Optional[str],
+        error_msgs: List[str],
+        limiter: Optional[AsyncRateLimiter] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """按批次抓取分页结果，按 publicationNumber 去重；传入 limiter 时每页请求前先取令牌"""
+        MAX_PAGE_SIZE = 50
+        page_size = min(num_results, MAX_PAGE_SIZE)
+
+        async def fetch_page(page: int, size: int) -> Dict[str, Any]:
+            if limiter is not None:
+                await limiter.acquire()
+            return await self._fetch_patents_page(
+                query=query,
+                assignee=assignee,
+                page_size=size,
+                page=page,
+                start_time=start_time,
+                end_time=end_time,
+            )
+
+        return iter_deduplicated_pages(
+            fetch_page, num_results, page_size, key_func=lambda p: p.get("publicationNumber") or p.get("link"), errors=error_msgs
+        )
+
+    async def _collect_patents(
+        self,
+        query: str,
+        assignee: Optional[str],
+        num_results: int,
+        start_time: Optional[str],
+        end_time: Optional[str],
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """抓取全部分页结果，返回结果列表和失败页错误信息"""
+        error_msgs: List[str] = []
+        all_patents: List[Dict[str, Any]] = []
+        async for patents in self._iter_patent_pages(query, assignee, num_results, start_time, end_time, error_msgs):
+            all_patents.extend(patents)
+
+        # 如果有部分失败，记录错误但仍返回成功获取的数据
+        if error_msgs:
+            logger.warning(f"Some patent pages failed: {', '.join(error_msgs)}")
+        return all_patents, error_msgs
+
+    @staticmethod
+    def _index_results(
+        index: PatentIndex,
+        query: str,
+        assignee: Optional[str],
+        window: Tuple[str, str],
+        num_results: int,
+        patents: List[Dict[str, Any]],
+        error_msgs: List[str],
+        keep_partial: bool = False,
+    ) -> Optional[int]:
+        """写入抓到的专利并记录覆盖；有失败页时不记为完整覆盖（keep_partial 时保留为失效条目供本次检索使用）"""
+        index.add_patents(patents)
+        if not error_msgs:
+            return index.record_coverage(query, assignee, window, num_results, patents)
+        if not keep_partial:
+            return None
+        coverage_id = index.record_coverage(query, assignee, window, num_results, patents)
+        index.invalidate_coverage(coverage_id)
+        return coverage_id
+
+    def _get_index(self) -> Optional[PatentIndex]:
+        """获取本地专利索引，创建失败时禁用索引"""
+        if self._index is None and not self._index_disabled:
+            try:
+                self._index = PatentIndex(self._index_path)
+            except Exception as e:
+                logger.warning(f"Patent index unavailable, falling back to upstream only: {e}")
+                self._index_disabled = True
+        return self._index
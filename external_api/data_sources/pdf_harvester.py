@@ -0,0 +1,245 @@
+"""
+PDF 批量下载与文本抽取
+
+ScholarSource and PatentSource results carry a pdfUrl. PdfHarvester downloads
+those PDFs with bounded concurrency, stores them content-addressed by SHA-256,
+and extracts text with pymupdf in a process pool while other downloads are
+still running. A SQLite manifest maps urls to hashes, so known urls are not
+downloaded again and already-extracted hashes are not re-processed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger("pdf_harvester")
+
+PDF_MAGIC = b"%PDF"
+# PDF 规范允许 %PDF 头出现在文件开头 1024 字节内
+PDF_HEADER_WINDOW = 1024
+
+
+def extract_pdf_text(pdf_path: str, text_path: str) -> int:
+    """在子进程中抽取 PDF 文本并写入 text_path，返回页数"""
+    import pymupdf
+
+    with pymupdf.open(pdf_path) as doc:
+        pages = [page.get_text() for page in doc]
+    tmp_path = f"{text_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\f".join(pages))
+    os.replace(tmp_path, text_path)
+    return len(pages)
+
+
+class PdfHarvester:
+    """Download PDFs and extract their text
+
+    Example:
+        >>> harvester = PdfHarvester("/data/pdfs", concurrency=8)
+        >>> result = await harvester.harvest_results(papers)
+        >>> print(result["data"]["stats"]["pages_per_second"])
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        concurrency: int = 8,
+        process_workers: Optional[int] = None,
+        timeout: int = 60,
+        max_bytes: int = 100 * 1024 * 1024,
+        trust_env: bool = True,
+    ):
+        """
+        Args:
+            store_dir: Directory holding pdf/, text/ and manifest.db
+            concurrency: Number of downloads running at the same time
+            process_workers: Size of the extraction process pool, defaults to the CPU count
+            timeout: Per-download timeout in seconds
+            max_bytes: Downloads larger than this are aborted
+            trust_env: Whether aiohttp honours proxy environment variables, disable for local test servers
+        """
+        self.store_dir = store_dir
+        self.concurrency = concurrency
+        self.process_workers = process_workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.trust_env = trust_env
+        os.makedirs(os.path.join(store_dir, "pdf"), exist_ok=True)
+        os.makedirs(os.path.join(store_dir, "text"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(store_dir, "manifest.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, fetched_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS documents (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, pages INTEGER, error TEXT);
+            """
+        )
+
+    def pdf_path(self, sha256: str) -> str:
+        return os.path.join(self.store_dir, "pdf", sha256[:2], f"{sha256}.pdf")
+
+    def text_path(self, sha256: str) -> str:
+        return os.path.join(self.store_dir, "text", sha256[:2], f"{sha256}.txt")
+
+    async def harvest_results(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Harvest the pdfUrl of scholar papers or patents
+
+        Args:
+            items: Results from search_scholar / search_patents, entries without pdfUrl are ignored
+
+        Returns:
+            Dict[str, Any]: Same as harvest
+        """
+        return await self.harvest([item["pdfUrl"] for item in items if item.get("pdfUrl")])
+
+    async def harvest(self, urls: Iterable[str]) -> Dict[str, Any]:
+        """
+        Download and extract a set of PDF urls
+
+        Args:
+            urls: PDF urls, duplicates are fetched once
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"documents": [{"url", "sha256", "pages", "text_path", "status", "error"}],
+                "stats": {"downloaded", "cached", "extracted", "skipped", "failed", "pages", "elapsed", "pages_per_second"}}}
+        """
+        urls = list(dict.fromkeys(urls))
+        stats = {"downloaded": 0, "cached": 0, "extracted": 0, "skipped": 0, "failed": 0, "pages": 0}
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        # 相同内容的不同链接只抽取一次
+        extractions: Dict[str, asyncio.Future] = {}
+
+        with ProcessPoolExecutor(max_workers=self.process_workers) as pool:
+            async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
+
+                async def process(url: str) -> Dict[str, Any]:
+                    doc: Dict[str, Any] = {"url": url, "sha256": None, "pages": None, "text_path": None, "status": "failed", "error": None}
+                    try:
+                        sha256 = self._lookup_url(url)
+                        if sha256 is not None:
+                            stats["cached"] += 1
+                        else:
+                            async with semaphore:
+                                sha256 = await self._download(session, url)
+                            stats["downloaded"] += 1
+                        doc["sha256"] = sha256
+
+                        pages = self._lookup_pages(sha256)
+                        if pages is not None:
+                            stats["skipped"] += 1
+                        else:
+                            if sha256 not in extractions:
+                                extractions[sha256] = loop.run_in_executor(pool, extract_pdf_text, self.pdf_path(sha256), self._prepare_text_path(sha256))
+                                pages = await extractions[sha256]
+                                self._record_pages(sha256, pages, None)
+                                stats["extracted"] += 1
+                                stats["pages"] += pages
+                            else:
+                                pages = await extractions[sha256]
+                                stats["skipped"] += 1
+                        doc.update({"pages": pages, "text_path": self.text_path(sha256), "status": "ok"})
+                    except Exception as e:
+                        logger.error(f"PDF harvest failed: url={url}, error={e}")
+                        if doc["sha256"] is not None:
+                            self._record_pages(doc["sha256"], None, str(e))
+                        doc["error"] = str(e)
+                        stats["failed"] += 1
+                    return doc
+
+                documents = await asyncio.gather(*(process(url) for url in urls))
+
+        elapsed = time.monotonic() - started
+        stats["elapsed"] = round(elapsed, 3)
+        stats["pages_per_second"] = round(stats["pages"] / elapsed, 2) if elapsed > 0 else 0.0
+        return {"success": True, "data": {"documents": documents, "stats": stats}}
+
+    async def _download(self, session: aiohttp.ClientSession, url: str) -> str:
+        """流式下载到临时文件并计算哈希，校验为 PDF 后按哈希落盘"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    response.raise_for_status()
+                    head = b""
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        if len(head) < PDF_HEADER_WINDOW:
+                            # 很多 pdfUrl 实际返回的是 HTML 落地页；%PDF 前允许有少量字节，首块可能很短
+                            head += chunk[: PDF_HEADER_WINDOW - len(head)]
+                            if PDF_MAGIC not in head and len(head) >= PDF_HEADER_WINDOW:
+                                raise ValueError("response is not a PDF")
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise ValueError(f"PDF larger than {self.max_bytes} bytes")
+                        digest.update(chunk)
+                        f.write(chunk)
+            if size == 0:
+                raise ValueError("empty response")
+            if PDF_MAGIC not in head:
+                raise ValueError("response is not a PDF")
+
+            sha256 = digest.hexdigest()
+            pdf_path = self.pdf_path(sha256)
+            os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+            os.replace(tmp_path, pdf_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO documents (sha256, size) VALUES (?, ?)", (sha256, size))
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, sha256, fetched_at) VALUES (?, ?, ?)", (url, sha256, time.time()))
+            self._conn.commit()
+        return sha256
+
+    def _lookup_url(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(self.pdf_path(row[0])):
+            return None
+        return row[0]
+
+    def _lookup_pages(self, sha256: str) -> Optional[int]:
+        with self._lock:
+            row: Optional[Tuple[Optional[int]]] = self._conn.execute("SELECT pages FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None or row[0] is None or not os.path.exists(self.text_path(sha256)):
+            return None
+        return row[0]
+
+    def _prepare_text_path(self, sha256: str) -> str:
+        text_path = self.text_path(sha256)
+        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+        return text_path
+
+    def _record_pages(self, sha256: str, pages: Optional[int], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE documents SET pages = ?, error = ? WHERE sha256 = ?", (pages, error, sha256))
+            self._conn.commit()
+
+    def read_text(self, sha256: str) -> Optional[str]:
+        """读取已抽取的文本，页之间以换页符分隔"""
+        text_path = self.text_path(sha256)
+        if not os.path.exists(text_path):
+            return None
+        with open(text_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,324 @@
+"""
+Pinterest 批量抓取
+
+PinHarvester pages through search_pins results and requests the next page
+as soon as its bookmark (cursor) arrives, so the network wait overlaps with
+processing of the current page. Pins and image URLs are deduplicated by
+64-bit hashes. Pinners are interned into a user table written once, and
+pins reference them by index. Rows go straight to disk, as JSONL or as
+columnar .npz chunks, so memory stays flat on large pulls.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .pinterest_source import PinterestSource
+from .scholar_corpus import _pack_strings, _unpack_strings
+
+logger = logging.getLogger("pinterest_harvester")
+
+TEXT_COLUMNS = ("id", "title", "description", "alt_text", "created_at", "video_url")
+INT_COLUMNS = ("likes", "user", "image")
+
+
+def hash64(value: str) -> int:
+    """字符串的 64 位哈希，用于去重集合，比保存原字符串省内存"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class PinHarvester:
+    """Harvest search results for a keyword into a deduplicated on-disk store
+
+    Output directory layout:
+        pins.jsonl or pins-00000.npz, ...  One row per unique pin, "user" and "image" are indexes
+        users.jsonl                         Interned pinners, one line per user, "idx" matches pin["user"]
+        images.jsonl                        Unique image URLs, "idx" matches pin["image"]
+        state.json                          Cursor and counters for resuming
+
+    Example:
+        >>> harvester = PinHarvester(client.pinterest, "cat", "/data/pins/cat", max_pins=100_000)
+        >>> result = await harvester.run()
+        >>> for pin in harvester.iter_pins():
+        ...     print(pin["title"], pin["image_url"])
+    """
+
+    def __init__(
+        self,
+        source: PinterestSource,
+        keyword: str,
+        output_dir: str,
+        page_size: int = 50,
+        sort: str = "relevance",
+        output_format: str = "jsonl",
+        chunk_size: int = 10_000,
+        max_pins: Optional[int] = None,
+        skip_duplicate_images: bool = False,
+        retries: int = 3,
+    ):
+        """
+        Args:
+            source: Pinterest data source
+            keyword: Search keyword
+            output_dir: Directory for the pin, user and image files
+            page_size: Pins requested per page
+            sort: relevance or recent
+            output_format: "jsonl" or "columnar" (.npz chunks of chunk_size rows)
+            chunk_size: Rows per columnar chunk
+            max_pins: Stop after this many unique pins
+            skip_duplicate_images: Drop pins whose image URL was already harvested (repins)
+            retries: Attempts per page before stopping; a later run resumes from the saved cursor
+        """
+        if output_format not in ("jsonl", "columnar"):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.source = source
+        self.keyword = keyword
+        self.output_dir = output_dir
+        self.page_size = page_size
+        self.sort = sort
+        self.output_format = output_format
+        self.chunk_size = chunk_size
+        self.max_pins = max_pins
+        self.skip_duplicate_images = skip_duplicate_images
+        self.retries = retries
+
+        self._pin_hashes: set = set()
+        self._image_index: Dict[int, int] = {}
+        # 已被保留下来的 pin（含未写出的缓冲）引用过的图片，重复图片按此判断
+        self._used_images: set = set()
+        self._user_index: Dict[str, int] = {}
+        self._buffer: Dict[str, List[Any]] = {name: [] for name in TEXT_COLUMNS + INT_COLUMNS}
+        self._state: Dict[str, Any] = {"cursor": None, "done": False, "pages": 0, "pins": 0, "duplicates": 0, "duplicate_images": 0, "chunks": 0}
+        os.makedirs(output_dir, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.output_dir, name)
+
+    def _load(self) -> None:
+        """从已有输出恢复去重集合和游标"""
+        state_path = self._path("state.json")
+        if not os.path.exists(state_path):
+            return
+        with open(state_path, "r", encoding="utf-8") as f:
+            self._state.update(json.load(f))
+        for user in self._iter_jsonl("users.jsonl"):
+            self._user_index[user["id"]] = user["idx"]
+        for image in self._iter_jsonl("images.jsonl"):
+            self._image_index[hash64(image["url"])] = image["idx"]
+        for pin in self._iter_stored(resolve=False):
+            self._pin_hashes.add(hash64(pin["id"]))
+            if pin["image"] >= 0:
+                self._used_images.add(pin["image"])
+        # 上次中断时未写入 state 的部分会从保存的游标处重新抓取，由去重集合过滤；
+        # images.jsonl 可能已有这些 pin 的图片，但只有已写出的 pin 引用的图片才算重复
+        self._state["pins"] = len(self._pin_hashes)
+        logger.info(f"Resuming harvest of '{self.keyword}' with {len(self._pin_hashes)} pins")
+
+    def _iter_jsonl(self, name: str):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _save_state(self) -> None:
+        tmp_path = self._path("state.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self._path("state.json"))
+
+    async def _fetch_page(self, cursor: Optional[str]) -> Dict[str, Any]:
+        error = ""
+        for attempt in range(self.retries):
+            try:
+                data = await self.source._request_pins(self.keyword, self.page_size, cursor, self.sort)
+                return {"success": True, "pins": data.get("data") or [], "cursor": data.get("nextPageCursor")}
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"Pin page request failed (attempt {attempt + 1}/{self.retries}): {error}")
+                await asyncio.sleep(2**attempt)
+        return {"success": False, "error": error}
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Page through the search results until they end or max_pins is reached
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"pins": 100000, "users": 31234, "images": 95000, "pages": 2100,
+            "duplicates": 1500, "duplicate_images": 5000, "done": True}}
+        """
+        if self._state["done"]:
+            return {"success": True, "data": self._summary()}
+
+        pending = asyncio.create_task(self._fetch_page(self._state["cursor"]))
+        error = None
+        try:
+            while True:
+                page = await pending
+                if not page["success"]:
+                    error = page["error"]
+                    break
+                cursor = page["cursor"]
+                finished = not cursor or not page["pins"]
+                # 先发出下一页请求，再处理当前页
+                if not finished:
+                    pending = asyncio.create_task(self._fetch_page(cursor))
+                self._add_page(page["pins"])
+                self._state["pages"] += 1
+                self._state["cursor"] = cursor
+                if self.max_pins is not None and self._state["pins"] >= self.max_pins:
+                    finished = True
+                if finished:
+                    self._state["done"] = not cursor or not page["pins"]
+                    break
+                if self.output_format == "jsonl" or not self._buffer["id"]:
+                    self._save_state()
+        finally:
+            if not pending.done():
+                pending.cancel()
+            self._flush(final=True)
+            self._save_state()
+
+        if error:
+            return {"success": False, "error": f"Stopped after {self._state['pages']} pages: {error}"}
+        return {"success": True, "data": self._summary()}
+
+    def _summary(self) -> Dict[str, Any]:
+        return {
+            "pins": self._state["pins"],
+            "users": len(self._user_index),
+            "images": len(self._image_index),
+            "pages": self._state["pages"],
+            "duplicates": self._state["duplicates"],
+            "duplicate_images": self._state["duplicate_images"],
+            "done": self._state["done"],
+        }
+
+    def _intern_user(self, pinner: Dict[str, Any], users_file) -> int:
+        user_id = str(pinner.get("id", ""))
+        idx = self._user_index.get(user_id)
+        if idx is None:
+            idx = self._user_index[user_id] = len(self._user_index)
+            user = {
+                "idx": idx,
+                "id": user_id,
+                "username": pinner.get("username", ""),
+                "full_name": pinner.get("full_name", ""),
+                "image_url": pinner.get("image_large_url", ""),
+                "follower_count": pinner.get("follower_count", 0),
+            }
+            users_file.write(json.dumps(user, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return idx
+
+    def _add_page(self, raw_pins: List[Any]) -> None:
+        rows = []
+        with open(self._path("users.jsonl"), "a", encoding="utf-8") as users_file, open(
+            self._path("images.jsonl"), "a", encoding="utf-8"
+        ) as images_file:
+            for pin_data in raw_pins:
+                if not isinstance(pin_data, dict) or not pin_data.get("id"):
+                    continue
+                if self.max_pins is not None and self._state["pins"] >= self.max_pins:
+                    break
+                pin_hash = hash64(str(pin_data["id"]))
+                if pin_hash in self._pin_hashes:
+                    self._state["duplicates"] += 1
+                    continue
+
+                image_url = self.source._pin_image_url(pin_data)
+                image = -1
+                if image_url:
+                    image_hash = hash64(image_url)
+                    image = self._image_index.get(image_hash, -1)
+                    if image in self._used_images:
+                        self._state["duplicate_images"] += 1
+                        if self.skip_duplicate_images:
+                            continue
+                    elif image < 0:
+                        image = self._image_index[image_hash] = len(self._image_index)
+                        images_file.write(json.dumps({"idx": image, "url": image_url}, ensure_ascii=False) + "\n")
+                    self._used_images.add(image)
+
+                self._pin_hashes.add(pin_hash)
+                self._state["pins"] += 1
+                video_list = (pin_data.get("videos") or {}).get("video_list") or {}
+                video = video_list.get("V_720P") or video_list.get("V_HLSV4") or {}
+                rows.append(
+                    {
+                        "id": str(pin_data["id"]),
+                        "title": pin_data.get("title") or "",
+                        "description": pin_data.get("description") or "",
+                        "alt_text": pin_data.get("alt_text") or pin_data.get("auto_alt_text") or "",
+                        "created_at": self.source._format_date(pin_data.get("created_at")) or "",
+                        "video_url": video.get("url", ""),
+                        "likes": int((pin_data.get("reaction_counts") or {}).get("1", 0) or 0),
+                        "user": self._intern_user(pin_data.get("pinner") or {}, users_file),
+                        "image": image,
+                    }
+                )
+
+        if self.output_format == "jsonl":
+            with open(self._path("pins.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in rows)
+        else:
+            for row in rows:
+                for name in self._buffer:
+                    self._buffer[name].append(row[name])
+            self._flush()
+
+    def _flush(self, final: bool = False) -> None:
+        """列式输出：缓冲满 chunk_size 行（或结束时）写出一个 .npz 分块"""
+        if self.output_format != "columnar":
+            return
+        while self._buffer["id"] and (final or len(self._buffer["id"]) >= self.chunk_size):
+            arrays: Dict[str, np.ndarray] = {}
+            for name in TEXT_COLUMNS:
+                packed = _pack_strings(self._buffer[name][: self.chunk_size])
+                arrays[f"{name}_data"], arrays[f"{name}_offsets"] = packed["data"], packed["offsets"]
+            for name in INT_COLUMNS:
+                arrays[name] = np.array(self._buffer[name][: self.chunk_size], dtype=np.int64)
+            chunk_path = self._path(f"pins-{self._state['chunks']:05d}.npz")
+            np.savez_compressed(chunk_path, **arrays)
+            self._state["chunks"] += 1
+            for name in self._buffer:
+                del self._buffer[name][: self.chunk_size]
+            # 分块写出后游标才算持久化
+            self._save_state()
+
+    def _iter_stored(self, resolve: bool = True):
+        if self.output_format == "jsonl":
+            rows = self._iter_jsonl("pins.jsonl")
+        else:
+            rows = self._iter_chunks()
+        if not resolve:
+            yield from rows
+            return
+        users = {user["idx"]: user for user in self._iter_jsonl("users.jsonl")}
+        images = {image["idx"]: image["url"] for image in self._iter_jsonl("images.jsonl")}
+        for row in rows:
+            row["pinner"] = users.get(row.pop("user"))
+            row["image_url"] = images.get(row.pop("image"), "")
+            yield row
+
+    def _iter_chunks(self):
+        for i in range(self._state["chunks"]):
+            path = self._path(f"pins-{i:05d}.npz")
+            if not os.path.exists(path):
+                continue
+            with np.load(path) as chunk:
+                columns = {name: _unpack_strings(chunk[f"{name}_data"], chunk[f"{name}_offsets"]) for name in TEXT_COLUMNS}
+                columns.update({name: chunk[name].tolist() for name in INT_COLUMNS})
+            for j in range(len(columns["id"])):
+                yield {name: values[j] for name, values in columns.items()}
+
+    def iter_pins(self):
+        """逐条读取已抓取的 pin，pinner 和 image_url 已从用户表、图片表还原"""
+        yield from self._iter_stored(resolve=True)
@@ -6,14 +6,17 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Hashable, List, Optional
 
 import aiohttp
 
 from .base import BaseAPI
+from .ttl_cache import TTLCache, cached_batch_lookup
 
 logger = logging.getLogger("pinterest_source")
 
+USER_TTL = 6 * 3600
+
 
 class PinterestSource(BaseAPI):
     """Pinterest data source"""
@@ -29,6 +32,7 @@ class PinterestSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
             }
+        self._user_cache = TTLCache(max_entries=20000)
 
     @property
     def source_name(self) -> str:
@@ -109,31 +113,7 @@ class PinterestSource(BaseAPI):
         #     ...     print(f"Search failed: {result['error']}")
         # """
         try:
-            # Build query parameters
-            params = {"keyword": keyword, "num": num, "sort": sort}
-
-            if nextPageCursor:
-                params["nextPageCursor"] = nextPageCursor
-
-            request_url = f"{self.proxy_url}/pinterest/pins/advance"
-
-            # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, json=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
-
-            # The API returns a JSON string, need to parse it first
-            if isinstance(data, str):
-                data = json.loads(data)
-
-            if not isinstance(data, dict):
-                raise ValueError(f"Invalid API response format: {data}")
-
-            if "data" not in data:
-                raise ValueError(f"API response missing data field: {data}")
-
+            data = await self._request_pins(keyword, num, nextPageCursor, sort)
             pins = self._parse_pins(data)
 
             return {"success": True, "data": {"keyword": keyword, "count": len(pins), "pins": pins, "cursor": data.get("nextPageCursor")}}
@@ -152,6 +132,35 @@ class PinterestSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def _request_pins(self, keyword: str, num: int, cursor: Optional[str], sort: str) -> Dict[str, Any]:
+        """请求一页搜索结果，返回未解析的响应（data 为原始 pin 列表，nextPageCursor 为下一页游标）"""
+        # Build query parameters
+        params = {"keyword": keyword, "num": num, "sort": sort}
+
+        if cursor:
+            params["nextPageCursor"] = cursor
+
+        request_url = f"{self.proxy_url}/pinterest/pins/advance"
+
+        # Send request using aiohttp
+        async with aiohttp.ClientSession(trust_env=True) as session:
+            async with session.post(request_url, headers=self._headers, json=params, timeout=self._timeout) as response:
+                response.raise_for_status()
+                # Parse the response
+                data = await response.json(content_type=None)
+
+        # The API returns a JSON string, need to parse it first
+        if isinstance(data, str):
+            data = json.loads(data)
+
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid API response format: {data}")
+
+        if "data" not in data:
+            raise ValueError(f"API response missing data field: {data}")
+
+        return data
+
     async def get_user_info(self, username: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get detailed information of a Pinterest user.
@@ -225,6 +234,60 @@ class PinterestSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def get_users_info(self, usernames: List[str], concurrency: int = 8) -> Dict[str, Any]:
+        """
+        Get information of many Pinterest users at once.
+
+        Duplicate usernames are looked up once, users fetched within the last 6 hours are served
+        from cache, and the rest are fetched concurrently.
+
+        Args:
+            usernames (List[str]): Pinterest usernames, not display names
+            concurrency (int): Maximum number of concurrent requests, default is 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing user info, e.g.
+            {
+                "success": True,
+                "data": {
+                    "count": 2, # Number of users found
+                    "users": [...], # One entry per input username, same fields as get_user_info; None if the lookup failed
+                    "failed": [{"username": "no_such_user", "error": "User not found"}], # Failed lookups
+                    "cached": 1, # Unique usernames served from cache
+                    "fetched": 2 # Unique usernames fetched from the API
+                }
+            }
+        """
+        try:
+            keys: List[Hashable] = [name.lower() for name in usernames]
+
+            async def fetch(username: str) -> Dict[str, Any]:
+                result = await self.get_user_info(username)
+                if result["success"] and not result["data"]:
+                    return {"success": False, "error": "User not found"}
+                return result
+
+            def aliases(user: Dict[str, Any]) -> List[Hashable]:
+                return [user["username"].lower()] if user.get("username") else []
+
+            lookup = await cached_batch_lookup(keys, fetch, self._user_cache, USER_TTL, concurrency, aliases)
+            users = lookup["results"]
+            return {
+                "success": True,
+                "data": {
+                    "count": sum(user is not None for user in users),
+                    "users": users,
+                    "failed": [{"username": username, "error": error} for username, error in lookup["errors"].items()],
+                    "cached": lookup["cached"],
+                    "fetched": lookup["fetched"],
+                },
+            }
+        except Exception as e:
+            error_msg = f"Error occurred while getting users info: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
     def _format_date(self, date_str: Optional[str]) -> Optional[str]:
         """Format date string"""
         if not date_str:
@@ -238,9 +301,6 @@ class PinterestSource(BaseAPI):
             return date_str
 
     def _parse_pins(self, data: dict[str, Any]) -> list[dict[str, Any]]:
-        print(f"xwy-pins, {data}")
-        print("-" * 100)
-        print("\n")
         pins = []
         for pin_data in data.get("data", []):
             if not isinstance(pin_data, dict):
@@ -269,9 +329,7 @@ class PinterestSource(BaseAPI):
                 if V_720P:
                     video["V_720P"] = V_720P
 
-            image_url = pin_data.get("images", {}).get("original", {}).get("url", "")
-            if len(image_url) <= 0:
-                image_url = pin_data.get("images", {}).get("orig", {}).get("url", "")
+            image_url = self._pin_image_url(pin_data)
 
             pin = {
                 "id": pin_data.get("id", ""),
@@ -281,7 +339,7 @@ class PinterestSource(BaseAPI):
                 "auto_alt_text": pin_data.get("auto_alt_text", ""),
                 "images": {"url": image_url},
                 "videos": video,
-                "created_at": "2024-03-21 08:29:49",  # 创建时间
+                "created_at": self._format_date(pin_data.get("created_at")),
                 "likes": pin_data.get("reaction_counts", {}).get("1", 0),
                 "pinner": {
                     "id": pin_data.get("pinner", {}).get("id", ""),
@@ -294,11 +352,15 @@ class PinterestSource(BaseAPI):
             pins.append(pin)
         return pins
 
+    def _pin_image_url(self, pin_data: dict[str, Any]) -> str:
+        """原图地址，优先 original，其次 orig"""
+        image_url = pin_data.get("images", {}).get("original", {}).get("url", "")
+        if len(image_url) <= 0:
+            image_url = pin_data.get("images", {}).get("orig", {}).get("url", "")
+        return image_url
+
     def _parse_user_info(self, resp: dict[str, Any]) -> dict[str, Any]:
         data = resp.get("data", [])
-        print(f"xwy-user, {data}")
-        print("-" * 100)
-        print("\n")
         if len(data) <= 0:
             return {}
 
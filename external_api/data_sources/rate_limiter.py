@@ -0,0 +1,49 @@
+"""
+Async token-bucket rate limiter shared by bulk harvesters
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Token bucket limiting how many upstream requests start per second
+
+    Example:
+        >>> limiter = AsyncRateLimiter(rate=5, burst=10)
+        >>> async with limiter:
+        ...     await source.search_tweets(...)
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum number of requests that may start back to back, defaults to max(1, rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
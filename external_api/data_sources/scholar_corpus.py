@@ -0,0 +1,252 @@
+"""
+学术文献语料库
+
+Overlapping scholar queries return the same papers many times. ScholarCorpus
+runs a query set concurrently through ScholarSource.stream_scholar, merges
+duplicates by normalized title hash and link, and persists the corpus as a
+compact columnar .npz file together with an inverted index for local keyword
+search and top-K by citations.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .scholar_source import ScholarSource
+
+logger = logging.getLogger("scholar_corpus")
+
+TEXT_COLUMNS = ["title", "link", "snippet", "publicationInfo", "pdfUrl", "queries"]
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    """标题规范化：小写，去掉标点并合并空白"""
+    return re.sub(r"[\W_]+", " ", title).strip().lower()
+
+
+def title_hash(title: str) -> str:
+    return hashlib.sha1(normalize_title(title).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_int(value: Any) -> int:
+    """从 "Cited by 123"、"2021" 或数字中取出整数，无法解析时返回 0"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = re.search(r"\d+", value.replace(",", ""))
+        if match:
+            return int(match.group())
+    return 0
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _pack_strings(values: List[str]) -> Dict[str, np.ndarray]:
+    """把字符串列编码为 UTF-8 字节块加偏移数组，避免 object 数组和 pickle"""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"data": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    blob = data.tobytes()
+    return [blob[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class ScholarCorpus:
+    """Deduplicated paper corpus with a keyword inverted index
+
+    Example:
+        >>> corpus = await ScholarCorpus.build(client.scholar, ["lisdexamfetamine", "Vyvanse", "methylphenidate"], num_results=200)
+        >>> corpus.save("adhd_corpus.npz")
+        >>> corpus.search("lisdexamfetamine efficacy", top_k=10)
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {name: [] for name in TEXT_COLUMNS}
+        self.columns["year"] = []
+        self.columns["citedBy"] = []
+        self._by_title: Dict[str, int] = {}
+        self._by_link: Dict[str, int] = {}
+        self._index: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.columns["title"])
+
+    @classmethod
+    async def build(
+        cls,
+        source: ScholarSource,
+        queries: Iterable[str],
+        num_results: int = 100,
+        start_year: Optional[str] = None,
+        end_year: Optional[str] = None,
+        concurrency: int = 4,
+        corpus: Optional["ScholarCorpus"] = None,
+    ) -> "ScholarCorpus":
+        """
+        Run every query concurrently and merge the results into one corpus
+
+        Args:
+            source: Scholar data source
+            queries: Search keywords, one search per entry
+            num_results: Results requested per query, max is 500
+            start_year: Start year, YYYY
+            end_year: End year, YYYY
+            concurrency: Number of queries searched at the same time
+            corpus: Existing corpus to extend, a new one is created when omitted
+
+        Returns:
+            ScholarCorpus: The merged corpus
+        """
+        corpus = corpus if corpus is not None else cls()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_query(query: str) -> None:
+            async with semaphore:
+                try:
+                    async for papers in source.stream_scholar(query, num_results, start_year, end_year):
+                        corpus.add(papers, query)
+                except Exception as e:
+                    logger.error(f"Corpus query failed: query={query}, error={e}")
+
+        await asyncio.gather(*(run_query(q) for q in dict.fromkeys(queries)))
+        return corpus
+
+    def add(self, papers: List[Dict[str, Any]], query: str = "") -> int:
+        """合并一批论文，返回新增数量"""
+        added = 0
+        for paper in papers:
+            title = paper.get("title") or ""
+            link = paper.get("link") or ""
+            key = title_hash(title) if normalize_title(title) else None
+            idx = self._by_link.get(link) if link else None
+            if idx is None and key is not None:
+                idx = self._by_title.get(key)
+
+            if idx is None:
+                idx = len(self)
+                for name in TEXT_COLUMNS:
+                    self.columns[name].append("")
+                self.columns["year"].append(0)
+                self.columns["citedBy"].append(0)
+                added += 1
+            self._merge(idx, paper, query)
+            if link:
+                self._by_link.setdefault(link, idx)
+            if key is not None:
+                self._by_title.setdefault(key, idx)
+        if papers:
+            self._index = None
+        return added
+
+    def _merge(self, idx: int, paper: Dict[str, Any], query: str) -> None:
+        cols = self.columns
+        for name in ("title", "link", "snippet", "publicationInfo", "pdfUrl"):
+            if not cols[name][idx] and paper.get(name):
+                cols[name][idx] = paper[name]
+        # 被引数取最大值，年份取最早的有效值
+        cols["citedBy"][idx] = max(cols["citedBy"][idx], parse_int(paper.get("citedBy")))
+        year = parse_int(paper.get("year"))
+        if year and (not cols["year"][idx] or year < cols["year"][idx]):
+            cols["year"][idx] = year
+        if query:
+            queries = cols["queries"][idx].split("\n") if cols["queries"][idx] else []
+            if query not in queries:
+                queries.append(query)
+                cols["queries"][idx] = "\n".join(queries)
+
+    def get(self, idx: int) -> Dict[str, Any]:
+        paper = {name: self.columns[name][idx] for name in ("title", "link", "snippet", "publicationInfo", "pdfUrl")}
+        paper["year"] = self.columns["year"][idx] or None
+        paper["citedBy"] = self.columns["citedBy"][idx]
+        paper["queries"] = self.columns["queries"][idx].split("\n") if self.columns["queries"][idx] else []
+        return paper
+
+    def top_cited(self, top_k: int = 10, candidates: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """按被引数返回前 top_k 篇，可限定候选文档"""
+        cited = np.asarray(self.columns["citedBy"], dtype=np.int64)
+        ids = np.arange(len(cited)) if candidates is None else np.asarray(candidates, dtype=np.int64)
+        if ids.size == 0 or top_k <= 0:
+            return []
+        if ids.size > top_k:
+            ids = ids[np.argpartition(-cited[ids], top_k - 1)[:top_k]]
+        ids = ids[np.argsort(-cited[ids], kind="stable")]
+        return [self.get(int(i)) for i in ids]
+
+    def search(self, keywords: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """返回同时包含全部关键词（标题或摘要）的论文，按被引数排序"""
+        tokens = tokenize(keywords)
+        if not tokens:
+            return self.top_cited(top_k)
+        index = self._get_index()
+        matched: Optional[np.ndarray] = None
+        for token in sorted(set(tokens), key=lambda t: len(index.get(t, ()))):
+            postings = index.get(token)
+            if postings is None:
+                return []
+            matched = postings if matched is None else np.intersect1d(matched, postings, assume_unique=True)
+            if matched.size == 0:
+                return []
+        return self.top_cited(top_k, matched)
+
+    def _get_index(self) -> Dict[str, np.ndarray]:
+        if self._index is None:
+            postings: Dict[str, List[int]] = {}
+            for idx, (title, snippet) in enumerate(zip(self.columns["title"], self.columns["snippet"])):
+                for token in set(tokenize(f"{title} {snippet}")):
+                    postings.setdefault(token, []).append(idx)
+            self._index = {token: np.asarray(ids, dtype=np.int32) for token, ids in postings.items()}
+        return self._index
+
+    def save(self, path: str) -> None:
+        """保存为压缩的列式 .npz 文件，包含倒排索引"""
+        arrays: Dict[str, np.ndarray] = {
+            "year": np.asarray(self.columns["year"], dtype=np.int16),
+            "citedBy": np.asarray(self.columns["citedBy"], dtype=np.int32),
+        }
+        for name in TEXT_COLUMNS:
+            packed = _pack_strings(self.columns[name])
+            arrays[f"{name}.data"] = packed["data"]
+            arrays[f"{name}.offsets"] = packed["offsets"]
+
+        index = self._get_index()
+        vocabulary = sorted(index)
+        packed = _pack_strings(vocabulary)
+        arrays["vocab.data"] = packed["data"]
+        arrays["vocab.offsets"] = packed["offsets"]
+        posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum([len(index[t]) for t in vocabulary], out=posting_offsets[1:])
+        arrays["postings.offsets"] = posting_offsets
+        arrays["postings.data"] = np.concatenate([index[t] for t in vocabulary]) if vocabulary else np.zeros(0, dtype=np.int32)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ScholarCorpus":
+        corpus = cls()
+        with np.load(path, allow_pickle=False) as arrays:
+            for name in TEXT_COLUMNS:
+                corpus.columns[name] = _unpack_strings(arrays[f"{name}.data"], arrays[f"{name}.offsets"])
+            corpus.columns["year"] = arrays["year"].astype(int).tolist()
+            corpus.columns["citedBy"] = arrays["citedBy"].astype(int).tolist()
+
+            vocabulary = _unpack_strings(arrays["vocab.data"], arrays["vocab.offsets"])
+            offsets = arrays["postings.offsets"]
+            data = arrays["postings.data"]
+            corpus._index = {token: data[offsets[i] : offsets[i + 1]] for i, token in enumerate(vocabulary)}
+
+        for idx, (title, link) in enumerate(zip(corpus.columns["title"], corpus.columns["link"])):
+            if link:
+                corpus._by_link.setdefault(link, idx)
+            if normalize_title(title):
+                corpus._by_title.setdefault(title_hash(title), idx)
+        return corpus
@@ -4,12 +4,13 @@
 
 import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import aiohttp
 
 from .base import BaseAPI
+from .paging import iter_deduplicated_pages
 
 logger = logging.getLogger("scholar_source")
 
@@ -163,61 +164,73 @@ class ScholarSource(BaseAPI):
         #     ...     print(f"Search succeeded, {len(result['data']['papers'])} results returned")
         # """
         try:
-            # 限制最大结果数
-            if num_results > 500:
-                num_results = 500
-
-            # 计算分页
-            MAX_PAGE_SIZE = 20  # 最大每页数量,api有限制
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_scholar_page(
-                        query=query,
-                        page_size=current_page_size,
-                        page=page,
-                        start_year=start_year,
-                        end_year=end_year,
-                    )
-                )
-
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
-
-            # 合并结果
             all_papers = []
-            has_error = False
-            error_msgs = []
-            successful_pages = 0
-
-            for i, result in enumerate(results):
-                page_num = i + 1
-                if result["success"]:
-                    page_results = result["data"]
-                    all_papers.extend(page_results)
-                    successful_pages += 1
-                else:
-                    has_error = True
-                    error_msgs.append(f"Page {page_num}: {result['error']}")
-
-            # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
-                logger.warning(f"Some scholar pages failed: {', '.join(error_msgs)}")
-
-            # 限制返回数量
-            all_papers = all_papers[:num_results]
+            async for papers in self.stream_scholar(
+                query=query,
+                num_results=num_results,
+                start_year=start_year,
+                end_year=end_year,
+            ):
+                all_papers.extend(papers)
 
             return {"success": True, "data": {"papers": all_papers}}
         except Exception as e:
             logger.error(f"search_scholar error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def stream_scholar(
+        self,
+        query: str,
+        num_results: int = 10,
+        start_year: Optional[str] = None,
+        end_year: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Search for academic papers and yield each page of new results as soon as it arrives.
+
+        Pages are requested in small waves and paging stops early once a page comes back under-filled
+        or only repeats earlier results. Results are deduplicated by link (or title).
+
+        Args:
+            query(str): Search keywords.
+            num_results(int): Number of deduplicated results to return, default is 10, max is 500.
+            start_year(str): Start year, YYYY, default is None.
+            end_year(str): End year, YYYY, default is None.
+
+        Returns:
+            AsyncIterator[List[Dict[str, Any]]]: Batches of papers in the same format as search_scholar
+
+        Examples:
+            async for papers in client.scholar.stream_scholar(query="lisdexamfetamine", num_results=100):
+                print(len(papers))
+        """
+        # 限制最大结果数（去重后计数）
+        num_results = min(num_results, 500)
+
+        MAX_PAGE_SIZE = 20  # 最大每页数量,api有限制
+        page_size = min(num_results, MAX_PAGE_SIZE)
+
+        async def fetch_page(page: int, size: int) -> Dict[str, Any]:
+            return await self._fetch_scholar_page(
+                query=query,
+                page_size=size,
+                page=page,
+                start_year=start_year,
+                end_year=end_year,
+            )
+
+        error_msgs: List[str] = []
+        async for papers in iter_deduplicated_pages(fetch_page, num_results, page_size, key_func=self._paper_key, errors=error_msgs):
+            yield papers
+
+        # 如果有部分失败，记录错误但仍返回成功获取的数据
+        if error_msgs:
+            logger.warning(f"Some scholar pages failed: {', '.join(error_msgs)}")
+
+    def _paper_key(self, paper: Dict[str, Any]) -> Optional[str]:
+        """论文去重键：优先链接，其次规范化标题"""
+        if paper.get("link"):
+            return paper["link"]
+        if paper.get("title"):
+            return re.sub(r"\W+", " ", paper["title"]).strip().lower()
+        return None
@@ -0,0 +1,365 @@
+"""
+Incremental review harvester for TripAdvisorSource
+
+get_location_reviews returns one page of the newest reviews. The harvester
+pages through many locations concurrently and stops each location as soon as
+it reaches a review that is already stored (by id, or older than the newest
+review of the last complete sync), so a re-sync only fetches what was
+published since the last one. A sync cut short by an error or max_pages
+leaves a backfill offset, and the next sync resumes paging older reviews
+from there. Reviews are append-only; per-location rating and subrating sums are
+updated in the same transaction as the insert, so averages never need a scan
+over the full history.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .client import get_cache_dir
+from .tripadvisor_source import TripAdvisorSource
+
+logger = logging.getLogger("tripadvisor_reviews")
+
+
+def _published_ts(value: str) -> int:
+    """_parse_reviews 的发布时间（2025-04-22 21:05:13，UTC）转换为 epoch 秒，无法解析时为 0"""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%SZ"):
+        try:
+            return int(datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp())
+        except (TypeError, ValueError):
+            continue
+    return 0
+
+
+def _score(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReviewStore:
+    """Append-only review store with incrementally maintained rating aggregates"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "tripadvisor_reviews.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reviews (
+                location_id TEXT NOT NULL,
+                review_id TEXT NOT NULL,
+                published_at INTEGER NOT NULL,
+                lang TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (location_id, review_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_reviews_time ON reviews (location_id, published_at);
+            CREATE TABLE IF NOT EXISTS rating_stats (
+                location_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                localized_name TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                PRIMARY KEY (location_id, name)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                location_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                newest_published_at INTEGER NOT NULL,
+                synced_at REAL NOT NULL,
+                pending_newest INTEGER NOT NULL DEFAULT 0,
+                backfill_offset INTEGER,
+                PRIMARY KEY (location_id, language)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def known_ids(self, location_id: str, review_ids: Iterable[str]) -> set:
+        review_ids = [str(r) for r in review_ids]
+        if not review_ids:
+            return set()
+        placeholders = ",".join("?" * len(review_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT review_id FROM reviews WHERE location_id = ? AND review_id IN ({placeholders})", [str(location_id)] + review_ids
+            )
+            return {row[0] for row in rows}
+
+    def sync_state(self, location_id: str, language: str) -> Dict[str, Any]:
+        """
+        Sync progress of a location in a language
+
+        Returns:
+            Dict[str, Any]: {"watermark": 发布时间不早于它的评论都已存储（最近一次完整同步时最新评论的发布时间，从未完整同步过为 0）,
+            "pending_newest": 未完成同步中见到的最新发布时间, "backfill_offset": 未完成的回补从此偏移继续，无回补时为 None}
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_published_at, pending_newest, backfill_offset FROM sync_state WHERE location_id = ? AND language = ?",
+                (str(location_id), language),
+            ).fetchone()
+        if row is None:
+            return {"watermark": 0, "pending_newest": 0, "backfill_offset": None}
+        return {"watermark": row[0], "pending_newest": row[1], "backfill_offset": row[2]}
+
+    def save_sync_state(self, location_id: str, language: str, watermark: int, pending_newest: int, backfill_offset: Optional[int]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (location_id, language, newest_published_at, synced_at, pending_newest, backfill_offset) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (location_id, language) DO UPDATE SET "
+                "newest_published_at = excluded.newest_published_at, synced_at = excluded.synced_at, "
+                "pending_newest = excluded.pending_newest, backfill_offset = excluded.backfill_offset",
+                (str(location_id), language, watermark, time.time(), pending_newest, backfill_offset),
+            )
+            self._conn.commit()
+
+    def insert_reviews(self, location_id: str, reviews: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append reviews of one location and fold the new ones into its aggregates
+
+        Args:
+            location_id: Tripadvisor location ID
+            reviews: _parse_reviews output; reviews already stored are skipped
+
+        Returns:
+            int: Number of newly stored reviews
+        """
+        location_id = str(location_id)
+        rows: Dict[str, Tuple[Any, ...]] = {}
+        for review in reviews:
+            review_id = review.get("id")
+            if review_id not in (None, ""):
+                review_id = str(review_id)
+                rows.setdefault(review_id, (location_id, review_id, _published_ts(review.get("published_date", "")), review.get("lang", ""), review))
+
+        with self._lock:
+            placeholders = ",".join("?" * len(rows))
+            known = {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT review_id FROM reviews WHERE location_id = ? AND review_id IN ({placeholders})", [location_id] + list(rows)
+                )
+            } if rows else set()
+            fresh = [row for review_id, row in rows.items() if review_id not in known]
+
+            # 只把新评论累加进统计，已有统计不重算
+            stats: Dict[str, List[Any]] = {}
+            for *_, review in fresh:
+                rating = _score(review.get("rating"))
+                if rating is not None:
+                    stat = stats.setdefault("RATING", ["Overall", 0, 0.0])
+                    stat[1] += 1
+                    stat[2] += rating
+                for subrating in (review.get("subratings") or {}).values():
+                    value = _score(subrating.get("value"))
+                    if value is None or not subrating.get("name"):
+                        continue
+                    stat = stats.setdefault(subrating["name"], [subrating.get("localized_name", ""), 0, 0.0])
+                    stat[1] += 1
+                    stat[2] += value
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reviews (location_id, review_id, published_at, lang, payload) VALUES (?, ?, ?, ?, ?)",
+                [(*row[:4], json.dumps(row[4], ensure_ascii=False, separators=(",", ":"))) for row in fresh],
+            )
+            self._conn.executemany(
+                "INSERT INTO rating_stats (location_id, name, localized_name, count, total) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (location_id, name) DO UPDATE SET count = count + excluded.count, total = total + excluded.total",
+                [(location_id, name, localized, count, total) for name, (localized, count, total) in stats.items()],
+            )
+            self._conn.commit()
+            return len(fresh)
+
+    def get_reviews(
+        self,
+        location_id: str,
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Stored reviews of a location, newest first, optionally only those published at or after ``since`` (epoch seconds)"""
+        sql = "SELECT payload FROM reviews WHERE location_id = ? AND published_at >= ? ORDER BY published_at DESC, review_id DESC"
+        params: List[Any] = [str(location_id), since or 0]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def aggregates(self, location_id: str) -> Dict[str, Any]:
+        """
+        Rating aggregates of a location
+
+        Returns:
+            Dict[str, Any]: {"review_count": 120, "rating": 4.6, "subratings": {"RATE_VALUE": {"localized_name": "Value", "count": 80, "average": 4.4}, ...}}
+        """
+        with self._lock:
+            review_count = self._conn.execute("SELECT COUNT(*) FROM reviews WHERE location_id = ?", (str(location_id),)).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT name, localized_name, count, total FROM rating_stats WHERE location_id = ? ORDER BY name", (str(location_id),)
+            ).fetchall()
+        rating = None
+        subratings = {}
+        for name, localized_name, count, total in rows:
+            if name == "RATING":
+                rating = round(total / count, 3) if count else None
+                continue
+            subratings[name] = {"localized_name": localized_name, "count": count, "average": round(total / count, 3) if count else None}
+        return {"review_count": review_count, "rating": rating, "subratings": subratings}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ReviewHarvester:
+    """Pages get_location_reviews for many locations concurrently into a ReviewStore
+
+    Example:
+        >>> harvester = ReviewHarvester(client.tripadvisor, [13189438, 186338])
+        >>> await harvester.sync()
+        >>> harvester.store.aggregates("13189438")
+    """
+
+    def __init__(
+        self,
+        source: TripAdvisorSource,
+        location_ids: Iterable[Any],
+        store: Optional[ReviewStore] = None,
+        language: str = "en",
+        page_size: int = 10,
+        max_pages: int = 50,
+        concurrency: int = 5,
+    ):
+        self.source = source
+        self.location_ids = list(dict.fromkeys(str(location_id) for location_id in location_ids))
+        self.store = store or ReviewStore()
+        self.language = language
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+
+    async def _page(self, location_id: str, offset: int, pages_left: int, watermark: int, stop_at_known: bool) -> Dict[str, Any]:
+        """
+        从 offset 开始翻页，遇到发布时间早于 watermark 的评论（stop_at_known 时还有已存储的评论）或列表末尾即完成
+
+        Returns:
+            Dict[str, Any]: {"reviews": 新评论, "pages": 页数, "offset": 下一页偏移, "complete": 是否完成, "error": 翻页出错时的错误}
+        """
+        collected: List[Dict[str, Any]] = []
+        pages = 0
+        while pages < pages_left:
+            result = await self.source.get_location_reviews(location_id, language=self.language, limit=self.page_size, offset=offset)
+            if not result["success"]:
+                return {"reviews": collected, "pages": pages, "offset": offset, "complete": False, "error": result["error"]}
+            reviews = result["data"]
+            pages += 1
+            if not reviews:
+                return {"reviews": collected, "pages": pages, "offset": offset, "complete": True}
+
+            known = self.store.known_ids(location_id, (review.get("id") for review in reviews))
+            for review in reviews:
+                if _published_ts(review.get("published_date", "")) < watermark or (stop_at_known and str(review.get("id")) in known):
+                    return {"reviews": collected, "pages": pages, "offset": offset, "complete": True}
+                if str(review.get("id")) not in known:
+                    collected.append(review)
+            offset += len(reviews)
+        return {"reviews": collected, "pages": pages, "offset": offset, "complete": False}
+
+    async def _sync_location(self, location_id: str) -> Dict[str, Any]:
+        """
+        同步一个地点：先取新评论直到已存储的评论，再继续上次未完成的回补
+
+        水位线只在翻到已知评论或列表末尾后才前移；中途出错或达到 max_pages 时记下回补偏移，
+        下次同步先取新评论，再从该偏移继续向旧评论翻页，直到水位线或列表末尾。
+
+        Returns:
+            Dict[str, Any]: {"pages": 页数, "new_reviews": 新评论数, "complete": 是否完整同步, "error": 翻页出错时的错误}
+        """
+        state = self.store.sync_state(location_id, self.language)
+        watermark, backfill_offset = state["watermark"], state["backfill_offset"]
+
+        front = await self._page(location_id, 0, self.max_pages, watermark, stop_at_known=True)
+        if front["pages"] == 0 and front.get("error"):
+            raise RuntimeError(front["error"])
+        pages = front["pages"]
+        new_reviews = self.store.insert_reviews(location_id, front["reviews"])
+        newest = max([state["pending_newest"]] + [_published_ts(review.get("published_date", "")) for review in front["reviews"]])
+        last = front
+
+        if front["complete"] and backfill_offset is not None:
+            # 新评论插在列表前面，旧偏移随之后移；多退一页，重叠部分按已知 id 跳过
+            start = max(0, backfill_offset + len(front["reviews"]) - self.page_size)
+            last = await self._page(location_id, start, self.max_pages - pages, watermark, stop_at_known=False)
+            pages += last["pages"]
+            new_reviews += self.store.insert_reviews(location_id, last["reviews"])
+            newest = max([newest] + [_published_ts(review.get("published_date", "")) for review in last["reviews"]])
+        elif not front["complete"]:
+            backfill_offset = None
+
+        if last["complete"]:
+            self.store.save_sync_state(location_id, self.language, max(watermark, newest), 0, None)
+        else:
+            # 回补前先把本次的新评论算进 pending，水位线不动
+            self.store.save_sync_state(location_id, self.language, watermark, newest, last["offset"])
+        result = {"pages": pages, "new_reviews": new_reviews, "complete": last["complete"]}
+        if last.get("error"):
+            result["error"] = last["error"]
+            logger.warning(f"Stopped paging reviews of {location_id} at offset {last['offset']}: {last['error']}")
+        return result
+
+    async def sync(self) -> Dict[str, Any]:
+        """
+        Fetch reviews published since the last sync for every location
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"locations": 20, "pages": 31, "new_reviews": 57,
+            "failed_locations": [{"location_id": "...", "error": "..."}], "incomplete_locations": ["..."]}}
+            A location whose paging failed part way keeps the reviews fetched so far and is listed in failed_locations;
+            one that hit max_pages is listed in incomplete_locations. Both continue from where they stopped on the next sync.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(location_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._sync_location(location_id)
+
+        results = await asyncio.gather(*(run(location_id) for location_id in self.location_ids), return_exceptions=True)
+
+        pages = new_reviews = 0
+        failed_locations = []
+        incomplete_locations = []
+        for location_id, result in zip(self.location_ids, results):
+            if isinstance(result, Exception):
+                failed_locations.append({"location_id": location_id, "error": str(result)})
+                continue
+            pages += result["pages"]
+            new_reviews += result["new_reviews"]
+            if "error" in result:
+                failed_locations.append({"location_id": location_id, "error": result["error"]})
+            elif not result["complete"]:
+                incomplete_locations.append(location_id)
+
+        return {
+            "success": True,
+            "data": {
+                "locations": len(self.location_ids),
+                "pages": pages,
+                "new_reviews": new_reviews,
+                "failed_locations": failed_locations,
+                "incomplete_locations": incomplete_locations,
+            },
+        }
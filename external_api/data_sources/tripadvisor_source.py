@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional
 import httpx
 
 from .base import BaseAPI
+from .geo_cache import NearbyLocationCache, location_distance_km
 
 logger = logging.getLogger("tripadvisor_official_source")
 
@@ -27,7 +28,9 @@ class TripAdvisorSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
         }
-
+        # 附近搜索按搜索点缓存
+        self._nearby_cache = NearbyLocationCache()
+        self._nearby_page_size = 10
 
     async def _make_api_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a request to the Tripadvisor Content API"""
@@ -155,28 +158,95 @@ class TripAdvisorSource(BaseAPI):
                 ]
             }
         """
-        params = {
-            "latLong": f"{latitude},{longitude}",
-            "language": language,
-        }
-
-        if category:
-            params["category"] = category
+        # 同一搜索点已搜索过时直接返回缓存的上游结果
+        cached = self._nearby_cache.lookup(latitude, longitude, 0.0, language, category)
+        if cached and cached["locations"]:
+            return {"success": True, "data": cached["locations"]}
 
         try:
-            data = await self._make_api_request("location/nearby_search", params)
-            if not data:
+            locations = (await self._fetch_nearby_locations(latitude, longitude, language, category))["locations"]
+            if not locations:
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
-            if not data.get("data", None):
-                return {"success": False, "error": "No data returned from Tripadvisor API"}
-
-            return {"success": True, "data": data.get("data", [])}
+            return {"success": True, "data": locations}
 
         except Exception as e:
             logger.error(f"Error searching nearby locations: {e}")
             return {"success": False, "error": str(e)}
 
+    async def search_locations_within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 2.0,
+        language: str = "en",
+        category: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search for locations within a radius of a latitude/longitude.
+        Answered from an earlier search from the same point when that search reached the whole radius,
+        otherwise one upstream nearby search is made. Tripadvisor returns at most the 10 nearest
+        locations per search, so a dense area may yield only the nearest part of the radius.
+
+        Args:
+            latitude(float): Latitude coordinate
+            longitude(float): Longitude coordinate
+            radius_km(float): Search radius in kilometers (default: 2.0)
+            language(str): Language code (default: 'en')
+            category(str): Optional category filter ('hotels', 'attractions', 'restaurants')
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the search results, nearest first
+            {
+                "success": True,               # Whether successful
+                "data": [                      # If successful, contains the following fields
+                    {
+                        "location_id": "13189438", # Location ID
+                        "name": "Hotel Xcaret Mexico", # Location name
+                        "distance": "0.512345", # Distance from the given point in miles
+                        "bearing": "northeast", # Bearing from the given point
+                        "address_obj": {...} # Location address
+                    },
+                    ...
+                ]
+            }
+        """
+        if radius_km <= 0:
+            return {"success": False, "error": "radius_km must be greater than 0"}
+
+        try:
+            search = self._nearby_cache.lookup(latitude, longitude, radius_km, language, category)
+            if search is None:
+                search = await self._fetch_nearby_locations(latitude, longitude, language, category)
+                if search["reach_km"] < radius_km and len(search["locations"]) >= self._nearby_page_size:
+                    logger.warning(f"Nearby search reached {search['reach_km']:.2f} km of {radius_km} km, only the nearest locations are returned")
+
+            within = []
+            for location in search["locations"]:
+                distance = location_distance_km(location)
+                if distance is not None and distance <= radius_km:
+                    within.append((distance, location))
+            within.sort(key=lambda item: item[0])
+            return {"success": True, "data": [location for _, location in within]}
+
+        except Exception as e:
+            logger.error(f"Error searching locations within radius: {e}")
+            return {"success": False, "error": str(e)}
+
+    async def _fetch_nearby_locations(self, latitude: float, longitude: float, language: str, category: Optional[str]) -> Dict[str, Any]:
+        """Run one upstream nearby search and record it in the cache"""
+        params = {
+            "latLong": f"{latitude},{longitude}",
+            "language": language,
+        }
+
+        if category:
+            params["category"] = category
+
+        data = await self._make_api_request("location/nearby_search", params)
+        locations = (data or {}).get("data") or []
+        return self._nearby_cache.add(latitude, longitude, locations, language, category)
+
     async def get_location_details(
         self,
         locationId: int,
@@ -290,6 +360,8 @@ class TripAdvisorSource(BaseAPI):
         self,
         locationId: int,
         language: str = "en",
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Get the most recent reviews for a specific location.
@@ -297,6 +369,8 @@ class TripAdvisorSource(BaseAPI):
         Args:
             locationId(int): Tripadvisor location ID (can be string or integer)
             language(str): Language code (default: 'en')
+            limit(int): Optional number of reviews to return
+            offset(int): Optional index of the first review to return, for paging through older reviews
 
         Returns:
             Dict[str, Any]: Dictionary containing review info, e.g.
@@ -304,6 +378,7 @@ class TripAdvisorSource(BaseAPI):
                 "success": True,               # Whether successful
                 "data": [                      # If successful, contains the following fields
                     {
+                        "id": 1003456789, # Review id
                         "lang": "en", # Language code
                         "location_id": 13189438, # Location id
                         "published_date": "2025-04-22T21:05:13Z", # Review publish date
@@ -343,6 +418,10 @@ class TripAdvisorSource(BaseAPI):
         params = {
             "language": language,
         }
+        if limit is not None:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
 
         # Convert locationId to string to ensure compatibility
         location_id_str = str(locationId)
@@ -425,6 +504,7 @@ class TripAdvisorSource(BaseAPI):
                 }
 
             review = {
+                "id": review_data.get("id", ""),  # 评论 id
                 "lang": review_data.get("lang", "en"),  # 语言 code
                 "location_id": review_data.get("location_id", ""),  # 地点 id
                 "published_date": self._parse_date(review_data.get("published_date", "")),  # 评论发布时间
@@ -0,0 +1,115 @@
+"""
+Small in-memory cache whose entries expire after a per-entry TTL
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+
+class TTLCache:
+    """LRU-bounded cache where every entry carries its own expiry
+
+    Example:
+        >>> cache = TTLCache(max_entries=10_000)
+        >>> cache.set(("info", "AAPL"), data, ttl=900)
+        >>> cache.get(("info", "AAPL"))
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """返回未过期的值，过期或不存在时返回 default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def cached_batch_lookup(
+    keys: Sequence[Hashable],
+    fetch: Callable[[Any], Awaitable[Dict[str, Any]]],
+    cache: TTLCache,
+    ttl: float,
+    concurrency: int = 8,
+    aliases: Optional[Callable[[Any], Iterable[Hashable]]] = None,
+) -> Dict[str, Any]:
+    """
+    批量查询：输入去重，命中缓存的直接返回，其余并发请求，结果按输入顺序排列
+
+    Args:
+        keys: 查询键，缓存键与之相同
+        fetch: 单个查询，返回 {"success": True, "data": ...} 或 {"success": False, "error": ...}
+        cache: 结果缓存
+        ttl: 成功结果的缓存时长（秒），失败不缓存
+        concurrency: 最大并发请求数
+        aliases: 从结果中取出其他缓存键（如 user id），之后用这些键查询也能命中
+
+    Returns:
+        Dict[str, Any]: {"results": [每个输入的 data，失败为 None], "errors": {键: 错误}, "cached": 命中缓存数, "fetched": 请求数}
+    """
+    unique = list(dict.fromkeys(keys))
+    found: Dict[Hashable, Any] = {}
+    misses = []
+    for key in unique:
+        value = cache.get(key)
+        if value is None:
+            misses.append(key)
+        else:
+            found[key] = value
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key: Hashable) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch(key)
+
+    results = await asyncio.gather(*(run(key) for key in misses))
+    errors: Dict[Hashable, str] = {}
+    for key, result in zip(misses, results):
+        if not result["success"]:
+            errors[key] = result["error"]
+            continue
+        found[key] = result["data"]
+        cache.set(key, result["data"], ttl)
+        for alias in aliases(result["data"]) if aliases else ():
+            cache.set(alias, result["data"], ttl)
+
+    return {
+        "results": [found.get(key) for key in keys],
+        "errors": errors,
+        "cached": len(unique) - len(misses),
+        "fetched": len(misses),
+    }
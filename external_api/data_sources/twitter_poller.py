@@ -0,0 +1,375 @@
+"""
+Incremental timeline polling for TwitterSource
+
+Keeps a per-user high-water mark (every tweet at or below it is stored) and
+only pages through get_user_tweets until already-seen tweets show up. A poll
+cut short by an error or the page budget keeps the old mark and saves a
+resume cursor, and the next poll backfills the gap from there. Users are
+scheduled by their observed posting frequency, and new tweets are written to
+a deduplicated SQLite store.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .client import get_cache_dir
+from .twitter_source import TwitterSource
+
+logger = logging.getLogger("twitter_poller")
+
+
+class TweetStore:
+    """Deduplicated local tweet store with per-user watermarks
+
+    Tweets are keyed by their numeric id (rowid alias), so re-inserting a
+    tweet is a no-op and the table stays compact.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "twitter_tweets.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tweets (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                created_at TEXT,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tweets_username ON tweets (username, id);
+            CREATE TABLE IF NOT EXISTS watermarks (
+                username TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                last_created_at TEXT,
+                rate REAL NOT NULL DEFAULT 0,
+                last_polled REAL NOT NULL DEFAULT 0,
+                next_due REAL NOT NULL DEFAULT 0,
+                pending_id INTEGER NOT NULL DEFAULT 0,
+                pending_created_at TEXT,
+                resume_cursor TEXT
+            );
+            """
+        )
+        self._conn.commit()
+
+    def insert_tweets(self, username: str, tweets: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert tweets, skipping ids already stored
+
+        Returns:
+            int: Number of newly inserted tweets
+        """
+        rows = [
+            (int(tweet["id"]), username, tweet.get("created_at"), json.dumps(tweet, ensure_ascii=False, separators=(",", ":")))
+            for tweet in tweets
+            if str(tweet.get("id", "")).isdigit()
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO tweets (id, username, created_at, payload) VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def get_tweets(self, username: str, since_id: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Stored tweets of a user newer than since_id, newest first"""
+        sql = "SELECT payload FROM tweets WHERE username = ? AND id > ? ORDER BY id DESC"
+        params: Tuple[Any, ...] = (username, since_id)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_watermark(self, username: str) -> Dict[str, Any]:
+        """
+        Polling state of a user
+
+        Returns:
+            Dict[str, Any]: last_id 及以下的推文都已存储；resume_cursor 不为空时，上次轮询在 last_id 之前中断，
+            pending_id 是那次见到的最新推文，比它新的推文还未抓取，下次先从 resume_cursor 回补到 last_id
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_id, last_created_at, rate, last_polled, next_due, pending_id, pending_created_at, resume_cursor "
+                "FROM watermarks WHERE username = ?",
+                (username,),
+            ).fetchone()
+        if row is None:
+            return {
+                "last_id": 0,
+                "last_created_at": None,
+                "rate": 0.0,
+                "last_polled": 0.0,
+                "next_due": 0.0,
+                "pending_id": 0,
+                "pending_created_at": None,
+                "resume_cursor": None,
+            }
+        keys = ("last_id", "last_created_at", "rate", "last_polled", "next_due", "pending_id", "pending_created_at", "resume_cursor")
+        return dict(zip(keys, row))
+
+    def set_watermark(
+        self,
+        username: str,
+        last_id: int,
+        last_created_at: Optional[str],
+        rate: float,
+        last_polled: float,
+        next_due: float,
+        pending_id: int = 0,
+        pending_created_at: Optional[str] = None,
+        resume_cursor: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO watermarks (username, last_id, last_created_at, rate, last_polled, next_due, pending_id, pending_created_at, resume_cursor)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    last_created_at = excluded.last_created_at,
+                    rate = excluded.rate,
+                    last_polled = excluded.last_polled,
+                    next_due = excluded.next_due,
+                    pending_id = excluded.pending_id,
+                    pending_created_at = excluded.pending_created_at,
+                    resume_cursor = excluded.resume_cursor
+                """,
+                (username, last_id, last_created_at, rate, last_polled, next_due, pending_id, pending_created_at, resume_cursor),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TwitterTimelinePoller:
+    """Incremental polling engine over TwitterSource.get_user_tweets
+
+    Each poll pages through a user's timeline only until it reaches a tweet at
+    or below the stored watermark. The interval until the next poll of a user
+    is derived from an exponentially weighted estimate of their posting rate,
+    so that roughly ``target_new_per_poll`` new tweets are expected per poll.
+
+    Example:
+        >>> poller = TwitterTimelinePoller(client.twitter, ["elonmusk", "nasa"])
+        >>> result = await poller.poll_due()
+        >>> print(result["data"]["new_tweets"])
+    """
+
+    def __init__(
+        self,
+        source: TwitterSource,
+        usernames: Iterable[str],
+        store: Optional[TweetStore] = None,
+        page_size: int = 100,
+        max_pages: int = 10,
+        initial_pages: int = 1,
+        include_replies: bool = False,
+        concurrency: int = 10,
+        min_interval: float = 300,
+        max_interval: float = 6 * 3600,
+        target_new_per_poll: float = 20,
+        rate_smoothing: float = 0.3,
+    ):
+        self.source = source
+        self.store = store or TweetStore()
+        self.page_size = min(page_size, 100)
+        self.max_pages = max_pages
+        self.initial_pages = initial_pages
+        self.include_replies = include_replies
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_per_poll = target_new_per_poll
+        self.rate_smoothing = rate_smoothing
+        self._schedule: List[Tuple[float, str]] = []
+        self._usernames: set = set()
+        for username in usernames:
+            self.add_user(username)
+
+    def add_user(self, username: str) -> None:
+        """Add a user to the schedule, due at its stored next_due time"""
+        if username in self._usernames:
+            return
+        self._usernames.add(username)
+        heapq.heappush(self._schedule, (self.store.get_watermark(username)["next_due"], username))
+
+    def next_due_at(self) -> Optional[float]:
+        """Timestamp at which the next user becomes due, None if no users"""
+        return self._schedule[0][0] if self._schedule else None
+
+    async def poll_due(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Poll every user whose next poll time has passed
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"polled": 3, "new_tweets": 12, "failed_users": [...]}}
+        """
+        now = time.time() if now is None else now
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            due.append(heapq.heappop(self._schedule)[1])
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(username: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.poll_user(username)
+
+        # 单个用户抛出异常不影响其他用户，所有取出的用户都会重新排期
+        results = await asyncio.gather(*(run(username) for username in due), return_exceptions=True)
+
+        failed_users = []
+        new_tweets = 0
+        for username, result in zip(due, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Timeline poll for {username} raised: {result}")
+                result = {"success": False, "error": str(result)}
+            if result["success"]:
+                new_tweets += result["data"]["new_tweets"]
+                next_due = result["data"]["next_due"]
+            else:
+                failed_users.append({"username": username, "error": result["error"]})
+                next_due = time.time() + self.min_interval
+            heapq.heappush(self._schedule, (next_due, username))
+
+        return {"success": True, "data": {"polled": len(due), "new_tweets": new_tweets, "failed_users": failed_users}}
+
+    async def run_forever(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Keep polling users as they become due until stop_event is set"""
+        stop_event = stop_event or asyncio.Event()
+        while not stop_event.is_set():
+            result = await self.poll_due()
+            if result["data"]["failed_users"]:
+                logger.warning(f"Timeline poll failed for {len(result['data']['failed_users'])} users")
+            next_due = self.next_due_at()
+            delay = self.min_interval if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll_user(self, username: str) -> Dict[str, Any]:
+        """
+        Fetch tweets newer than the user's watermark and store them
+
+        The watermark only advances once paging has reached it (or the timeline ended).
+        Otherwise the poll saves a resume cursor, and the next poll backfills the rest
+        of the gap before fetching the newest pages.
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"username": "...", "new_tweets": 5, "pages": 1, "next_due": 1700000000.0}}
+        """
+        watermark = self.store.get_watermark(username)
+        last_id = watermark["last_id"]
+        pending_id, pending_created_at, resume_cursor = watermark["pending_id"], watermark["pending_created_at"], watermark["resume_cursor"]
+        first_poll = not last_id and not resume_cursor
+        budget = self.initial_pages if first_poll else self.max_pages
+
+        fresh: List[Dict[str, Any]] = []
+        pages = 0
+        if resume_cursor:
+            # 先把上次中断的缺口补完，否则发帖快于页数预算时缺口永远补不上
+            tail = await self._page_timeline(username, resume_cursor, last_id, budget)
+            if tail["pages"] == 0:
+                return {"success": False, "error": tail["error"]}
+            fresh, pages = tail["tweets"], tail["pages"]
+            if tail["complete"]:
+                last_id, watermark["last_created_at"] = pending_id, pending_created_at
+                pending_id, pending_created_at, resume_cursor = 0, None, None
+            else:
+                resume_cursor = tail["cursor"]
+
+        if not resume_cursor and pages < budget:
+            head = await self._page_timeline(username, None, last_id, budget - pages)
+            if head["pages"] == 0 and pages == 0:
+                return {"success": False, "error": head["error"]}
+            fresh += head["tweets"]
+            pages += head["pages"]
+            newest = max(head["tweets"], key=lambda t: int(t["id"]), default=None)
+            if head["complete"] or first_poll:
+                if newest and int(newest["id"]) > last_id:
+                    last_id, watermark["last_created_at"] = int(newest["id"]), newest.get("created_at")
+            elif head["pages"]:
+                # 没到达 last_id：水位不动，记下见到的最新推文和下一页游标
+                pending_id, pending_created_at, resume_cursor = last_id, watermark["last_created_at"], head["cursor"]
+                if newest:
+                    pending_id, pending_created_at = int(newest["id"]), newest.get("created_at")
+
+        inserted = self.store.insert_tweets(username, fresh)
+
+        now = time.time()
+        rate = self._update_rate(watermark, len(fresh), now)
+        next_due = now + self._interval_for(rate)
+        self.store.set_watermark(
+            username, last_id, watermark["last_created_at"], rate, now, next_due, pending_id, pending_created_at, resume_cursor
+        )
+
+        return {"success": True, "data": {"username": username, "new_tweets": inserted, "pages": pages, "next_due": next_due}}
+
+    async def _page_timeline(self, username: str, cursor: Optional[str], stop_id: int, budget: int) -> Dict[str, Any]:
+        """
+        Page from cursor until a tweet at or below stop_id shows up
+
+        Returns:
+            Dict[str, Any]: {"tweets": [...], "pages": 2, "complete": 是否到达 stop_id 或时间线末尾,
+            "cursor": 未完成时下一页的游标, "error": 第一页就失败时的错误}
+        """
+        fresh: List[Dict[str, Any]] = []
+        pages = 0
+        while pages < budget:
+            result = await self.source.get_user_tweets(
+                username=username,
+                limit=self.page_size,
+                include_replies=self.include_replies,
+                include_pinned=False,
+                cursor=cursor,
+            )
+            if not result["success"]:
+                logger.warning(f"Stopped paging {username} after {pages} pages: {result['error']}")
+                return {"tweets": fresh, "pages": pages, "complete": False, "cursor": cursor, "error": result["error"]}
+            pages += 1
+
+            tweets = result["data"]["tweets"]
+            reached = False
+            for tweet in tweets:
+                tweet_id = str(tweet.get("id", ""))
+                if not tweet_id.isdigit():
+                    continue
+                if int(tweet_id) <= stop_id:
+                    reached = True
+                    continue
+                fresh.append(tweet)
+
+            cursor = result["data"].get("cursor")
+            if reached or not tweets or not cursor:
+                return {"tweets": fresh, "pages": pages, "complete": True, "cursor": None, "error": None}
+        return {"tweets": fresh, "pages": pages, "complete": False, "cursor": cursor, "error": "page budget exhausted"}
+
+    def _update_rate(self, watermark: Dict[str, Any], new_count: int, now: float) -> float:
+        """Exponentially weighted posting rate in tweets per second"""
+        if not watermark["last_polled"]:
+            # 首次轮询无法得知时间跨度，按最长轮询间隔估算
+            return new_count / self.max_interval
+        elapsed = max(now - watermark["last_polled"], 1.0)
+        observed = new_count / elapsed
+        return self.rate_smoothing * observed + (1 - self.rate_smoothing) * watermark["rate"]
+
+    def _interval_for(self, rate: float) -> float:
+        if rate <= 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, self.target_new_per_poll / rate))
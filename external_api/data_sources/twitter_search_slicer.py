@@ -0,0 +1,324 @@
+"""
+Time-sliced parallel historic search for TwitterSource.search_tweets
+
+A long search is one serial cursor chain of at most 100 tweets per page. The
+slicer below cuts the start_date/end_date range into day windows, sizes each
+new window from the tweet density observed in finished ones, and walks the
+window cursor chains concurrently under a shared rate limiter. The merged
+stream is deduplicated by tweet id and progress is checkpointed so an
+interrupted pull can resume. A tweet counts as seen only once it has been
+handed to the consumer, and a window's checkpointed cursor only moves past a
+page after all of that page's tweets were delivered, so tweets still queued
+when the pull stops are fetched again on resume. Seen ids are appended to a
+side file (checkpoint_path + ".seen") at each checkpoint, so checkpoint cost
+does not grow with the size of the pull.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .rate_limiter import AsyncRateLimiter
+from .twitter_source import TwitterSource
+
+logger = logging.getLogger("twitter_search_slicer")
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class TweetSearchSlicer:
+    """Concurrent, resumable historic pull for one search query
+
+    Windows are half-open day ranges [start, end). Adjacent windows share a
+    boundary date in the request parameters, so a tweet may be returned by
+    both; the id-based deduplication removes it.
+
+    Example:
+        >>> slicer = TweetSearchSlicer(client.twitter, "lisdexamfetamine", "2024-01-01", "2025-01-01",
+        ...                            checkpoint_path="ldx_2024.ckpt.json")
+        >>> async for tweet in slicer.stream():
+        ...     print(tweet["id"])
+    """
+
+    def __init__(
+        self,
+        source: TwitterSource,
+        query: str,
+        start_date: str,
+        end_date: str,
+        lang: Optional[str] = None,
+        min_retweets: Optional[int] = None,
+        min_likes: Optional[int] = None,
+        min_replies: Optional[int] = None,
+        concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        target_tweets_per_window: int = 1000,
+        initial_window_days: int = 7,
+        max_window_days: int = 90,
+        max_pages_per_window: int = 200,
+        max_retries: int = 3,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 10,
+        max_queued_tweets: int = 1000,
+    ):
+        self.source = source
+        self.query = query
+        self.start = datetime.strptime(start_date, DATE_FORMAT).date()
+        self.end = datetime.strptime(end_date, DATE_FORMAT).date()
+        if self.start >= self.end:
+            raise ValueError("start_date must be earlier than end_date")
+        self.filters = {"lang": lang, "min_retweets": min_retweets, "min_likes": min_likes, "min_replies": min_replies}
+        self.concurrency = concurrency
+        self.limiter = AsyncRateLimiter(requests_per_second)
+        self.target_tweets_per_window = target_tweets_per_window
+        self.initial_window_days = initial_window_days
+        self.max_window_days = max_window_days
+        self.max_pages_per_window = max_pages_per_window
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.max_queued_tweets = max_queued_tweets
+        self.seen_path = f"{checkpoint_path}.seen" if checkpoint_path else None
+
+        # 规划状态
+        self._frontier = self.start  # 尚未分配窗口的起始日期
+        self._density: Optional[float] = None  # 每天推文数的滑动估计
+        self._pending: List[Dict[str, Any]] = []  # 断点恢复的未完成窗口
+        self._active: Dict[str, Dict[str, Any]] = {}
+        # 每个进行中窗口的已抓取页：[页后游标, 未交付推文数, 是否仍在入队]，以及是否已抓完
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._completed: List[List[str]] = []
+        self._failed: List[Dict[str, Any]] = []
+        self._retry_later: List[Dict[str, Any]] = []  # 失败窗口，写入断点供下次恢复
+        self._seen: set = set()  # 已交付给消费者的 id
+        self._queued: set = set()  # 已入队、尚未交付的 id
+        self._unsaved_seen: List[str] = []  # 上次断点之后新见到的 id，下次断点追加到 seen 文件
+        self._pages_since_checkpoint = 0
+        self._load_checkpoint()
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._seen)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run the whole pull and collect the deduplicated tweets
+
+        Only tweets fetched by this call are returned. After resuming from a checkpoint,
+        tweets delivered by earlier runs are not kept and are not fetched again;
+        total_seen counts the tweets of all runs.
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"query": "...", "count": 1234, "total_seen": 5678, "tweets": [...], "failed_windows": [...]}}
+        """
+        tweets = [tweet async for tweet in self.stream()]
+        return {
+            "success": True,
+            "data": {
+                "query": self.query,
+                "count": len(tweets),
+                "total_seen": len(self._seen),
+                "tweets": tweets,
+                "failed_windows": list(self._failed),
+            },
+        }
+
+    async def stream(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield unseen tweets as soon as any window returns them; workers wait when the consumer falls behind"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued_tweets)
+        done = object()
+
+        async def worker() -> None:
+            try:
+                while True:
+                    window = self._next_window()
+                    if window is None:
+                        return
+                    await self._run_window(window, queue)
+            finally:
+                await queue.put(done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                item = await queue.get()
+                if item is done:
+                    running -= 1
+                    continue
+                tweet, window = item
+                self._deliver(tweet, window)
+                yield tweet
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # 队列里没交付的推文不算已见，窗口游标也没越过它们，恢复时会重新抓取
+            self._queued.clear()
+            self._save_checkpoint()
+
+    def _next_window(self) -> Optional[Dict[str, Any]]:
+        if self._pending:
+            window = self._pending.pop(0)
+        elif self._frontier < self.end:
+            days = self._window_days()
+            window_end = min(self._frontier + timedelta(days=days), self.end)
+            window = {"start": self._frontier.strftime(DATE_FORMAT), "end": window_end.strftime(DATE_FORMAT), "cursor": None, "count": 0}
+            self._frontier = window_end
+        else:
+            return None
+        self._active[window["start"]] = window
+        self._progress[window["start"]] = {"pages": deque(), "fetched": False}
+        return window
+
+    def _window_days(self) -> int:
+        if not self._density:
+            return self.initial_window_days
+        days = int(self.target_tweets_per_window / self._density)
+        return max(1, min(self.max_window_days, days))
+
+    async def _run_window(self, window: Dict[str, Any], queue: asyncio.Queue) -> None:
+        progress = self._progress[window["start"]]
+        cursor = window["cursor"]
+        pages = 0
+        while pages < self.max_pages_per_window:
+            result = await self._fetch_page(window, cursor)
+            if not result["success"]:
+                # 保留游标，下次从断点继续
+                self._failed.append({"start": window["start"], "end": window["end"], "error": result["error"]})
+                self._active.pop(window["start"], None)
+                self._retry_later.append(window)
+                return
+            pages += 1
+
+            data = result["data"]
+            cursor = data.get("cursor")
+            page = [cursor, 0, True]
+            progress["pages"].append(page)
+            for tweet in data["tweets"]:
+                if tweet["id"] in self._seen or tweet["id"] in self._queued:
+                    continue
+                self._queued.add(tweet["id"])
+                window["count"] += 1
+                page[1] += 1
+                await queue.put((tweet, window))
+            page[2] = False
+            self._settle(window)
+
+            self._pages_since_checkpoint += 1
+            if self._pages_since_checkpoint >= self.checkpoint_every:
+                self._save_checkpoint()
+            if not data["tweets"] or not cursor:
+                break
+
+        if pages >= self.max_pages_per_window and cursor:
+            logger.warning(f"Window {window['start']}~{window['end']} hit the page cap, results may be incomplete")
+
+        self._observe_density(window)
+        progress["fetched"] = True
+        self._settle(window)
+        self._save_checkpoint()
+
+    def _deliver(self, tweet: Dict[str, Any], window: Dict[str, Any]) -> None:
+        """推文交给消费者：记为已见，并计入所在页"""
+        self._queued.discard(tweet["id"])
+        self._seen.add(tweet["id"])
+        self._unsaved_seen.append(tweet["id"])
+        # 同一窗口的推文按入队顺序交付，总是属于最早一个未交付完的页
+        for page in self._progress[window["start"]]["pages"]:
+            if page[1]:
+                page[1] -= 1
+                break
+        self._settle(window)
+
+    def _settle(self, window: Dict[str, Any]) -> None:
+        """断点游标越过已全部交付的页；窗口抓完且全部交付后记为完成"""
+        progress = self._progress.get(window["start"])
+        if progress is None:
+            return
+        pages = progress["pages"]
+        while pages and not pages[0][2] and not pages[0][1]:
+            window["cursor"] = pages.popleft()[0]
+        if progress["fetched"] and not pages:
+            del self._progress[window["start"]]
+            self._active.pop(window["start"], None)
+            self._completed.append([window["start"], window["end"]])
+
+    async def _fetch_page(self, window: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"success": False, "error": "not started"}
+        for attempt in range(self.max_retries):
+            async with self.limiter:
+                result = await self.source.search_tweets(
+                    query=self.query,
+                    limit=100,
+                    start_date=window["start"],
+                    end_date=window["end"],
+                    cursor=cursor,
+                    **{k: v for k, v in self.filters.items() if v is not None},
+                )
+            if result["success"]:
+                return result
+            await asyncio.sleep(2**attempt)
+        return result
+
+    def _observe_density(self, window: Dict[str, Any]) -> None:
+        start = datetime.strptime(window["start"], DATE_FORMAT).date()
+        end = datetime.strptime(window["end"], DATE_FORMAT).date()
+        observed = window["count"] / max((end - start).days, 1)
+        if observed <= 0:
+            observed = 0.1
+        self._density = observed if self._density is None else 0.5 * observed + 0.5 * self._density
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        self._pages_since_checkpoint = 0
+        # seen 只追加新增部分，断点本身只含窗口和游标
+        if self._unsaved_seen:
+            with open(self.seen_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{tweet_id}\n" for tweet_id in self._unsaved_seen)
+            self._unsaved_seen = []
+        state = {
+            "query": self.query,
+            "start": self.start.strftime(DATE_FORMAT),
+            "end": self.end.strftime(DATE_FORMAT),
+            "filters": self.filters,
+            "frontier": self._frontier.strftime(DATE_FORMAT),
+            "density": self._density,
+            "pending": self._pending + list(self._active.values()) + self._retry_later,
+            "completed": self._completed,
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        if not os.path.exists(self.checkpoint_path):
+            # 没有断点时残留的 seen 文件不属于本次抓取
+            if os.path.exists(self.seen_path):
+                os.remove(self.seen_path)
+            return
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if (state["query"], state["start"], state["end"], state["filters"]) != (
+            self.query,
+            self.start.strftime(DATE_FORMAT),
+            self.end.strftime(DATE_FORMAT),
+            self.filters,
+        ):
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different search")
+        self._frontier = date.fromisoformat(state["frontier"])
+        self._density = state["density"]
+        self._pending = state["pending"]
+        self._completed = state["completed"]
+        if os.path.exists(self.seen_path):
+            with open(self.seen_path, "r", encoding="utf-8") as f:
+                self._seen.update(line.strip() for line in f if line.strip())
+        logger.info(f"Resuming search from checkpoint: {len(self._completed)} windows done, {len(self._pending)} pending")
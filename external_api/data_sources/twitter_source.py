@@ -6,14 +6,17 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Hashable, List, Optional
 
 import aiohttp
 
 from .base import BaseAPI
+from .ttl_cache import TTLCache, cached_batch_lookup
 
 logger = logging.getLogger("twitter_source")
 
+USER_TTL = 6 * 3600
+
 
 class TwitterSource(BaseAPI):
     """Twitter data source"""
@@ -29,6 +32,8 @@ class TwitterSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
             }
+        # 用户资料缓存，username 与 id 两种键指向同一份资料
+        self._user_cache = TTLCache(max_entries=20000)
 
     @property
     def source_name(self) -> str:
@@ -52,6 +57,7 @@ class TwitterSource(BaseAPI):
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         cursor: Optional[str] = None,
+        normalized: bool = False,
     ) -> Dict[str, Any]:
         """
         Search for tweets.
@@ -66,6 +72,10 @@ class TwitterSource(BaseAPI):
             start_date (Optional[str]): Start date, format: YYYY-MM-DD, default is None
             end_date (Optional[str]): End date, format: YYYY-MM-DD, default is None
             cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
+            normalized (bool): Return id-keyed tweet/user/reference tables instead of nested tweets, default is False.
+                In this mode "tweets" and "referenced_tweets" map tweet id to tweet, each tweet carries "user_id" (None if the author is missing) and
+                "references" ([{"type": "reply/retweet/quote", "id": "..."}]) instead of nested copies,
+                and "users" maps user id to user information
 
         Returns:
             Dict[str, Any]: Dictionary containing tweet search results, e.g.
@@ -164,6 +174,13 @@ class TwitterSource(BaseAPI):
             if "results" not in data:
                 raise ValueError(f"Missing results field in API response: {data}")
 
+            if normalized:
+                graph = self._normalize_tweets(data["results"])
+                return {
+                    "success": True,
+                    "data": {"query": query, "count": len(graph["tweets"]), **graph, "cursor": data.get("continuation_token")},
+                }
+
             tweets = []
             for result in data["results"]:
                 if not isinstance(result, dict):
@@ -303,8 +320,84 @@ class TwitterSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def get_users_info(
+        self,
+        usernames: Optional[List[str]] = None,
+        user_ids: Optional[List[str]] = None,
+        concurrency: int = 8,
+    ) -> Dict[str, Any]:
+        """
+        Get information about many Twitter users at once.
+
+        Duplicate inputs are looked up once, profiles fetched within the last 6 hours
+        (by username or by ID) are served from cache, and the rest are fetched concurrently.
+
+        Args:
+            usernames (Optional[List[str]]): Twitter usernames, with or without @ symbol
+            user_ids (Optional[List[str]]): Twitter user IDs
+            concurrency (int): Maximum number of concurrent requests, default is 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing user information, e.g.
+            {
+                "success": True,
+                "data": {
+                    "count": 3,                # Number of users found
+                    "users": [...],            # One entry per input (usernames first, then user_ids), same fields as get_user_info; None if the lookup failed
+                    "failed": [                # Failed lookups
+                        {"username": "no_such_user", "error": "..."}
+                    ],
+                    "cached": 1,               # Unique inputs served from cache
+                    "fetched": 2               # Unique inputs fetched from the API
+                }
+            }
+        """
+        try:
+            keys: List[Hashable] = [("username", name.lstrip("@").lower()) for name in usernames or []]
+            keys += [("id", str(user_id)) for user_id in user_ids or []]
+
+            async def fetch(key: tuple) -> Dict[str, Any]:
+                kind, value = key
+                if kind == "id":
+                    result = await self.get_user_info("", user_id=value)
+                else:
+                    result = await self.get_user_info(value)
+                # 用户不存在时接口仍返回空资料，不能当作成功缓存
+                if result["success"] and (not result["data"].get("username") or result["data"].get("id") == "None"):
+                    return {"success": False, "error": "User not found"}
+                return result
+
+            def aliases(user: Dict[str, Any]) -> List[Hashable]:
+                return [("id", user["id"]), ("username", user["username"].lower())]
+
+            lookup = await cached_batch_lookup(keys, fetch, self._user_cache, USER_TTL, concurrency, aliases)
+            failed = [{"username" if kind == "username" else "user_id": value, "error": error} for (kind, value), error in lookup["errors"].items()]
+            users = lookup["results"]
+            return {
+                "success": True,
+                "data": {
+                    "count": sum(user is not None for user in users),
+                    "users": users,
+                    "failed": failed,
+                    "cached": lookup["cached"],
+                    "fetched": lookup["fetched"],
+                },
+            }
+        except Exception as e:
+            error_msg = f"Error occurred while getting users info: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
     async def get_user_tweets(
-        self, username: str, limit: int = 10, user_id: Optional[str] = None, include_replies: bool = False, include_pinned: bool = False
+        self,
+        username: str,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        include_pinned: bool = False,
+        cursor: Optional[str] = None,
+        normalized: bool = False,
     ) -> Dict[str, Any]:
         """
         Get a list of tweets from a Twitter user.
@@ -315,6 +408,11 @@ class TwitterSource(BaseAPI):
             user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
             include_replies (bool): Whether to include reply tweets, default is False
             include_pinned (bool): Whether to include pinned tweets, default is False
+            cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
+            normalized (bool): Return id-keyed tweet/user/reference tables instead of nested tweets, default is False.
+                In this mode "tweets" and "referenced_tweets" map tweet id to tweet, each tweet carries "user_id" (None if the author is missing) and
+                "references" ([{"type": "reply/retweet/quote", "id": "..."}]) instead of nested copies,
+                and "users" maps user id to user information
 
         Returns:
             Dict[str, Any]: Dictionary containing user tweet list, e.g.
@@ -382,6 +480,8 @@ class TwitterSource(BaseAPI):
 
             if user_id:
                 params["user_id"] = user_id
+            if cursor:
+                params["continuation_token"] = cursor
 
             # 使用aiohttp发送异步请求
             async with aiohttp.ClientSession(trust_env=True) as session:
@@ -400,6 +500,13 @@ class TwitterSource(BaseAPI):
             if "results" not in data:
                 raise ValueError(f"Missing results field in API response: {data}")
 
+            if normalized:
+                graph = self._normalize_tweets(data["results"])
+                return {
+                    "success": True,
+                    "data": {"username": username, "count": len(graph["tweets"]), **graph, "cursor": data.get("continuation_token")},
+                }
+
             tweets = []
             for result in data["results"]:
                 tweet = self._parse_tweet_with_ref(result)
@@ -460,7 +567,7 @@ class TwitterSource(BaseAPI):
             "bot": data.get("bot", False),
         }
 
-    def _parse_tweet_without_ref(self, result: dict[str, Any]) -> dict[str, Any]:
+    def _parse_tweet_without_ref(self, result: dict[str, Any], include_user: bool = True) -> dict[str, Any]:
         media_urls = []
         if result.get("media_url"):
             if isinstance(result["media_url"], list):
@@ -491,8 +598,9 @@ class TwitterSource(BaseAPI):
                 "view_count": result.get("views", 0),
                 "bookmark_count": result.get("bookmark_count", 0),
             },
-            "user": self._parse_user_info(result.get("user", {})),
         }
+        if include_user:
+            tweet["user"] = self._parse_user_info(result.get("user", {}))
 
         return tweet
 
@@ -508,10 +616,10 @@ class TwitterSource(BaseAPI):
         elif result.get("retweet_tweet_id") and result.get("retweet_status"):
             retweet = result.get("retweet_status", {})
             referenced_tweets = {"type": "retweet", **self._parse_tweet_without_ref(retweet)}
-            if retweet.get("quoted_status"):
+            if self._is_quote(retweet, in_retweet=True):
                 quoted = retweet.get("quoted_status", {})
                 referenced_tweets["quoted_status"] = {"type": "quote", **self._parse_tweet_without_ref(quoted)}
-        elif result.get("quoted_status_id") and result.get("quoted_status"):
+        elif self._is_quote(result):
             quoted = result.get("quoted_status", {})
             referenced_tweets = {"type": "quote", **self._parse_tweet_without_ref(quoted)}
 
@@ -519,3 +627,48 @@ class TwitterSource(BaseAPI):
             tweet["referenced_tweets"] = referenced_tweets
 
         return tweet
+
+    @staticmethod
+    def _is_quote(result: dict[str, Any], in_retweet: bool = False) -> bool:
+        """嵌套模式的引用推文判断，归一化模式沿用：转推内部的引用只看 quoted_status"""
+        if in_retweet:
+            return bool(result.get("quoted_status"))
+        return bool(result.get("quoted_status_id") and result.get("quoted_status"))
+
+    def _normalize_tweets(self, results: list[Any]) -> dict[str, Any]:
+        """Build id-keyed tweet, user and referenced tweet tables"""
+        graph: dict[str, dict[str, Any]] = {"tweets": {}, "users": {}, "referenced_tweets": {}}
+        for result in results:
+            if not isinstance(result, dict):
+                logger.warning(f"Skipping invalid tweet data: {result}")
+                continue
+            self._add_normalized_tweet(result, graph, graph["tweets"])
+        return graph
+
+    def _add_normalized_tweet(
+        self, result: dict[str, Any], graph: dict[str, dict[str, Any]], table: dict[str, Any], in_retweet: bool = False
+    ) -> str:
+        """Add one tweet and everything it references to the graph, return its id"""
+        tweet = self._parse_tweet_without_ref(result, include_user=False)
+
+        # 用户按 id 只解析和保存一次，缺少作者时 user_id 为 None
+        raw_user = result.get("user", {}) or {}
+        user_id = str(raw_user["user_id"]) if raw_user.get("user_id") not in (None, "") else None
+        if user_id is not None and user_id not in graph["users"]:
+            graph["users"][user_id] = self._parse_user_info(raw_user)
+        tweet["user_id"] = user_id
+
+        # 引用推文单独入表，这里只保留 id
+        references = []
+        if result.get("in_reply_to_status_id"):
+            references.append({"type": "reply", "id": str(result.get("in_reply_to_status_id", ""))})
+        elif result.get("retweet_tweet_id") and result.get("retweet_status"):
+            ref_id = self._add_normalized_tweet(result["retweet_status"], graph, graph["referenced_tweets"], in_retweet=True)
+            references.append({"type": "retweet", "id": ref_id})
+        elif self._is_quote(result, in_retweet):
+            ref_id = self._add_normalized_tweet(result["quoted_status"], graph, graph["referenced_tweets"])
+            references.append({"type": "quote", "id": ref_id})
+        tweet["references"] = references
+
+        table.setdefault(tweet["id"], tweet)
+        return tweet["id"]
@@ -0,0 +1,244 @@
+"""
+Cross-symbol news store for YahooFinanceSource
+
+An article is returned by get_stock_news for every ticker it mentions. The
+store keys articles by uuid and keeps a ticker -> article index, so a
+watchlist poll stores each article once no matter how many symbols return
+it, and "news for these tickers since T" is answered locally.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .client import get_cache_dir
+from .yahoo_source import YahooFinanceSource
+
+logger = logging.getLogger("yahoo_news")
+
+
+def parse_publish_date(value: Union[str, int, float, None]) -> int:
+    """pubDate（如 2024-05-01T12:34:56Z）或 epoch 秒转换为 epoch 秒，无法解析时为 0"""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+
+class NewsStore:
+    """Articles keyed by uuid with a ticker index
+
+    Re-inserting an article is a no-op; tickers seen for an existing article
+    are only added to the index.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "yahoo_news.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                uuid TEXT PRIMARY KEY,
+                published_at INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS article_tickers (
+                ticker TEXT NOT NULL,
+                uuid TEXT NOT NULL,
+                published_at INTEGER NOT NULL,
+                PRIMARY KEY (ticker, uuid)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_article_tickers_time ON article_tickers (ticker, published_at);
+            """
+        )
+        self._conn.commit()
+
+    def known_uuids(self, uuids: Iterable[str]) -> set:
+        uuids = list(uuids)
+        known: set = set()
+        with self._lock:
+            # SQLite 单条语句的参数个数有限，分批查询
+            for i in range(0, len(uuids), 500):
+                batch = uuids[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                known.update(row[0] for row in self._conn.execute(f"SELECT uuid FROM articles WHERE uuid IN ({placeholders})", batch))
+        return known
+
+    def insert_articles(self, articles: Iterable[Dict[str, Any]], tickers: Optional[Dict[str, Iterable[str]]] = None) -> int:
+        """
+        Insert articles, skipping uuids already stored
+
+        Args:
+            articles: simple_news items from get_stock_news
+            tickers: Extra tickers per uuid to index, e.g. the symbols whose news feed returned the article
+
+        Returns:
+            int: Number of newly inserted articles
+        """
+        now = time.time()
+        article_rows, ticker_rows = [], []
+        for article in articles:
+            uuid = article.get("uuid")
+            if not uuid:
+                continue
+            published_at = parse_publish_date(article.get("publish_date"))
+            article_rows.append((uuid, published_at, now, json.dumps(article, ensure_ascii=False, separators=(",", ":"))))
+            for ticker in set(article.get("tickers") or []) | set((tickers or {}).get(uuid, ())):
+                ticker_rows.append((ticker.upper(), uuid, published_at))
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO articles (uuid, published_at, first_seen, payload) VALUES (?, ?, ?, ?)", article_rows)
+            inserted = self._conn.total_changes - before
+            self._conn.executemany("INSERT OR IGNORE INTO article_tickers (ticker, uuid, published_at) VALUES (?, ?, ?)", ticker_rows)
+            self._conn.commit()
+            return inserted
+
+    def add_tickers(self, tickers: Dict[str, Iterable[str]]) -> None:
+        """Index stored articles (uuid -> tickers) under additional tickers"""
+        rows = [(ticker.upper(), uuid) for uuid, names in tickers.items() for ticker in names]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO article_tickers (ticker, uuid, published_at) SELECT ?, uuid, published_at FROM articles WHERE uuid = ?", rows
+            )
+            self._conn.commit()
+
+    def get_news(
+        self,
+        tickers: Iterable[str],
+        since: Union[str, int, float, None] = None,
+        until: Union[str, int, float, None] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored articles mentioning any of the tickers, newest first, each article once
+
+        Args:
+            tickers: Ticker symbols
+            since: Only articles published at or after this time (epoch seconds or ISO 8601)
+            until: Only articles published before this time
+            limit: Maximum number of articles
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        if not tickers:
+            return []
+        placeholders = ",".join("?" * len(tickers))
+        sql = (
+            "SELECT a.payload FROM articles a WHERE a.uuid IN "
+            f"(SELECT uuid FROM article_tickers WHERE ticker IN ({placeholders}) AND published_at >= ? AND published_at < ?) "
+            "ORDER BY a.published_at DESC, a.uuid"
+        )
+        params: List[Any] = tickers + [parse_publish_date(since), parse_publish_date(until) or 2**62]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class NewsWatchlistPoller:
+    """Polls get_stock_news for a watchlist concurrently into a NewsStore
+
+    Example:
+        >>> poller = NewsWatchlistPoller(client.yahoo_finance, ["AAPL", "MSFT", "NVDA"])
+        >>> await poller.poll()
+        >>> poller.store.get_news(["AAPL", "NVDA"], since="2024-05-01T00:00:00Z")
+    """
+
+    def __init__(
+        self,
+        source: YahooFinanceSource,
+        symbols: Iterable[str],
+        store: Optional[NewsStore] = None,
+        region: str = "US",
+        snippet_count: int = 20,
+        concurrency: int = 8,
+        interval: float = 600,
+    ):
+        self.source = source
+        self.symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        self.store = store or NewsStore()
+        self.region = region
+        self.snippet_count = snippet_count
+        self.concurrency = concurrency
+        self.interval = interval
+
+    async def poll(self) -> Dict[str, Any]:
+        """
+        Fetch news for every symbol and store articles not seen before
+
+        Returns:
+            Dict[str, Any]: {"success": True, "data": {"polled": 50, "fetched": 1000, "unique": 180, "new_articles": 12, "failed_symbols": [...]}}
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.source.get_stock_news(symbol, region=self.region, snippet_count=self.snippet_count)
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in self.symbols))
+
+        # 同一篇文章会出现在它提到的每个标的下，合并后只处理一次
+        articles: Dict[str, Dict[str, Any]] = {}
+        feeds: Dict[str, set] = {}
+        fetched = 0
+        failed_symbols = []
+        for symbol, result in zip(self.symbols, results):
+            if not result["success"]:
+                failed_symbols.append({"symbol": symbol, "error": result["error"]})
+                continue
+            for article in result["data"]["simple_news"]:
+                uuid = article.get("uuid")
+                if not uuid:
+                    continue
+                fetched += 1
+                articles.setdefault(uuid, article)
+                feeds.setdefault(uuid, set()).add(symbol)
+
+        known = self.store.known_uuids(articles)
+        fresh = [article for uuid, article in articles.items() if uuid not in known]
+        inserted = self.store.insert_articles(fresh, feeds)
+        # 已存文章只补充索引，不重复写入正文
+        self.store.add_tickers({uuid: feeds[uuid] for uuid in known})
+
+        return {
+            "success": True,
+            "data": {
+                "polled": len(self.symbols),
+                "fetched": fetched,
+                "unique": len(articles),
+                "new_articles": inserted,
+                "failed_symbols": failed_symbols,
+            },
+        }
+
+    async def run_forever(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Poll the watchlist every ``interval`` seconds until stop_event is set"""
+        stop_event = stop_event or asyncio.Event()
+        while not stop_event.is_set():
+            result = await self.poll()
+            if result["data"]["failed_symbols"]:
+                logger.warning(f"News poll failed for {len(result['data']['failed_symbols'])} symbols")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
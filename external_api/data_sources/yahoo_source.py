@@ -4,15 +4,59 @@ Yahoo Finance data source implementation
 
 import asyncio
 import logging
+import os
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 import aiohttp
+import numpy as np
 
 from .base import BaseAPI
+from .corporate_actions import (
+    CORPORATE_EVENTS,
+    adjust_bars,
+    dividend_factors,
+    empty_events,
+    events_to_dict,
+    parse_chart_events,
+    rebase_bars,
+    rebase_events,
+    split_factors,
+)
+from .ohlcv_resample import bucket_span, finer_intervals, resample_bars
+from .ohlcv_store import BAR_DTYPE, INTERVAL_SECONDS, OhlcvStore, empty_bars, merge_bars, merge_events
+from .ttl_cache import TTLCache
 
 logger = logging.getLogger("yahoo_finance_source")
 
+# 最近这段时间内的行情可能仍被上游修正，不记为已覆盖
+SETTLE_SECONDS = 3600
+
+# 多久检查一次新的拆股，发现后把本地已存数据换算到新的基准
+SPLIT_CHECK_SECONDS = 24 * 3600
+
+# 分钟级周期：(单次请求最大天数, 最大回看天数)
+INTRADAY_LIMITS = {
+    "1m": (7, 30),
+    "2m": (60, 60),
+    "5m": (60, 60),
+    "15m": (60, 60),
+    "30m": (60, 60),
+    "90m": (60, 60),
+    "60m": (180, 730),
+    "1h": (180, 730),
+}
+
+# 快照各部分的缓存时长（秒）
+SNAPSHOT_TTL = {
+    "info": 15 * 60,
+    "insights": 6 * 3600,
+    "statistics": 24 * 3600,
+    "financial_data": 24 * 3600,
+    "news": 10 * 60,
+}
+
 
 class YahooFinanceSource(BaseAPI):
     """Yahoo Finance API data source implementation"""
@@ -32,6 +76,14 @@ class YahooFinanceSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        # 本地行情存储，首次使用时创建
+        self._ohlcv_dir = os.path.join(config["cache_dir"], "ohlcv") if config.get("cache_dir") else None
+        self._ohlcv_store: Optional[OhlcvStore] = None
+        self._ohlcv_store_disabled = False
+        self._chart_concurrency = 4
+        # 快照各部分按各自的有效期缓存
+        self._snapshot_cache = TTLCache(max_entries=5000)
+        self._snapshot_concurrency = 8
 
     @property
     def source_name(self) -> str:
@@ -60,16 +112,28 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        columnar: bool = False,
+        adjust: bool = False,
     ) -> Dict[str, Any]:
         """Get stock price data. Please set start_date, end_date, interval reasonably to avoid getting too much data,
         which could cause request timeout or performance issues.
 
+        Long intraday ranges are split into chunks the upstream accepts and fetched concurrently. Intraday data is only
+        available for a limited lookback (1m: 30 days, 2m-90m: 60 days, 60m/1h: 730 days); older parts of the range are
+        dropped and reported in "warning".
+
+        Prices are split-adjusted. With adjust=True open/high/low/close are also back-adjusted for dividends. Dividends
+        and splits are kept locally with the price history; when a new split appears, stored history is rescaled
+        instead of being fetched again.
+
         Args:
             symbol: Stock code
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             interval: Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
-            events: Event type, options: capitalGain|div|split|earn|history, default: empty
+            events: Event type, options: capitalGain|div|split|earn|history, default: empty. Dividends and splits in the range are returned in "events"
+            columnar: Return "columns" (one list per field: timestamp, date, open, high, low, close, volume) instead of "prices", default: False
+            adjust: Back-adjust prices for dividends paid after each bar, default: False
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -97,6 +161,10 @@ class YahooFinanceSource(BaseAPI):
                     ]
                 }
             }
+            Intraday dates include the time, e.g. "2024-01-02 09:30:00".
+            With events containing div or split, data also has
+            "events": {"dividends": [{"date": "2024-02-09", "timestamp": 1707487800, "amount": 0.24}],
+                       "splits": [{"date": "2020-08-31", "timestamp": 1598880600, "numerator": 4.0, "denominator": 1.0}]}
         """
         try:
             # Convert date string to timestamp
@@ -106,55 +174,170 @@ class YahooFinanceSource(BaseAPI):
             if start_timestamp > end_timestamp:
                 raise ValueError("start_date cannot be greater than end_date")
 
-            # Build request parameters
-            params = {
-                "symbol": symbol,
-                "period1": start_timestamp,
-                "period2": end_timestamp,
-                "interval": interval,
-                "region": "US",  # Default use US area
-                "includePrePost": "false",
-                "useYfid": "true",
-                "includeAdjustedClose": "true",
-            }
+            # 分钟级数据上游只保留有限的回看期，超出部分直接裁掉
+            warning = None
+            if interval in INTRADAY_LIMITS:
+                earliest = int(time.time()) - INTRADAY_LIMITS[interval][1] * 86400
+                if start_timestamp < earliest:
+                    warning = f"Interval {interval} is only available for the last {INTRADAY_LIMITS[interval][1]} days, earlier data is omitted"
+                    start_timestamp = min(earliest, end_timestamp)
+
+            # 分红/拆股随行情存入本地存储，其他事件类型直接请求上游
+            event_types = set(filter(None, events.split("|")))
+            store = self._get_ohlcv_store() if event_types <= {"div", "split"} else None
+            bars: Optional[np.ndarray] = None
+            chart_events = empty_events()
+            if store is None:
+                result = await self._fetch_chart_range(symbol, start_timestamp, end_timestamp, interval, events)
+                if not result["success"]:
+                    return result
+                bars, chart_events = result["bars"], result["events"]
+            else:
+                error = await self._sync_corporate_actions(store, symbol, SPLIT_CHECK_SECONDS)
+                if error:
+                    return error
+                bars = self._resample_from_store(store, symbol, interval, start_timestamp, end_timestamp)
+            if store is not None and bars is None:
+                # 只请求本地未覆盖的区间
+                gaps = store.gaps(symbol, interval, start_timestamp, end_timestamp)
+                if gaps:
+                    # 新数据按当前拆股基准返回，写入前已存数据需要处于同一基准
+                    error = await self._sync_corporate_actions(store, symbol, SETTLE_SECONDS)
+                    if error:
+                        return error
+                results = await asyncio.gather(
+                    *(self._fetch_chart_range(symbol, gap_start, gap_end, interval, CORPORATE_EVENTS) for gap_start, gap_end in gaps)
+                )
+                # 最近尚未收盘的 bar 还会变化，不计入覆盖范围
+                now = int(time.time())
+                settled = now - INTERVAL_SECONDS.get(interval, 86400) - SETTLE_SECONDS
+                for (gap_start, gap_end), result in zip(gaps, results):
+                    if not result["success"]:
+                        return result
+                    meta = dict(result["meta"])
+                    if "basis_time" not in store.meta(symbol, interval):
+                        # 新建序列时记录其数据所处的拆股基准，之后只由 _sync_corporate_actions 推进
+                        meta["basis_time"] = now
+                    store.write(symbol, interval, result["bars"], gap_start, min(gap_end, settled), meta)
+                    # 分钟级请求不一定带回事件，只有日线及以上才记为已查询
+                    if interval not in INTRADAY_LIMITS:
+                        store.write_events(symbol, result["events"], gap_start, min(gap_end, settled))
+                    else:
+                        store.write_events(symbol, result["events"])
+                bars = store.read(symbol, interval, start_timestamp, end_timestamp)
+
+            if event_types & {"div", "split"} and store is not None:
+                loaded = await self._load_events(store, symbol, start_timestamp, end_timestamp)
+                if not loaded["success"]:
+                    return loaded
+                chart_events = loaded["events"]
+            if adjust:
+                # 区间之后的分红同样影响区间内的价格，需要截至当前的全部分红
+                loaded = await self._load_events(store, symbol, start_timestamp, int(time.time()))
+                if not loaded["success"]:
+                    return loaded
+                reference = np.concatenate([np.asarray(bars), *loaded["reference"]])
+                reference = reference[np.argsort(reference["timestamp"], kind="stable")]
+                factors = dividend_factors(bars["timestamp"], loaded["events"], reference["timestamp"], reference["close"])
+                bars = adjust_bars(bars, factors)
+
+            data: Dict[str, Any] = {"symbol": symbol}
+            if columnar:
+                data["columns"] = self._bars_to_columns(bars, interval)
+            else:
+                data["prices"] = self._bars_to_prices(bars, interval)
+            if event_types & {"div", "split"}:
+                lo, hi = np.searchsorted(chart_events["timestamp"], [start_timestamp, end_timestamp])
+                selected = events_to_dict(chart_events[lo:hi])
+                data["events"] = {name: selected[name] for name, event_type in (("dividends", "div"), ("splits", "split")) if event_type in event_types}
+            if warning:
+                data["warning"] = warning
+            return {"success": True, "data": data}
+
+        except Exception as e:
+            logger.error(f"Error occurred while getting stock price data: {str(e)}")
+            logger.exception(e)
+            return {"success": False, "error": f"Unknown error: {str(e)}"}
+
+    async def _fetch_chart_range(
+        self,
+        symbol: str,
+        period1: int,
+        period2: int,
+        interval: str,
+        events: str = "",
+    ) -> Dict[str, Any]:
+        """按上游允许的单次跨度切分分钟级请求，并发抓取后按时间戳拼接去重
+
+        Returns:
+            Dict[str, Any]: Same as _fetch_chart
+        """
+        chunk_seconds = INTRADAY_LIMITS[interval][0] * 86400 if interval in INTRADAY_LIMITS else None
+        if chunk_seconds is None or period2 - period1 <= chunk_seconds:
+            return await self._fetch_chart(symbol, period1, period2, interval, events)
+
+        chunks = [(start, min(start + chunk_seconds, period2)) for start in range(period1, period2, chunk_seconds)]
+        semaphore = asyncio.Semaphore(self._chart_concurrency)
+
+        async def fetch(chunk_start: int, chunk_end: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._fetch_chart(symbol, chunk_start, chunk_end, interval, events)
+
+        results = await asyncio.gather(*(fetch(start, end) for start, end in chunks))
+        bars, events = empty_bars(), empty_events()
+        for result in results:
+            if not result["success"]:
+                return result
+            # 相邻分块在边界上可能返回同一根 bar
+            bars = merge_bars(bars, result["bars"])
+            events = merge_events(events, result["events"])
+        return {"success": True, "bars": bars, "events": events, "meta": results[-1]["meta"]}
+
+    async def _fetch_chart(
+        self,
+        symbol: str,
+        period1: int,
+        period2: int,
+        interval: str,
+        events: str = "",
+    ) -> Dict[str, Any]:
+        """请求 /stock/v3/get-chart，返回 BAR_DTYPE 数组、分红/拆股和交易所元数据
 
-            # If events parameter is provided, add to request
-            if events:
-                params["events"] = events
+        Args:
+            symbol: Stock code
+            period1: Start timestamp, inclusive
+            period2: End timestamp, exclusive
+            interval: Time interval
+            events: Event type
+
+        Returns:
+            Dict[str, Any]: {"success": True, "bars": np.ndarray, "events": np.ndarray, "meta": {...}}
+        """
+        # Build request parameters
+        params = {
+            "symbol": symbol,
+            "period1": period1,
+            "period2": period2,
+            "interval": interval,
+            "region": "US",  # Default use US area
+            "includePrePost": "false",
+            "useYfid": "true",
+            "includeAdjustedClose": "true",
+        }
 
-            request_url = f"{self.proxy_url}/stock/v3/get-chart"
+        # If events parameter is provided, add to request
+        if events:
+            params["events"] = events
 
+        request_url = f"{self.proxy_url}/stock/v3/get-chart"
+
+        try:
             # Send request using aiohttp
             async with aiohttp.ClientSession(trust_env=True) as session:
                 async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
                     response.raise_for_status()
                     # Parse the response
                     data = await response.json()
-
-            # Check if there is an error in API response
-            if data.get("chart", {}).get("error"):
-                return {"success": False, "error": str(data["chart"]["error"])}
-
-            # Parse response data
-            chart_data = data["chart"]["result"][0]
-            timestamps = chart_data["timestamp"]
-            quote = chart_data["indicators"]["quote"][0]
-
-            # Build price data list
-            prices = []
-            for i, timestamp in enumerate(timestamps):
-                price_data = {
-                    "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"),
-                    "open": quote["open"][i],
-                    "high": quote["high"][i],
-                    "low": quote["low"][i],
-                    "close": quote["close"][i],
-                    "volume": int(quote["volume"][i]),
-                }
-                prices.append(price_data)
-
-            return {"success": True, "data": {"symbol": symbol, "prices": prices}}
-
         except asyncio.TimeoutError:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
             logger.error(error_msg)
@@ -163,10 +346,146 @@ class YahooFinanceSource(BaseAPI):
             error_msg = f"HTTP request error: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
-        except Exception as e:
-            logger.error(f"Error occurred while getting stock price data: {str(e)}")
-            logger.exception(e)
-            return {"success": False, "error": f"Unknown error: {str(e)}"}
+
+        # Check if there is an error in API response
+        if data.get("chart", {}).get("error"):
+            return {"success": False, "error": str(data["chart"]["error"])}
+
+        chart_data = data["chart"]["result"][0]
+        meta = chart_data.get("meta", {})
+        return {
+            "success": True,
+            "bars": self._chart_to_bars(chart_data),
+            "events": parse_chart_events(chart_data),
+            "meta": {"gmtoffset": meta.get("gmtoffset", 0), "timezone": meta.get("exchangeTimezoneName", "")},
+        }
+
+    def _chart_to_bars(self, chart_data: Dict[str, Any]) -> np.ndarray:
+        """把 chart 结果转换为按时间排序的 BAR_DTYPE 数组，丢弃没有收盘价的空 bar"""
+        # 区间内没有交易（如周末）时不返回 timestamp
+        timestamps = chart_data.get("timestamp") or []
+        if not timestamps:
+            return empty_bars()
+        quote = chart_data["indicators"]["quote"][0]
+        adjclose = (chart_data["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+
+        bars = np.zeros(len(timestamps), dtype=BAR_DTYPE)
+        bars["timestamp"] = timestamps
+        for name in ("open", "high", "low", "close"):
+            bars[name] = np.array(quote[name], dtype=np.float64)  # None 转为 nan
+        bars["adjclose"] = np.array(adjclose, dtype=np.float64) if adjclose else bars["close"]
+        bars["volume"] = [v or 0 for v in quote["volume"]]
+        bars = bars[~np.isnan(bars["close"])]
+        return merge_bars(empty_bars(), bars)
+
+    def _bars_to_columns(self, bars: np.ndarray, interval: str) -> Dict[str, List[Any]]:
+        """BAR_DTYPE 数组转换为列式输出，每个字段一个列表"""
+        columns: Dict[str, List[Any]] = {name: bars[name].tolist() for name in ("timestamp", "open", "high", "low", "close", "volume")}
+        date_format = "%Y-%m-%d %H:%M:%S" if interval in INTRADAY_LIMITS else "%Y-%m-%d"
+        columns["date"] = [datetime.fromtimestamp(ts).strftime(date_format) for ts in columns["timestamp"]]
+        return columns
+
+    def _bars_to_prices(self, bars: np.ndarray, interval: str = "1d") -> List[Dict[str, Any]]:
+        """BAR_DTYPE 数组转换为返回给调用方的价格列表"""
+        columns = self._bars_to_columns(bars, interval)
+        return [
+            {
+                "date": columns["date"][i],
+                "open": columns["open"][i],
+                "high": columns["high"][i],
+                "low": columns["low"][i],
+                "close": columns["close"][i],
+                "volume": columns["volume"][i],
+            }
+            for i in range(len(bars))
+        ]
+
+    def _resample_from_store(self, store: OhlcvStore, symbol: str, interval: str, start: int, end: int) -> Optional[np.ndarray]:
+        """更细周期的本地数据完整覆盖请求区间时，直接重采样得到 interval 周期的 bar，否则返回 None"""
+        for source_interval in finer_intervals(interval):
+            gmtoffset = store.meta(symbol, source_interval).get("gmtoffset", 0)
+            span_start, span_end = bucket_span(start, end, interval, gmtoffset)
+            if not store.is_covered(symbol, source_interval, span_start, span_end):
+                continue
+            bars = resample_bars(store.read(symbol, source_interval, span_start, span_end), interval, gmtoffset)
+            lo, hi = np.searchsorted(bars["timestamp"], [start, end])
+            return bars[lo:hi]
+        return None
+
+    def _get_ohlcv_store(self) -> Optional[OhlcvStore]:
+        """获取本地行情存储，创建失败时禁用"""
+        if self._ohlcv_store is None and not self._ohlcv_store_disabled and self._ohlcv_dir:
+            try:
+                self._ohlcv_store = OhlcvStore(self._ohlcv_dir)
+            except Exception as e:
+                logger.warning(f"OHLCV store unavailable, falling back to upstream only: {e}")
+                self._ohlcv_store_disabled = True
+        return self._ohlcv_store
+
+    async def _load_events(self, store: Optional[OhlcvStore], symbol: str, start: int, end: int) -> Dict[str, Any]:
+        """取 [start, end) 的分红/拆股，有本地存储时只请求未查询过的区间
+
+        Returns:
+            Dict[str, Any]: {"success": True, "events": 已知全部事件, "fetched": 本次新抓取的事件,
+            "reference": [用于查找除息前收盘价的日线]}
+        """
+        gaps = store.event_gaps(symbol, start, end) if store is not None else [(start, end)]
+        events = store.events(symbol) if store is not None else empty_events()
+        fetched = empty_events()
+        reference = [np.asarray(store.bars(symbol, "1d"))] if store is not None else []
+        for gap_start, gap_end in gaps:
+            result = await self._fetch_chart(symbol, gap_start, gap_end, "1d", CORPORATE_EVENTS)
+            if not result["success"]:
+                return result
+            if store is not None:
+                store.write_events(symbol, result["events"], gap_start, gap_end)
+            fetched = merge_events(fetched, result["events"])
+            reference.append(result["bars"])
+        return {"success": True, "events": merge_events(events, fetched), "fetched": fetched, "reference": reference}
+
+    async def _sync_corporate_actions(self, store: OhlcvStore, symbol: str, max_age: int) -> Optional[Dict[str, Any]]:
+        """查询上次同步以来的拆股，把本地已存的 bar 和分红换算到当前拆股基准
+
+        每个序列的 meta 记录其数据所处的基准时间 basis_time，只应用此后的拆股，已存历史不需要重新抓取。
+
+        Returns:
+            Optional[Dict[str, Any]]: 请求失败时的错误结果，否则为 None
+        """
+        now = int(time.time())
+        synced_at = store.meta(symbol, "events").get("synced_at")
+        if synced_at is not None and now - synced_at < max_age:
+            return None
+
+        bases = {interval: store.meta(symbol, interval)["basis_time"] for interval in store.intervals(symbol)}
+        starts = list(bases.values()) + ([synced_at] if synced_at is not None else [])
+        if not starts:
+            store.update_meta(symbol, "events", {"synced_at": now})
+            return None
+
+        stored = store.events(symbol)
+        loaded = await self._load_events(store, symbol, min(starts), now)
+        if not loaded["success"]:
+            return loaded
+        known = loaded["events"]
+
+        if synced_at is not None and stored.size:
+            # 本次重新抓取到的分红已是新基准，其余已存分红按新拆股换算
+            factors = split_factors(stored["timestamp"], known, after=synced_at, until=now)
+            fetched_keys = loaded["fetched"]["timestamp"] * 2 + loaded["fetched"]["kind"]
+            changed = (factors != 1) & ~np.isin(stored["timestamp"] * 2 + stored["kind"], fetched_keys)
+            if changed.any():
+                store.write_events(symbol, rebase_events(stored[changed], factors[changed]))
+
+        for interval, basis in bases.items():
+            bars = np.asarray(store.bars(symbol, interval))
+            factors = split_factors(bars["timestamp"], known, after=basis, until=now)
+            if (factors != 1).any():
+                logger.info(f"Rebasing stored {symbol} {interval} bars for splits after {basis}")
+                store.write(symbol, interval, rebase_bars(bars, factors), meta={"basis_time": now})
+            else:
+                store.update_meta(symbol, interval, {"basis_time": now})
+        store.update_meta(symbol, "events", {"synced_at": now})
+        return None
 
     async def get_stock_news(self, symbol: str, region: str = "US", snippet_count: int = 10) -> Dict[str, Any]:
         """获取股票相关的新闻数据
@@ -416,6 +735,8 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        columnar: bool = False,
+        adjust: bool = False,
     ) -> Dict[str, Any]:
         """Get price data for multiple stocks
 
@@ -425,6 +746,8 @@ class YahooFinanceSource(BaseAPI):
             end_date(str): End date in YYYY-MM-DD format
             interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            columnar(bool): Return "columns" instead of "prices" for each stock, same as get_stock_price, default: False
+            adjust(bool): Back-adjust prices for dividends, same as get_stock_price, default: False
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -473,7 +796,7 @@ class YahooFinanceSource(BaseAPI):
             for symbol in symbols:
                 try:
                     result = await self.get_stock_price(
-                        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval, events=events
+                        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval, events=events, columnar=columnar, adjust=adjust
                     )
                     if result["success"]:
                         stocks_data.append(result["data"])
@@ -928,3 +1251,86 @@ class YahooFinanceSource(BaseAPI):
             logger.error(error_msg)
             logger.exception(e)
             return {"success": False, "error": error_msg}
+
+    async def get_stock_snapshot(self, symbols: List[str], parts: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get a full company view for several stocks in one call. Stock info, insights, statistics, financial data and news
+        are fetched concurrently and merged into one record per symbol. Each part is cached for its own freshness period
+        (info 15 min, news 10 min, insights 6 h, statistics and financial data 24 h), so repeated snapshots only refetch stale parts.
+
+        Args:
+            symbols(List[str]): Stock code list
+            parts(List[str]): Parts to include, options: info|insights|statistics|financial_data|news, default: all
+
+        Returns:
+            Dict[str, Any]: Dictionary containing one snapshot per symbol, e.g.
+            {
+                "success": True,
+                "data": {
+                    "count": 1,
+                    "snapshots": [
+                        {
+                            "symbol": "AAPL",
+                            "info": {...},            # Same as get_stock_info data
+                            "insights": {...},        # Same as get_stock_insights data
+                            "statistics": {...},      # Same as get_stock_statistics data
+                            "financial_data": {...},  # Same as get_financial_data data
+                            "news": [...],            # Same as get_stock_news simple_news
+                            "errors": {}              # Part name -> error message for failed parts
+                        }
+                    ]
+                }
+            }
+        """
+        try:
+            parts = parts or list(SNAPSHOT_TTL)
+            unknown = [part for part in parts if part not in SNAPSHOT_TTL]
+            if unknown:
+                raise ValueError(f"Unknown snapshot parts: {', '.join(unknown)}")
+            symbols = list(dict.fromkeys(symbols))
+            semaphore = asyncio.Semaphore(self._snapshot_concurrency)
+
+            async def load(symbol: str, part: str) -> Dict[str, Any]:
+                cached = self._snapshot_cache.get((part, symbol))
+                if cached is not None:
+                    return {"success": True, "data": cached}
+                async with semaphore:
+                    result = await self._fetch_snapshot_part(symbol, part)
+                if result["success"]:
+                    self._snapshot_cache.set((part, symbol), result["data"], SNAPSHOT_TTL[part])
+                return result
+
+            pairs = [(symbol, part) for symbol in symbols for part in parts]
+            results = await asyncio.gather(*(load(symbol, part) for symbol, part in pairs))
+
+            snapshots: Dict[str, Dict[str, Any]] = {symbol: {"symbol": symbol} for symbol in symbols}
+            errors: Dict[str, Dict[str, str]] = {symbol: {} for symbol in symbols}
+            for (symbol, part), result in zip(pairs, results):
+                snapshots[symbol][part] = result["data"] if result["success"] else None
+                if not result["success"]:
+                    errors[symbol][part] = result["error"]
+            for symbol in symbols:
+                snapshots[symbol]["errors"] = errors[symbol]
+
+            if pairs and all(not result["success"] for result in results):
+                return {"success": False, "error": "All snapshot requests failed: " + "; ".join(sorted({r["error"] for r in results}))}
+            return {"success": True, "data": {"count": len(snapshots), "snapshots": list(snapshots.values())}}
+
+        except Exception as e:
+            logger.error(f"Error occurred while getting stock snapshot: {str(e)}")
+            logger.exception(e)
+            return {"success": False, "error": str(e)}
+
+    async def _fetch_snapshot_part(self, symbol: str, part: str) -> Dict[str, Any]:
+        """请求快照的单个部分，新闻只保留列表"""
+        if part == "info":
+            return await self.get_stock_info(symbol)
+        if part == "insights":
+            return await self.get_stock_insights(symbol)
+        if part == "statistics":
+            return await self.get_stock_statistics(symbol)
+        if part == "financial_data":
+            return await self.get_financial_data(symbol)
+        result = await self.get_stock_news(symbol)
+        if result["success"]:
+            return {"success": True, "data": result["data"]["simple_news"]}
+        return result